@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy import delete, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from audit import audit
+from cache import cache, count_key
+from db_connection import engine
+from sqlmodels_db import ArchivedConsoleSQL, ArchivedGameSQL
+from utils.exporters import ndjson_chunk
+
+# Entradas archivadas hace mas de estos dias salen de la base de datos a ficheros comprimidos
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+ARCHIVE_EXPORT_DIR = os.getenv("ARCHIVE_EXPORT_DIR", "archive_exports")
+# Cada cuantas horas se ejecuta la retencion en segundo plano (0 = solo bajo demanda, POST /admin/archive/retention)
+ARCHIVE_RETENTION_INTERVAL_HOURS = float(os.getenv("ARCHIVE_RETENTION_INTERVAL_HOURS", "0"))
+RETENTION_FETCH_SIZE = 1000
+
+ARCHIVE_MODELS = (ArchivedGameSQL, ArchivedConsoleSQL)
+
+logger = logging.getLogger("archive_retention")
+
+
+async def install_archive_indexes(conn: AsyncConnection):
+    """Indice por archived_at en las tablas de archivo (create_all no lo anade a tablas ya existentes)."""
+    for model in ARCHIVE_MODELS:
+        table_name = model.__tablename__
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table_name}_archived_at ON {table_name} (archived_at)"
+        ))
+
+
+async def install_archive_nullable_columns(conn: AsyncConnection):
+    """
+    Quita el NOT NULL de las columnas que el modelo de archivo ya declara opcionales
+    (p. ej. Year: esquemas anteriores no podian archivar juegos sin anio).
+    - PostgreSQL: ALTER COLUMN ... DROP NOT NULL.
+    - SQLite no permite cambiar una columna: se recrea la tabla y se copian las filas.
+    """
+    for model in ARCHIVE_MODELS:
+        table = model.__table__
+        existing = await conn.run_sync(lambda sync_conn: {
+            "columns": inspect(sync_conn).get_columns(table.name),
+            "indexes": [index["name"] for index in inspect(sync_conn).get_indexes(table.name)],
+        })
+        relaxed = [
+            column["name"] for column in existing["columns"]
+            if not column["nullable"] and column["name"] in table.c and table.c[column["name"]].nullable
+        ]
+        if not relaxed:
+            continue
+        if conn.dialect.name == "postgresql":
+            for name in relaxed:
+                await conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN "{name}" DROP NOT NULL'))
+            continue
+        legacy = f"{table.name}_legacy"
+        names = ", ".join(f'"{column["name"]}"' for column in existing["columns"] if column["name"] in table.c)
+        await conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {legacy}"))
+        for index in existing["indexes"]:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        await conn.run_sync(lambda sync_conn: table.create(sync_conn))
+        await conn.execute(text(f"INSERT INTO {table.name} ({names}) SELECT {names} FROM {legacy}"))
+        await conn.execute(text(f"DROP TABLE {legacy}"))
+
+
+async def expire_archive(
+    conn: AsyncConnection, model: Type, cutoff: datetime, export_dir: str = ARCHIVE_EXPORT_DIR
+) -> Dict[str, Any]:
+    """
+    Vuelca a `export_dir` (NDJSON gzip) las filas con archived_at < cutoff y las borra de la tabla,
+    en la transaccion de `conn`. El fichero queda escrito y sincronizado antes del DELETE:
+    si algo falla no se pierde nada (como mucho queda un fichero con filas que siguen en la tabla).
+    """
+    table = model.__table__
+    condition = table.c.archived_at < cutoff
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(
+        export_dir, f"{table.name}-before-{cutoff:%Y%m%d}-{datetime.now():%Y%m%dT%H%M%S%f}.ndjson.gz"
+    )
+    # Nombre temporal unico: dos ejecuciones simultaneas no pueden pisarse el fichero
+    fd, tmp_path = tempfile.mkstemp(dir=export_dir, prefix=f".{table.name}-", suffix=".tmp")
+
+    exported = 0
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            statement = select(*table.c).where(condition).order_by(table.c.archived_at)
+            result = await conn.stream(statement.execution_options(yield_per=RETENTION_FETCH_SIZE))
+            async for partition in result.mappings().partitions(RETENTION_FETCH_SIZE):
+                chunk = ndjson_chunk([dict(row) for row in partition]).encode("utf-8")
+                await asyncio.to_thread(gz.write, chunk)
+                exported += len(partition)
+            gz.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    if not exported:
+        os.remove(tmp_path)
+        return {"table": table.name, "exported": 0, "deleted": 0, "file": None}
+    os.replace(tmp_path, path)
+
+    deleted = (await conn.execute(delete(table).where(condition))).rowcount
+    if deleted != exported:
+        # No deberia pasar (archived_at siempre es "ahora" al archivar); mejor no borrar nada
+        raise RuntimeError(f"{table.name}: exported {exported} rows but the delete matched {deleted}")
+    return {"table": table.name, "exported": exported, "deleted": deleted, "file": path}
+
+
+async def run_retention(days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Aplica la retencion a todas las tablas de archivo, una transaccion por tabla."""
+    cutoff = datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS if days is None else days)
+    results = []
+    for model in ARCHIVE_MODELS:
+        async with engine.begin() as conn:
+            results.append(await expire_archive(conn, model, cutoff))
+        if results[-1]["deleted"]:
+            audit.record(model.__tablename__, "expire", source="retention",
+                         deleted=results[-1]["deleted"], file=results[-1]["file"])
+    await cache.delete(count_key("archived_games"), count_key("archived_consoles"))
+    return results
+
+
+async def retention_loop(interval_hours: float = ARCHIVE_RETENTION_INTERVAL_HOURS):
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            for result in await run_retention():
+                if result["deleted"]:
+                    logger.info("Archive retention: %s rows from %s -> %s",
+                                result["deleted"], result["table"], result["file"])
+        except Exception:
+            logger.exception("Archive retention failed")
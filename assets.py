@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Set
+
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin el paquete 'Brotli' solo se generan variantes .gz
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # Opcional: sin 'Pillow' no se generan variantes WebP
+    Image = None
+
+STATIC_DIR = "statics"
+STATIC_URL = "/statics"
+# Ficheros con hash en el nombre y sus variantes; se sirven desde STATIC_URL junto a los originales
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "static_build")
+MANIFEST_NAME = "manifest.json"
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".html", ".txt", ".json", ".map"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+# Anchos de las variantes WebP (las mayores que la imagen original no se generan)
+WEBP_WIDTHS = (224, 480, 960)
+WEBP_QUALITY = 80
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Por orden de preferencia
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# nombre logico -> {"file": nombre con hash, "webp": [[ancho, nombre], ...]}
+manifest: Dict[str, Dict[str, Any]] = {}
+# Todos los nombres con hash (incluidas las variantes WebP), los que se sirven como immutable
+hashed_files: Set[str] = set()
+
+
+def _hashed_name(name: str, digest: str) -> str:
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def _write_compressed(path: str):
+    with open(path, "rb") as source:
+        data = source.read()
+    with open(f"{path}.gz", "wb") as target:
+        target.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{path}.br", "wb") as target:
+            target.write(brotli.compress(data, quality=11))
+
+
+def _write_webp_variants(path: str, hashed: str) -> List[List[Any]]:
+    variants = []
+    with Image.open(path) as image:
+        root, _ = os.path.splitext(hashed)
+        for width in WEBP_WIDTHS:
+            if width >= image.width:
+                break
+            name = f"{root}.w{width}.webp"
+            target = os.path.join(STATIC_BUILD_DIR, name)
+            if not os.path.exists(target):
+                height = round(image.height * width / image.width)
+                image.resize((width, height), Image.LANCZOS).save(target, "WEBP", quality=WEBP_QUALITY)
+            variants.append([width, name])
+    return variants
+
+
+def build_assets() -> Dict[str, Any]:
+    """
+    Copia cada fichero de STATIC_DIR a STATIC_BUILD_DIR con el hash del contenido en el nombre
+    y genera sus variantes (.gz/.br para texto, WebP redimensionado para imagenes).
+    Es idempotente: lo que ya existe con el mismo hash no se vuelve a generar.
+    """
+    started = time.perf_counter()
+    os.makedirs(STATIC_BUILD_DIR, exist_ok=True)
+    built = {}
+    for directory, _, files in os.walk(STATIC_DIR):
+        for filename in files:
+            source = os.path.join(directory, filename)
+            name = os.path.relpath(source, STATIC_DIR).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            hashed = _hashed_name(name, digest)
+            target = os.path.join(STATIC_BUILD_DIR, hashed)
+            ext = os.path.splitext(filename)[1].lower()
+
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(source, target)
+                if ext in COMPRESSIBLE_EXTENSIONS:
+                    _write_compressed(target)
+            entry = {"file": hashed, "webp": []}
+            if ext in IMAGE_EXTENSIONS and Image is not None:
+                entry["webp"] = _write_webp_variants(source, hashed)
+            built[name] = entry
+
+    with open(os.path.join(STATIC_BUILD_DIR, MANIFEST_NAME), "w") as f:
+        json.dump(built, f, indent=2, sort_keys=True)
+    manifest.clear()
+    manifest.update(built)
+    hashed_files.clear()
+    for entry in built.values():
+        hashed_files.add(entry["file"])
+        hashed_files.update(variant for _, variant in entry["webp"])
+    return {"assets": len(built), "seconds": round(time.perf_counter() - started, 4)}
+
+
+def asset_url(name: str) -> str:
+    """URL con hash de un fichero de statics/ (la original si todavia no se ha ejecutado build_assets)."""
+    entry = manifest.get(name)
+    return f"{STATIC_URL}/{entry['file'] if entry else name}"
+
+
+def asset_srcset(name: str) -> str:
+    """srcset con las variantes WebP de una imagen, o '' si no hay."""
+    entry = manifest.get(name)
+    if not entry:
+        return ""
+    return ", ".join(f"{STATIC_URL}/{variant} {width}w" for width, variant in entry["webp"])
+
+
+def _accepted_encodings(scope: Scope) -> set:
+    for key, value in scope.get("headers", []):
+        if key == b"accept-encoding":
+            accepted = set()
+            for token in value.decode("latin-1").split(","):
+                coding, _, params = token.strip().partition(";")
+                if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    accepted.add(coding.strip().lower())
+            return accepted
+    return set()
+
+
+class AssetStaticFiles(StaticFiles):
+    """
+    StaticFiles que sirve STATIC_DIR y STATIC_BUILD_DIR bajo la misma URL. Los ficheros con hash
+    se sirven con Cache-Control immutable y, si existe, con su variante precomprimida (br/gzip)
+    segun Accept-Encoding. Los nombres sin hash siguen funcionando con la cache normal.
+    """
+
+    def __init__(self, *, directory: str = STATIC_DIR, build_directory: str = STATIC_BUILD_DIR, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.build_directory = build_directory
+        os.makedirs(build_directory, exist_ok=True)
+        self.all_directories = [build_directory, *self.all_directories]
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path not in hashed_files:
+            return await super().get_response(path, scope)
+
+        accepted = _accepted_encodings(scope)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        for encoding, suffix in ENCODINGS:
+            compressed = os.path.join(self.build_directory, f"{path}{suffix}")
+            if encoding in accepted and os.path.isfile(compressed):
+                return FileResponse(
+                    compressed,
+                    media_type=media_type,
+                    headers={
+                        "Content-Encoding": encoding,
+                        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+                        "Vary": "Accept-Encoding",
+                    },
+                )
+
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+if __name__ == "__main__":
+    # Paso de build previo al despliegue: python assets.py
+    print(build_assets(), file=sys.stderr)
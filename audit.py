@@ -0,0 +1,247 @@
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Registro de cambios: NDJSON comprimido, un fichero nuevo al llegar a AUDIT_ROTATE_BYTES (sin comprimir)
+AUDIT_LOG_DIR = os.getenv("AUDIT_LOG_DIR", "audit_logs")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+# Cada cuantos segundos se hace fsync de lo escrito (0 = despues de cada lote)
+AUDIT_FSYNC_INTERVAL_SECONDS = float(os.getenv("AUDIT_FSYNC_INTERVAL_SECONDS", "1"))
+AUDIT_ROTATE_BYTES = int(os.getenv("AUDIT_ROTATE_BYTES", str(64 * 1024 * 1024)))
+# Tiempo maximo (s) que stop() espera a que el escritor vacie la cola; despues se cancela y se escribe lo que quede
+AUDIT_STOP_TIMEOUT_SECONDS = float(os.getenv("AUDIT_STOP_TIMEOUT_SECONDS", "10"))
+
+# Marca de fin en la cola: el escritor termina el lote en curso y sale
+_STOP = object()
+
+logger = logging.getLogger("audit")
+
+
+class AuditLog:
+    """
+    Cola de eventos de cambio (create/update/delete/archive/restore...) y su escritor en segundo plano.
+    record() no bloquea: deja el evento en una asyncio.Queue acotada y la tarea de start() la vacia
+    por lotes en un hilo, que escribe el registro comprimido y las copias de seguridad de los borrados.
+    Si la cola esta llena el evento se escribe en un hilo aparte (sin bloquear el loop); sin tarea
+    (scripts, tests sin lifespan) se escribe en el momento. Nunca se pierde, solo deja de ir por lotes.
+    """
+
+    def __init__(self, directory: str = AUDIT_LOG_DIR, queue_size: int = AUDIT_QUEUE_SIZE,
+                 batch_size: int = AUDIT_BATCH_SIZE, fsync_interval: float = AUDIT_FSYNC_INTERVAL_SECONDS,
+                 rotate_bytes: int = AUDIT_ROTATE_BYTES):
+        self.directory = directory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        # entidad -> (CSV de copias de seguridad, columnas); sus eventos "delete" tambien se copian alli
+        self.backups: Dict[str, Tuple[str, Sequence[str]]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        # Escrituras de desborde aun en el executor: stop() las espera antes de cerrar el fichero
+        self._overflow: Set[asyncio.Future] = set()
+        # Lote cuya escritura fallo: se reintenta delante del siguiente (o en stop())
+        self._failed: List[Dict[str, Any]] = []
+        # Un solo escritor de ficheros a la vez (hilo del lote o escritura directa)
+        self._write_lock = threading.Lock()
+        self._raw = None
+        self._gzip: Optional[gzip.GzipFile] = None
+        self._path: Optional[str] = None
+        self._file_bytes = 0
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self.events = 0
+        self.batches = 0
+        self.direct_writes = 0
+        self.overflow_writes = 0
+
+    def register_backup(self, entity: str, path: str, fieldnames: Sequence[str]):
+        self.backups[entity] = (path, list(fieldnames))
+
+    # ---------------- productores ----------------
+    def record(self, entity: str, action: str, *ids: Any, data: Any = None, source: str = "api", **extra: Any):
+        event = {"ts": datetime.now().isoformat(), "entity": entity, "action": action,
+                 "ids": list(ids), "source": source, **extra}
+        if data is not None:
+            event["data"] = data.model_dump() if hasattr(data, "model_dump") else data
+        loop = self._loop
+        if self._queue is None or loop is None:
+            self._write_direct(event)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not loop:
+            # Desde un hilo (executor de los CSV): se encola en el loop del escritor
+            loop.call_soon_threadsafe(self._enqueue, event)
+        else:
+            self._enqueue(event)
+
+    def _enqueue(self, event: Dict[str, Any]):
+        if self._queue is None:
+            # Llegado por call_soon_threadsafe despues de stop()
+            self._write_direct(event)
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Nada de escritura + fsync en el loop: el evento va a un hilo del executor por defecto
+            self.overflow_writes += 1
+            future = self._loop.run_in_executor(None, self._write_direct, event)
+            self._overflow.add(future)
+            future.add_done_callback(self._overflow.discard)
+
+    def _write_direct(self, event: Dict[str, Any]):
+        self.direct_writes += 1
+        self._write_batch([event])
+        self._sync()
+
+    # ---------------- tarea en segundo plano ----------------
+    def start(self):
+        """Arranca la tarea que vacia la cola; llamar desde el loop de la aplicacion (startup)."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = AUDIT_STOP_TIMEOUT_SECONDS):
+        """Vacia lo pendiente, cierra el fichero actual y vuelve al modo de escritura directa."""
+        if self._task is None:
+            return
+        task, queue = self._task, self._queue
+        try:
+            # La marca va detras de lo ya encolado: el escritor lo escribe todo antes de salir
+            await asyncio.wait_for(queue.put(_STOP), timeout=timeout)
+            await asyncio.wait_for(task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Audit writer did not stop within %ss; cancelling it", timeout)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._queue = self._task = self._loop = None
+        if self._overflow:
+            await asyncio.gather(*self._overflow, return_exceptions=True)
+        pending = []
+        while not queue.empty():
+            event = queue.get_nowait()
+            if event is not _STOP:
+                pending.append(event)
+        await self._write_pending(pending)
+        if self._failed:
+            logger.error("Audit log: %d events could not be written before shutdown", len(self._failed))
+            self._failed = []
+        await asyncio.to_thread(self.close)
+
+    async def _run(self):
+        while True:
+            timeout = self.fsync_interval if self._dirty or self._failed else None
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self._write_pending([])
+                await self._sync_pending()
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stopping = any(event is _STOP for event in batch)
+            await self._write_pending([event for event in batch if event is not _STOP])
+            if stopping or time.monotonic() - self._last_sync >= self.fsync_interval:
+                await self._sync_pending()
+            if stopping:
+                return
+
+    async def _write_pending(self, events: List[Dict[str, Any]]):
+        """Escribe `events` detras del lote que fallo la ultima vez; si vuelve a fallar, se guardan todos."""
+        batch, self._failed = self._failed + events, []
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except Exception:
+            logger.exception("Audit log write failed (%d events); retrying them with the next batch", len(batch))
+            self._failed = batch
+
+    async def _sync_pending(self):
+        try:
+            await asyncio.to_thread(self._sync)
+        except Exception:
+            # _dirty sigue activo: el siguiente fsync lo vuelve a intentar
+            logger.exception("Audit log fsync failed")
+
+    # ---------------- ficheros ----------------
+    def _write_batch(self, events: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events).encode("utf-8")
+        backups: Dict[str, List[Dict[str, Any]]] = {}
+        for event in events:
+            if event["action"] == "delete" and event["entity"] in self.backups and "data" in event:
+                backups.setdefault(event["entity"], []).append(event["data"])
+        with self._write_lock:
+            if self._gzip is None or self._file_bytes >= self.rotate_bytes:
+                self._rotate()
+            self._gzip.write(lines)
+            self._file_bytes += len(lines)
+            # Una apertura por fichero y lote en vez de una por borrado
+            for entity, rows in backups.items():
+                path, fieldnames = self.backups[entity]
+                with open(path, mode="a", newline="") as backup_file:
+                    csv.DictWriter(backup_file, fieldnames=fieldnames, extrasaction="ignore").writerows(rows)
+            self._dirty = True
+            self.events += len(events)
+            self.batches += 1
+
+    def _rotate(self):
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        self._path = os.path.join(self.directory, f"changes-{datetime.now():%Y%m%dT%H%M%S%f}.ndjson.gz")
+        self._raw = open(self._path, "ab")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        self._file_bytes = 0
+
+    def _sync(self):
+        with self._write_lock:
+            if self._gzip is not None and self._dirty:
+                # Z_SYNC_FLUSH: lo escrito hasta aqui se puede descomprimir aunque el proceso caiga
+                self._gzip.flush()
+                self._raw.flush()
+                os.fsync(self._raw.fileno())
+            self._dirty = False
+            self._last_sync = time.monotonic()
+
+    def _close_file(self):
+        if self._gzip is not None:
+            self._gzip.close()
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            self._raw.close()
+        self._gzip = self._raw = None
+
+    def close(self):
+        with self._write_lock:
+            self._close_file()
+            self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "events": self.events,
+            "batches": self.batches,
+            "direct_writes": self.direct_writes,
+            "overflow_writes": self.overflow_writes,
+            "failed": len(self._failed),
+            "file": self._path,
+            "file_bytes": self._file_bytes,
+        }
+
+
+audit = AuditLog()
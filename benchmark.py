@@ -0,0 +1,539 @@
+"""
+Benchmark HTTP de todas las rutas de main.py y routers/web.py, sin servidor ni red:
+la app corre en el mismo proceso (httpx + ASGITransport) contra una base SQLite/aiosqlite
+temporal cargada desde data/games.csv y data/consoles.csv (y copias temporales de los CSV
+para las rutas /game y /console, que escriben en ellos).
+
+    python benchmark.py                              # todas las rutas, JSON en stdout
+    python benchmark.py -c 32 -n 500 -o bench.json   # concurrencia y peticiones por ruta
+    python benchmark.py --only games --baseline bench_old.json
+
+Por cada ruta: peticiones, errores, codigos de estado, RPS y latencias p50/p95/p99 en ms.
+Las peticiones de escritura preparan sus datos (p. ej. crear el juego que luego se borra)
+fuera del tiempo medido.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+GAMES_CSV = "data/games.csv"
+CONSOLES_CSV = "data/consoles.csv"
+# Activa POST /admin/archive/retention y /analytics/sales/refresh en la app que se mide
+BENCH_ADMIN_TOKEN = "bench-admin-token"
+
+# Rutas que no son de la aplicacion (documentacion generada por FastAPI)
+IGNORED_PATHS = {"/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"}
+
+
+def prepare_environment(workdir: str):
+    """Variables de entorno que deben estar puestas antes de importar la app."""
+    os.environ["DB_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["ARCHIVE_EXPORT_DIR"] = os.path.join(workdir, "archive_exports")
+    os.environ["CSV_SNAPSHOT_DIR"] = os.path.join(workdir, "csv_snapshots")
+    os.environ["AUDIT_LOG_DIR"] = os.path.join(workdir, "audit_logs")
+    os.environ["ADMIN_TOKEN"] = BENCH_ADMIN_TOKEN
+    for variable, source in (("GAMES_CSV_PATH", GAMES_CSV), ("CONSOLES_CSV_PATH", CONSOLES_CSV)):
+        target = os.path.join(workdir, os.path.basename(source))
+        shutil.copyfile(source, target)
+        os.environ[variable] = target
+    # Las copias de seguridad de los borrados por /game y /console tampoco tocan el repositorio
+    os.environ["DELETED_GAMES_CSV_PATH"] = os.path.join(workdir, "deleted_games.csv")
+    os.environ["DELETED_CONSOLES_CSV_PATH"] = os.path.join(workdir, "deleted_consoles.csv")
+
+
+# ---------------- Datos de las peticiones ----------------
+def game_payload(i: int, **overrides) -> Dict[str, Any]:
+    payload = {
+        "Rank": 1_000_000 + i, "Game_Title": f"Bench Game {i}", "Platform": "BENCH", "Year": 2020,
+        "Genre": "Action", "Publisher": "Bench", "North_America": 0.1, "Europe": 0.1, "Japan": 0.1,
+        "Rest_of_World": 0.1, "Global": 0.4, "Review": "Bench",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def console_payload(i: int, **overrides) -> Dict[str, Any]:
+    payload = {
+        "Console_Name": f"Bench Console {i}", "Type": "Home", "Company": "Bench",
+        "Released_Year": 2020, "Discontinuation_Year": 2024, "Units_Sold": 1.0,
+    }
+    payload.update(overrides)
+    return payload
+
+
+async def create_game(client: httpx.AsyncClient, i: int, **overrides) -> int:
+    response = await client.post("/games/", json=game_payload(i, **overrides))
+    return response.json()["index"]
+
+
+async def create_console(client: httpx.AsyncClient, i: int, **overrides) -> int:
+    response = await client.post("/consoles/", json=console_payload(i, **overrides))
+    return response.json()["id"]
+
+
+async def archived_game(client: httpx.AsyncClient, i: int) -> int:
+    game_id = await create_game(client, i)
+    await client.post(f"/games/{game_id}/delete")
+    return game_id
+
+
+async def archived_console(client: httpx.AsyncClient, i: int) -> int:
+    console_id = await create_console(client, i)
+    await client.post(f"/consoles/{console_id}/delete")
+    return console_id
+
+
+def subscribers_csv(i: int, rows: int = 1000) -> bytes:
+    return ("email\n" + "".join(f"bench{i}-{row}@example.com\n" for row in range(rows))).encode()
+
+
+# ---------------- Escenarios ----------------
+Request = Dict[str, Any]
+
+
+class Scenario:
+    """
+    Una ruta a medir. `build(client, i)` prepara (sin cronometrar) la peticion numero `i`
+    y devuelve los argumentos de client.request; `expect` son los codigos que cuentan como exito.
+    """
+
+    def __init__(self, method: str, route: str, build: Callable[[httpx.AsyncClient, int], Awaitable[Request]],
+                 expect=(200,), name: Optional[str] = None):
+        self.method = method
+        self.route = route
+        self.build = build
+        self.expect = set(expect)
+        self.name = name or f"{method} {route}"
+
+
+def static(path: str, **kwargs) -> Callable[[httpx.AsyncClient, int], Awaitable[Request]]:
+    async def build(client, i):
+        return {"url": path, **kwargs}
+    return build
+
+
+def scenarios(max_game_id: int, max_console_id: int) -> List[Scenario]:
+    # Lecturas repartidas por toda la tabla para no medir solo el cache
+    def game_id(i):
+        return i % max_game_id + 1
+
+    def console_id(i):
+        return i % max_console_id + 1
+
+    async def build_game_get(client, i):
+        return {"url": f"/games/{game_id(i)}"}
+
+    async def build_console_get(client, i):
+        return {"url": f"/consoles/{console_id(i)}"}
+
+    async def build_games_page(client, i):
+        return {"url": "/games/view", "params": {"page": i % 50 + 1}}
+
+    async def build_bulk(client, i):
+        operations = [{"op": "insert", "data": game_payload(i * 100 + n)} for n in range(50)]
+        return {"url": "/games/bulk", "json": {"operations": operations}}
+
+    async def build_consoles_bulk(client, i):
+        operations = [{"op": "insert", "data": console_payload(i * 100 + n)} for n in range(50)]
+        return {"url": "/consoles/bulk", "json": {"operations": operations}}
+
+    async def build_game_archive(client, i):
+        await create_game(client, i, Platform=f"BENCH-{i}")
+        return {"url": "/games/archive", "json": {"platform": f"BENCH-{i}"}}
+
+    async def build_game_restore(client, i):
+        return {"url": "/games/restore", "json": {"ids": [await archived_game(client, i)]}}
+
+    async def build_console_archive(client, i):
+        await create_console(client, i, Company=f"BENCH-{i}")
+        return {"url": "/consoles/archive", "json": {"company": f"BENCH-{i}"}}
+
+    async def build_console_restore(client, i):
+        return {"url": "/consoles/restore", "json": {"ids": [await archived_console(client, i)]}}
+
+    async def build_game_create(client, i):
+        return {"url": "/games/", "json": game_payload(i)}
+
+    async def build_game_put(client, i):
+        return {"url": f"/games/{game_id(i)}", "json": game_payload(i, Rank=game_id(i))}
+
+    async def build_game_patch(client, i):
+        return {"url": f"/games/{game_id(i)}", "json": {"Review": f"Bench {i}"}}
+
+    async def build_game_delete(client, i):
+        return {"url": f"/games/{await create_game(client, i)}"}
+
+    head_token = {}
+
+    async def build_games_changes(client, i):
+        # Sincronizacion incremental: un cambio desde el ultimo token, no el catalogo completo
+        if "games" not in head_token:
+            params = {"limit": 5000}
+            while True:
+                page = (await client.get("/games/changes", params=params)).json()
+                params["since"] = page["next_token"]
+                if not page["has_more"]:
+                    break
+            head_token["games"] = page["next_token"]
+        await client.patch(f"/games/{game_id(i)}", json={"Review": f"Sync {i}"})
+        return {"url": "/games/changes", "params": {"since": head_token["games"]}}
+
+    async def build_console_create(client, i):
+        return {"url": "/consoles/", "json": console_payload(i)}
+
+    async def build_console_put(client, i):
+        return {"url": f"/consoles/{console_id(i)}", "json": console_payload(i)}
+
+    async def build_console_patch(client, i):
+        return {"url": f"/consoles/{console_id(i)}", "json": {"Units_Sold": float(i)}}
+
+    async def build_console_delete(client, i):
+        return {"url": f"/consoles/{await create_console(client, i)}"}
+
+    async def build_web_game_create(client, i):
+        return {"url": "/games/create", "data": game_payload(i)}
+
+    async def build_web_game_edit_form(client, i):
+        return {"url": f"/games/{game_id(i)}/edit"}
+
+    async def build_web_game_edit(client, i):
+        return {"url": f"/games/{game_id(i)}/edit", "data": game_payload(i, Rank=game_id(i))}
+
+    async def build_web_game_delete(client, i):
+        return {"url": f"/games/{await create_game(client, i)}/delete"}
+
+    async def build_web_game_restore(client, i):
+        return {"url": f"/games/{await archived_game(client, i)}/restore"}
+
+    async def build_web_console_create(client, i):
+        return {"url": "/consoles/create", "data": console_payload(i)}
+
+    async def build_web_console_edit_form(client, i):
+        return {"url": f"/consoles/{console_id(i)}/edit"}
+
+    async def build_web_console_edit(client, i):
+        return {"url": f"/consoles/{console_id(i)}/edit", "data": console_payload(i)}
+
+    async def build_web_console_delete(client, i):
+        return {"url": f"/consoles/{await create_console(client, i)}/delete"}
+
+    async def build_web_console_restore(client, i):
+        return {"url": f"/consoles/{await archived_console(client, i)}/restore"}
+
+    async def build_subscribe(client, i):
+        return {"url": "/subscribe", "data": {"email": f"bench{i}@example.com"}}
+
+    async def build_subscribers_import(client, i):
+        return {"url": "/subscribers/import", "files": {"file": ("subscribers.csv", subscribers_csv(i), "text/csv")}}
+
+    async def build_csv_game_get(client, i):
+        return {"url": f"/game/{game_id(i)}"}
+
+    async def build_csv_game_create(client, i):
+        return {"url": "/game", "json": game_payload(i, Rank=2_000_000 + i)}
+
+    async def build_csv_game_put(client, i):
+        return {"url": f"/game/{game_id(i)}", "json": game_payload(i, Rank=game_id(i))}
+
+    async def build_csv_game_delete(client, i):
+        response = await client.post("/game", json=game_payload(i, Rank=3_000_000 + i))
+        return {"url": f"/game/{response.json()['index']}"}
+
+    async def build_csv_console_get(client, i):
+        return {"url": f"/console/{console_id(i)}"}
+
+    async def build_csv_console_create(client, i):
+        return {"url": "/console", "json": {"Id": 1_000_000 + i, **console_payload(i)}}
+
+    async def build_csv_console_put(client, i):
+        return {"url": f"/console/{console_id(i)}", "json": {"Id": console_id(i), **console_payload(i)}}
+
+    async def build_csv_console_delete(client, i):
+        response = await client.post("/console", json={"Id": 2_000_000 + i, **console_payload(i)})
+        return {"url": f"/console/{response.json()['Id']}"}
+
+    from assets import asset_url
+
+    redirect = (303,)
+    return [
+        # Paginas
+        Scenario("GET", "/", static("/")),
+        Scenario("GET", "/about", static("/about")),
+        Scenario("GET", "/about_me", static("/about_me")),
+        Scenario("GET", "/statics", static(asset_url("style.css"), headers={"Accept-Encoding": "gzip, br"})),
+        # Juegos (HTML)
+        Scenario("GET", "/games/view", build_games_page),
+        Scenario("GET", "/games/search", static("/games/search", params={"q": "mario"})),
+        Scenario("GET", "/games/create", static("/games/create")),
+        Scenario("POST", "/games/create", build_web_game_create, redirect),
+        Scenario("GET", "/games/{game_id}/edit", build_web_game_edit_form),
+        Scenario("POST", "/games/{game_id}/edit", build_web_game_edit, redirect),
+        Scenario("POST", "/games/{game_id}/delete", build_web_game_delete, redirect),
+        Scenario("POST", "/games/{game_id}/restore", build_web_game_restore, redirect),
+        Scenario("GET", "/games/archived", static("/games/archived")),
+        # Consolas (HTML)
+        Scenario("GET", "/consoles/view", static("/consoles/view")),
+        Scenario("GET", "/consoles/search", static("/consoles/search", params={"q": "play"})),
+        Scenario("GET", "/consoles/create", static("/consoles/create")),
+        Scenario("POST", "/consoles/create", build_web_console_create, redirect),
+        Scenario("GET", "/consoles/{console_id}/edit", build_web_console_edit_form),
+        Scenario("POST", "/consoles/{console_id}/edit", build_web_console_edit, redirect),
+        Scenario("POST", "/consoles/{console_id}/delete", build_web_console_delete, redirect),
+        Scenario("POST", "/consoles/{console_id}/restore", build_web_console_restore, redirect),
+        Scenario("GET", "/consoles/archived", static("/consoles/archived")),
+        # Suscripciones
+        Scenario("POST", "/subscribe", build_subscribe, redirect),
+        Scenario("GET", "/subscribers", static("/subscribers")),
+        Scenario("POST", "/subscribers/import", build_subscribers_import),
+        Scenario("GET", "/subscribers/export", static("/subscribers/export")),
+        # API de juegos
+        Scenario("GET", "/games/", static("/games/", params={"limit": 50})),
+        Scenario("GET", "/games/", static("/games/", params={"platform": "PS2", "year_from": 2000, "sort": "-Global"}),
+                 name="GET /games/ filtered+sorted"),
+        Scenario("GET", "/games/{game_id}", build_game_get),
+        Scenario("POST", "/games/", build_game_create),
+        Scenario("PUT", "/games/{game_id}", build_game_put),
+        Scenario("PATCH", "/games/{game_id}", build_game_patch),
+        Scenario("DELETE", "/games/{game_id}", build_game_delete),
+        Scenario("POST", "/games/bulk", build_bulk),
+        Scenario("POST", "/games/archive", build_game_archive),
+        Scenario("POST", "/games/restore", build_game_restore),
+        Scenario("GET", "/games/export", static("/games/export")),
+        Scenario("GET", "/games/changes", build_games_changes),
+        # API de consolas
+        Scenario("GET", "/consoles/", static("/consoles/", params={"limit": 50})),
+        Scenario("GET", "/consoles/{console_id}", build_console_get),
+        Scenario("POST", "/consoles/", build_console_create),
+        Scenario("PUT", "/consoles/{console_id}", build_console_put),
+        Scenario("PATCH", "/consoles/{console_id}", build_console_patch),
+        Scenario("DELETE", "/consoles/{console_id}", build_console_delete),
+        Scenario("POST", "/consoles/bulk", build_consoles_bulk),
+        Scenario("POST", "/consoles/archive", build_console_archive),
+        Scenario("POST", "/consoles/restore", build_console_restore),
+        Scenario("GET", "/consoles/export", static("/consoles/export")),
+        Scenario("GET", "/consoles/changes", static("/consoles/changes", params={"limit": 500})),
+        # Analitica y administracion
+        Scenario("GET", "/analytics/sales", static("/analytics/sales", params={"group_by": ["Genre", "Year"]})),
+        Scenario("POST", "/analytics/sales/refresh", static(
+            "/analytics/sales/refresh", headers={"X-Admin-Token": BENCH_ADMIN_TOKEN}
+        )),
+        Scenario("GET", "/admin/pool", static("/admin/pool")),
+        Scenario("GET", "/admin/cache", static("/admin/cache")),
+        Scenario("GET", "/admin/startup", static("/admin/startup")),
+        Scenario("GET", "/admin/audit", static("/admin/audit")),
+        Scenario("GET", "/metrics", static("/metrics")),
+        Scenario("POST", "/admin/archive/retention", static(
+            "/admin/archive/retention", params={"days": 30}, headers={"X-Admin-Token": BENCH_ADMIN_TOKEN}
+        )),
+        # API sobre los CSV
+        Scenario("GET", "/game/{game_id}", build_csv_game_get),
+        Scenario("POST", "/game", build_csv_game_create),
+        Scenario("PUT", "/game/{game_id}", build_csv_game_put),
+        Scenario("DELETE", "/game/{game_id}", build_csv_game_delete),
+        Scenario("GET", "/consoles", static("/consoles")),
+        Scenario("GET", "/games-csv", static("/games-csv", params={"platform": "wii", "sort": "-Global", "limit": 20})),
+        Scenario("GET", "/console/{console_id}", build_csv_console_get),
+        Scenario("POST", "/console", build_csv_console_create),
+        Scenario("PUT", "/console/{console_id}", build_csv_console_put),
+        Scenario("DELETE", "/console/{console_id}", build_csv_console_delete),
+    ]
+
+
+# ---------------- Medicion ----------------
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango mas cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    # ceil(fraction * n), redondeado antes para que 0.95 * 100 no de 96 por el error de coma flotante
+    rank = max(math.ceil(round(fraction * len(sorted_values), 9)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, offset: int):
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+    counter = iter(range(requests))
+    busy = 0.0
+
+    async def worker():
+        nonlocal errors, busy
+        for n in counter:
+            try:
+                kwargs = await scenario.build(client, offset + n)
+            except Exception as e:
+                # Fallo al preparar los datos: cuenta como error de la ruta, sin latencia
+                status_codes[f"prepare:{type(e).__name__}"] = status_codes.get(f"prepare:{type(e).__name__}", 0) + 1
+                errors += 1
+                continue
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, **kwargs)
+                await response.aread()
+                code = str(response.status_code)
+                ok = response.status_code in scenario.expect
+            except Exception as e:
+                code, ok = type(e).__name__, False
+            elapsed = time.perf_counter() - started
+            busy += elapsed
+            latencies.append(elapsed)
+            status_codes[code] = status_codes.get(code, 0) + 1
+            if not ok:
+                errors += 1
+
+    # El tiempo de pared incluye la preparacion; el RPS se calcula con el tiempo ocupado en peticiones
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    latencies.sort()
+    wall = busy / concurrency if concurrency else busy
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "name": scenario.name,
+        "method": scenario.method,
+        "route": scenario.route,
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": status_codes,
+        "rps": round(len(latencies) / wall, 1) if wall else None,
+        "mean_ms": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "max_ms": to_ms(latencies[-1]) if latencies else None,
+    }
+
+
+async def seed_database():
+    from db_connection import engine
+    from migration import bulk_import_csv
+    from sales_summary import refresh_sales_summary
+    from sqlmodels_db import ConsoleSQL, GameSQL
+
+    games = await bulk_import_csv(GAMES_CSV, GameSQL, engine)
+    consoles = await bulk_import_csv(CONSOLES_CSV, ConsoleSQL, engine)
+    async with engine.begin() as conn:
+        await refresh_sales_summary(conn)
+    return games, consoles
+
+
+def uncovered_routes(app, selected: List[Scenario]) -> List[str]:
+    covered = {(scenario.method, scenario.route) for scenario in selected}
+    missing = []
+    for route in app.routes:
+        if route.path in IGNORED_PATHS:
+            continue
+        for method in sorted(getattr(route, "methods", None) or {"GET"}):
+            if method != "HEAD" and (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+async def run(args) -> Dict[str, Any]:
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        # stdout queda libre para el JSON: los mensajes de arranque y de la carga van a stderr
+        games, consoles = await seed_database()
+        # Los errores 500 llegan como respuesta (y cuentan como error) en vez de como excepcion
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            selected = [
+                scenario for scenario in scenarios(games, consoles)
+                if not args.only or any(token in scenario.name for token in args.only)
+            ]
+            if not args.only:
+                for route in uncovered_routes(main.app, selected):
+                    print(f"WARNING: no benchmark scenario for {route}", file=sys.stderr)
+
+            for round_ in range(args.warmup):
+                for scenario in selected:
+                    try:
+                        await client.request(scenario.method, **await scenario.build(client, round_))
+                    except Exception as e:
+                        print(f"WARNING: warmup of {scenario.name} failed: {e!r}", file=sys.stderr)
+
+            results = []
+            for position, scenario in enumerate(selected):
+                result = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, offset=(position + 1) * 100_000
+                )
+                print(f"{result['name']:<45} {result['rps']!s:>9} rps  p50 {result['p50_ms']:>8} ms  "
+                      f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}", file=sys.stderr)
+                results.append(result)
+    await main.engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "seeded_games": games,
+            "seeded_consoles": consoles,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline_path: str):
+    """Imprime en stderr la variacion de RPS y p99 respecto a un JSON anterior."""
+    with open(baseline_path) as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    print(f"\n{'endpoint':<45} {'rps':>10} {'p99':>10}", file=sys.stderr)
+    for result in report["results"]:
+        old = baseline.get(result["name"])
+        if not old or not old["rps"] or not old["p99_ms"]:
+            continue
+        rps_delta = (result["rps"] - old["rps"]) / old["rps"] * 100
+        p99_delta = (result["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100
+        print(f"{result['name']:<45} {rps_delta:>+9.1f}% {p99_delta:>+9.1f}%", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark en proceso de todas las rutas HTTP.")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="peticiones simultaneas por ruta")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="peticiones por ruta")
+    parser.add_argument("--warmup", type=int, default=1, help="rondas de calentamiento sin medir")
+    parser.add_argument("--only", nargs="*", help="solo las rutas cuyo nombre contiene alguno de estos textos")
+    parser.add_argument("-o", "--output", help="fichero JSON de salida (por defecto stdout)")
+    parser.add_argument("--baseline", help="JSON de una ejecucion anterior con el que comparar")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    try:
+        prepare_environment(workdir)
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            report = asyncio.run(run(args))
+        finally:
+            sys.stdout = stdout
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.baseline:
+        compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+# Workers de uvicorn (--workers toma este valor por defecto); LRUCache solo es coherente con uno
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+GAMES_LIST_PREFIX = "games:list:"
+CONSOLES_LIST_PREFIX = "consoles:list:"
+COUNT_PREFIX = "count:"
+# HTML renderizado (templating.render_cached)
+STATIC_PAGES_PREFIX = "page:static:"
+GAMES_PAGES_PREFIX = "page:games:"
+CONSOLES_PAGES_PREFIX = "page:consoles:"
+
+
+class CacheBackend:
+    """
+    Interfaz del cache de lecturas. Los valores son estructuras JSON (dicts/listas),
+    asi que un backend compartido (Redis, memcached...) solo tiene que serializarlos.
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """Con `generation`, no guarda nada si hubo alguna invalidacion desde que se leyo (ver get_or_load)."""
+        raise NotImplementedError
+
+    async def generation(self) -> int:
+        """Contador que sube con cada delete/delete_prefix; un backend compartido lo guarda con los datos."""
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """
+    Cache en memoria del proceso, acotado a `maxsize` entradas (LRU) y con TTL por entrada.
+    Solo vale con un worker: las invalidaciones de un proceso no llegan a la copia de los demas
+    (check_single_worker lo comprueba al arrancar; con varios workers hace falta un backend compartido).
+    """
+
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+        self._generation = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Se invalido algo mientras se cargaba el valor: puede ser anterior a esa escritura
+                self.stale_sets += 1
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    async def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    async def delete(self, *keys: str):
+        with self._lock:
+            # Sube aunque la clave no este: puede haber una carga en curso que la iba a guardar
+            self._generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    async def delete_prefix(self, prefix: str):
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets,
+            }
+
+
+cache: CacheBackend = LRUCache()
+
+
+def count_key(table_name: str) -> str:
+    """Clave del total cacheado de una tabla, usada por pagination.paginate."""
+    return f"{COUNT_PREFIX}{table_name}"
+
+
+def game_key(game_id: int) -> str:
+    return f"game:{game_id}"
+
+
+def console_key(console_id: int) -> str:
+    return f"console:{console_id}"
+
+
+def check_single_worker():
+    """El cache en memoria con varios workers serviria datos ya invalidados en otro proceso."""
+    if WEB_CONCURRENCY > 1 and isinstance(cache, LRUCache):
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={WEB_CONCURRENCY}: the in-process LRUCache needs a single worker; "
+            "configure a shared cache backend or run one worker"
+        )
+
+
+async def get_or_load(key: str, loader: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+    """
+    Read-through: devuelve lo cacheado o llama a `loader` y guarda el resultado (None no se cachea).
+    La generacion se lee antes de cargar: si una escritura invalida mientras tanto, el valor
+    (quiza leido antes del commit) se devuelve pero no se guarda.
+    """
+    value = await cache.get(key)
+    if value is not None:
+        return value
+    generation = await cache.generation()
+    value = await loader()
+    if value is not None:
+        await cache.set(key, value, generation=generation)
+    return value
+
+
+async def invalidate_games(*game_ids: int):
+    """Borra las entradas de esos juegos, las paginas del listado que pueden contenerlos y los totales."""
+    await cache.delete(*[game_key(game_id) for game_id in game_ids])
+    await cache.delete(count_key("games"), count_key("archived_games"))
+    await cache.delete_prefix(GAMES_LIST_PREFIX)
+    await cache.delete_prefix(GAMES_PAGES_PREFIX)
+
+
+async def invalidate_consoles(*console_ids: int):
+    await cache.delete(*[console_key(console_id) for console_id in console_ids])
+    await cache.delete(count_key("consoles"), count_key("archived_consoles"))
+    await cache.delete_prefix(CONSOLES_LIST_PREFIX)
+    await cache.delete_prefix(CONSOLES_PAGES_PREFIX)
+
+
+async def invalidate_subscribers():
+    await cache.delete(count_key("subscribers"))
@@ -0,0 +1,237 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from sqlalchemy import func, inspect, literal, select as sa_select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from sqlmodels_db import ConsoleSQL, GameSQL, RowVersionSQL, TombstoneSQL
+
+# Tablas con row_version/updated_at y tombstones
+VERSIONED_MODELS = (GameSQL, ConsoleSQL)
+VERSION_COLUMNS = ("row_version", "updated_at")
+# Indices que cambiaron de columnas respecto a esquemas anteriores: se recrean al instalar
+VERSION_INDEXES = ("ix_games_row_version", "ix_consoles_row_version", "ix_tombstones_table_version")
+
+# Version de la transaccion en curso y limite seguro de lectura en PostgreSQL (xid8 -> bigint)
+PG_CURRENT_VERSION = "pg_current_xact_id()::text::bigint"
+PG_WATERMARK = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+# ---------------- Token ----------------
+def encode_change_token(table_name: str, since: int, **position: Any) -> str:
+    """
+    Token opaco en base64 url-safe. `since`: las versiones menores ya se entregaron.
+    Entre paginas de una misma sincronizacion lleva tambien la posicion (k, id) y la marca `w`
+    que se adopta al terminar.
+    """
+    payload = json.dumps({"t": table_name, "v": since, **position}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_change_token(token: str, table_name: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(data, dict) or not isinstance(data.get("v"), int):
+            raise ValueError("token without version")
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid change token")
+    if data.get("t") != table_name:
+        raise HTTPException(status_code=400, detail="Change token belongs to a different table")
+    return data
+
+
+# ---------------- Lectura ----------------
+async def current_watermark(session: AsyncSession, table_name: str) -> int:
+    """
+    Primera version que aun puede aparecer despues de esta lectura.
+    - PostgreSQL: xmin del snapshot (la transaccion en curso mas antigua). Cualquier transaccion
+      anterior ya termino, asi que sus filas las ven las consultas siguientes; las posteriores
+      se vuelven a leer en la proxima sincronizacion. Puede repetir filas, nunca saltarselas.
+    - SQLite: el contador + 1 (un solo escritor a la vez).
+    """
+    if session.bind.dialect.name == "postgresql":
+        return (await session.exec(text(PG_WATERMARK))).scalar_one()
+    counter = (await session.exec(
+        select(RowVersionSQL.version).where(RowVersionSQL.table_name == table_name)
+    )).first()
+    return (counter or 0) + 1
+
+
+async def get_changes(
+    session: AsyncSession, model: Type, since: Optional[str] = None, limit: int = 500
+) -> Tuple[List[Any], List[int], str, bool]:
+    """
+    Cambios de `model` desde el token `since` (sin token, desde el principio), en orden (row_version, id):
+    (filas creadas/modificadas, ids borrados o archivados, token siguiente, hay mas).
+    Se paginan por keyset sobre (row_version, pk) y (table_name, row_version, row_id), asi que el
+    coste depende de los cambios y no del tamano de la tabla. Un tombstone cuyo id ha vuelto a la
+    tabla (restaurado) no se entrega: la fila actual ya llega como cambio.
+    """
+    table_name = model.__tablename__
+    pk = model.__table__.primary_key.columns.values()[0]
+    position = decode_change_token(since, table_name) if since else {"v": 0}
+    last_version = position["v"]
+    # La marca se toma antes de leer y solo se adopta al final de la sincronizacion
+    watermark = position["w"] if "w" in position else await current_watermark(session, table_name)
+    if last_version > watermark:
+        raise HTTPException(status_code=410, detail="Change token is ahead of the feed; resync without 'since'")
+
+    rows_statement = select(model).where(model.row_version >= last_version)
+    tombstones_statement = select(TombstoneSQL.row_version, TombstoneSQL.row_id).where(
+        TombstoneSQL.table_name == table_name,
+        TombstoneSQL.row_version >= last_version,
+        ~sa_select(pk).where(pk == TombstoneSQL.row_id).exists(),
+    )
+    if "k" in position:
+        after = tuple_(literal(position["k"]), literal(position["id"]))
+        rows_statement = rows_statement.where(tuple_(model.row_version, pk) > after)
+        tombstones_statement = tombstones_statement.where(tuple_(TombstoneSQL.row_version, TombstoneSQL.row_id) > after)
+    rows = (await session.exec(rows_statement.order_by(model.row_version, pk).limit(limit + 1))).all()
+    tombstones = (await session.exec(
+        tombstones_statement.order_by(TombstoneSQL.row_version, TombstoneSQL.row_id).limit(limit + 1)
+    )).all()
+
+    changes = sorted(
+        [((row.row_version, getattr(row, pk.key)), row, None) for row in rows]
+        + [((version, row_id), None, row_id) for version, row_id in tombstones],
+        key=lambda change: change[0],
+    )
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+        version, last_id = changes[-1][0]
+        next_token = encode_change_token(table_name, last_version, w=watermark, k=version, id=last_id)
+    else:
+        next_token = encode_change_token(table_name, watermark)
+    items = [row for _, row, _ in changes if row is not None]
+    deleted = [row_id for _, _, row_id in changes if row_id is not None]
+    return items, deleted, next_token, has_more
+
+
+# ---------------- Esquema ----------------
+async def install_change_feed(conn: AsyncConnection):
+    """
+    row_version/updated_at en tablas ya existentes (create_all no anade columnas), sus indices
+    y los triggers que los mantienen en cada INSERT/UPDATE, mas los tombstones de cada DELETE
+    (borrar o archivar). Los triggers cubren tambien las sentencias multi-fila (bulk,
+    archivar/restaurar, la carga de migration.py).
+    Coste por escritura: PostgreSQL, un trigger BEFORE por fila que solo asigna dos columnas y un
+    INSERT ... SELECT por sentencia DELETE; ningun bloqueo compartido entre escritores.
+    SQLite: un UPDATE del contador y de la fila por cada fila escrita (los escritores ya van de uno en uno).
+    """
+    postgres = conn.dialect.name == "postgresql"
+    for name in VERSION_INDEXES:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for model in VERSIONED_MODELS:
+        table_ = model.__table__
+        pk = table_.primary_key.columns.values()[0].name
+        await _add_version_columns(conn, model)
+        if postgres:
+            await _install_postgres_triggers(conn, table_.name, pk)
+            # Filas anteriores al feed: la version de esta transaccion (el trigger la pone)
+            await conn.execute(text(f"UPDATE {table_.name} SET updated_at = NULL WHERE row_version IS NULL"))
+        else:
+            # Filas anteriores al feed: su propio id como version inicial, y el contador a partir de ahi
+            await conn.execute(text(f'UPDATE {table_.name} SET row_version = "{pk}" WHERE row_version IS NULL'))
+            await _seed_counter(conn, model)
+            data_columns = [column.name for column in table_.columns if column.name not in VERSION_COLUMNS]
+            await _install_sqlite_triggers(conn, table_.name, pk, data_columns)
+
+    def create_tombstone_indexes(sync_conn):
+        for index in TombstoneSQL.__table__.indexes:
+            index.create(sync_conn, checkfirst=True)
+    await conn.run_sync(create_tombstone_indexes)
+
+
+async def _add_version_columns(conn: AsyncConnection, model: Type):
+    table_ = model.__table__
+    existing = await conn.run_sync(lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(table_.name)})
+    for name in VERSION_COLUMNS:
+        column_type = table_.c[name].type.compile(dialect=conn.dialect)
+        if name not in existing:
+            await conn.execute(text(f"ALTER TABLE {table_.name} ADD COLUMN {name} {column_type}"))
+        elif conn.dialect.name == "postgresql" and name == "row_version":
+            # Esquemas anteriores la crearon como INTEGER; un xid8 no cabe
+            await conn.execute(text(f"ALTER TABLE {table_.name} ALTER COLUMN {name} TYPE {column_type}"))
+
+    def create_indexes(sync_conn):
+        for index in table_.indexes:
+            if any(column.name in VERSION_COLUMNS for column in index.columns):
+                index.create(sync_conn, checkfirst=True)
+    await conn.run_sync(create_indexes)
+
+
+async def _seed_counter(conn: AsyncConnection, model: Type):
+    table_name = model.__tablename__
+    counters = RowVersionSQL.__table__
+    if await conn.scalar(sa_select(counters.c.version).where(counters.c.table_name == table_name)) is not None:
+        return
+    tombstones = TombstoneSQL.__table__
+    highest = max(
+        await conn.scalar(sa_select(func.coalesce(func.max(model.__table__.c.row_version), 0))),
+        await conn.scalar(
+            sa_select(func.coalesce(func.max(tombstones.c.row_version), 0)).where(tombstones.c.table_name == table_name)
+        ),
+    )
+    await conn.execute(counters.insert().values(table_name=table_name, version=highest))
+
+
+async def _install_postgres_triggers(conn: AsyncConnection, table_name: str, pk: str):
+    # Version = id de la transaccion: no hay fila de contador que bloquee a los escritores entre si
+    await conn.execute(text(
+        f"CREATE OR REPLACE FUNCTION {table_name}_row_version() RETURNS trigger AS $$ BEGIN "
+        f"NEW.row_version := {PG_CURRENT_VERSION}; "
+        f"NEW.updated_at := LOCALTIMESTAMP; "
+        f"RETURN NEW; END $$ LANGUAGE plpgsql"
+    ))
+    # Un INSERT ... SELECT por sentencia DELETE (tabla de transicion), no uno por fila
+    await conn.execute(text(
+        f"CREATE OR REPLACE FUNCTION {table_name}_tombstone() RETURNS trigger AS $$ BEGIN "
+        f"INSERT INTO tombstones (table_name, row_id, row_version, deleted_at) "
+        f'SELECT TG_TABLE_NAME, deleted."{pk}", {PG_CURRENT_VERSION}, LOCALTIMESTAMP FROM deleted '
+        f"ON CONFLICT (table_name, row_id) DO UPDATE "
+        f"SET row_version = EXCLUDED.row_version, deleted_at = EXCLUDED.deleted_at; "
+        f"RETURN NULL; END $$ LANGUAGE plpgsql"
+    ))
+    for trigger, definition in (
+        (f"{table_name}_row_version",
+         f"BEFORE INSERT OR UPDATE ON {table_name} FOR EACH ROW EXECUTE FUNCTION {table_name}_row_version()"),
+        (f"{table_name}_tombstone",
+         f"AFTER DELETE ON {table_name} REFERENCING OLD TABLE AS deleted "
+         f"FOR EACH STATEMENT EXECUTE FUNCTION {table_name}_tombstone()"),
+    ):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger} ON {table_name}"))
+        await conn.execute(text(f"CREATE TRIGGER {trigger} {definition}"))
+
+
+async def _install_sqlite_triggers(conn: AsyncConnection, table_name: str, pk: str, data_columns: List[str]):
+    # SQLite no deja cambiar NEW en un BEFORE: se actualiza la fila en un AFTER. "UPDATE OF" las columnas
+    # de datos para que ese UPDATE de row_version/updated_at no vuelva a disparar el trigger
+    next_version = (
+        f"UPDATE row_versions SET version = version + 1 WHERE table_name = '{table_name}'; "
+    )
+    current_version = f"(SELECT version FROM row_versions WHERE table_name = '{table_name}')"
+    stamp = (
+        f"UPDATE {table_name} SET row_version = {current_version}, updated_at = datetime('now', 'localtime') "
+        f'WHERE "{pk}" = new."{pk}"; '
+    )
+    watched = ", ".join(f'"{column}"' for column in data_columns)
+    triggers = {
+        f"{table_name}_version_ai": f"AFTER INSERT ON {table_name} BEGIN {next_version}{stamp}END",
+        f"{table_name}_version_au": f"AFTER UPDATE OF {watched} ON {table_name} BEGIN {next_version}{stamp}END",
+        f"{table_name}_version_ad": (
+            f"AFTER DELETE ON {table_name} BEGIN {next_version}"
+            f"INSERT OR REPLACE INTO tombstones (table_name, row_id, row_version, deleted_at) "
+            f"VALUES ('{table_name}', old.\"{pk}\", {current_version}, datetime('now', 'localtime')); END"
+        ),
+    }
+    for name, body in triggers.items():
+        # DROP + CREATE: al subir SCHEMA_VERSION se recrean con las columnas actuales
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        await conn.execute(text(f"CREATE TRIGGER {name} {body}"))
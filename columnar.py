@@ -0,0 +1,139 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Tipos de columna de ColumnarTable
+INT = "int"
+FLOAT = "float"
+CATEGORY = "category"  # pocos valores distintos: codigos int32 + diccionario
+TEXT = "text"  # casi todos distintos: se filtra con un indice hash por valor en minusculas
+
+
+def _number(value: Any) -> float:
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class ColumnarTable:
+    """
+    Vista por columnas de las filas de un CsvStore, para filtrar y ordenar sin crear un modelo por fila.
+    Numeros en arrays de NumPy (float64 con NaN si la columna tiene huecos), categorias como
+    codigos + diccionario y texto como indice hash. Las comparaciones de texto no distinguen
+    mayusculas, igual que los filtros de los endpoints CSV.
+    """
+
+    def __init__(self, keys: np.ndarray, arrays: Dict[str, np.ndarray],
+                 categories: Dict[str, List[str]], text_values: Dict[str, Sequence[str]]):
+        self.keys = keys
+        self.arrays = arrays
+        self.categories = categories
+        # Valores originales de las columnas TEXT; el indice hash se crea al filtrar por primera vez
+        self.text_values = text_values
+        self._text_index: Dict[str, Dict[str, np.ndarray]] = {}
+        # minusculas -> codigos (varias categorias pueden coincidir en minusculas)
+        self._category_lookup: Dict[str, Dict[str, List[int]]] = {}
+        for field, values in categories.items():
+            lookup: Dict[str, List[int]] = {}
+            for code, value in enumerate(values):
+                lookup.setdefault(value.lower(), []).append(code)
+            self._category_lookup[field] = lookup
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(cls, keys: Iterable[int], rows: Iterable[Dict[str, Any]], columns: Dict[str, str]) -> "ColumnarTable":
+        rows = list(rows)
+        values = {field: [row.get(field) for row in rows] for field in columns}
+        return cls.from_columns(keys, values, columns)
+
+    @classmethod
+    def from_columns(cls, keys: Iterable[int], values: Dict[str, Sequence[Any]],
+                     columns: Dict[str, str]) -> "ColumnarTable":
+        arrays: Dict[str, np.ndarray] = {}
+        categories: Dict[str, List[str]] = {}
+        text_values: Dict[str, Sequence[str]] = {}
+        for field, kind in columns.items():
+            column_values = values[field]
+            if kind in (INT, FLOAT):
+                array = np.array([_number(value) for value in column_values], dtype=np.float64)
+                if kind == INT and not np.isnan(array).any():
+                    array = array.astype(np.int64)
+                arrays[field] = array
+            elif kind == CATEGORY:
+                codes: Dict[str, int] = {}
+                arrays[field] = np.array(
+                    [codes.setdefault("" if value is None else str(value), len(codes)) for value in column_values],
+                    dtype=np.int32,
+                )
+                categories[field] = list(codes)
+            elif kind == TEXT:
+                text_values[field] = ["" if value is None else str(value) for value in column_values]
+            else:
+                raise ValueError(f"Unknown column kind {kind!r} for {field}")
+        return cls(np.array(list(keys), dtype=np.int64), arrays, categories, text_values)
+
+    def _text_positions(self, field: str) -> Dict[str, np.ndarray]:
+        index = self._text_index.get(field)
+        if index is None:
+            positions: Dict[str, List[int]] = {}
+            for position, value in enumerate(self.text_values[field]):
+                positions.setdefault(value.lower(), []).append(position)
+            index = {value: np.array(found, dtype=np.int64) for value, found in positions.items()}
+            self._text_index[field] = index
+        return index
+
+    # ---------------- filtros (mascaras booleanas) ----------------
+    def all_rows(self) -> np.ndarray:
+        return np.ones(len(self), dtype=bool)
+
+    def equals(self, field: str, value: Any) -> np.ndarray:
+        if field in self.text_values:
+            mask = np.zeros(len(self), dtype=bool)
+            positions = self._text_positions(field).get(str(value).lower())
+            if positions is not None:
+                mask[positions] = True
+            return mask
+        if field in self.categories:
+            codes = self._category_lookup[field].get(str(value).lower())
+            if not codes:
+                return np.zeros(len(self), dtype=bool)
+            return np.isin(self.arrays[field], codes)
+        return self.arrays[field] == value
+
+    # ---------------- orden y top-N ----------------
+    def sortable(self, field: str) -> bool:
+        return field in self.arrays
+
+    def select(self, mask: np.ndarray, sort: Optional[str] = None, descending: bool = False,
+               limit: Optional[int] = None) -> np.ndarray:
+        """
+        Posiciones de las filas de `mask`, ordenadas por `sort` (NaN al final) y cortadas a `limit`.
+        Sin `sort` se respeta el orden del CSV. Con limit se usa argpartition: solo se ordenan los N primeros.
+        """
+        positions = np.flatnonzero(mask)
+        if sort is not None:
+            values = self.arrays[sort][positions]
+            if sort in self.categories:
+                # Los codigos siguen el orden de aparicion: se ordena por el texto de la categoria
+                ranks = np.argsort(np.argsort(np.array(self.categories[sort], dtype=object)))
+                values = ranks[values]
+            values = values.astype(np.float64)
+            if descending:
+                values = -values
+            values = np.where(np.isnan(values), np.inf, values)
+            if limit is not None and limit < len(positions):
+                # Los N menores sin ordenar todo; los empates con el ultimo se cogen en el orden del CSV
+                kth = np.partition(values, limit - 1)[limit - 1]
+                below = np.flatnonzero(values < kth)
+                ties = np.flatnonzero(values == kth)[:limit - len(below)]
+                top = np.sort(np.concatenate([below, ties]))
+                positions, values = positions[top], values[top]
+            positions = positions[np.argsort(values, kind="stable")]
+        if limit is not None:
+            positions = positions[:limit]
+        return positions
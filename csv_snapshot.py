@@ -0,0 +1,199 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from columnar import TEXT, ColumnarTable
+
+# Snapshots binarios de los CSV (un directorio de .npy por version del contenido), compartidos por los workers
+CSV_SNAPSHOT_DIR = os.getenv("CSV_SNAPSHOT_DIR", ".csv_snapshots")
+SNAPSHOT_FORMAT = 1
+HASH_LENGTH = 16
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Un array vacio no se puede mapear
+        return np.load(path)
+
+
+class RawColumn(Sequence[str]):
+    """Textos de una columna guardados como un blob UTF-8 + offsets; se decodifican al acceder."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        # memoryview sobre el mmap: trocear e indexar sin crear arrays de NumPy por acceso
+        self._bytes = memoryview(blob)
+        self._offsets = memoryview(offsets)
+
+    @classmethod
+    def encode(cls, values: Sequence[str]) -> "RawColumn":
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        return str(self._bytes[self._offsets[position]:self._offsets[position + 1]], "utf-8")
+
+
+class Snapshot:
+    """
+    Contenido del CSV base en columnas: la ColumnarTable para las consultas y el texto original
+    de cada campo para reconstruir las filas tal como las daria csv.DictReader.
+    Cargado de disco, todos los arrays son mmap de solo lectura: los workers comparten el page cache.
+    """
+
+    def __init__(self, fieldnames: List[str], table: ColumnarTable, raw: Dict[str, RawColumn]):
+        self.fieldnames = fieldnames
+        self.table = table
+        self.raw = raw
+        self.keys = table.keys
+        self._key_order = np.argsort(self.keys, kind="stable")
+        self._sorted_keys = self.keys[self._key_order]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, key: int) -> Optional[int]:
+        found = int(np.searchsorted(self._sorted_keys, key))
+        if found < len(self._sorted_keys) and self._sorted_keys[found] == key:
+            return int(self._key_order[found])
+        return None
+
+    def row(self, position: int) -> Dict[str, str]:
+        return {field: self.raw[field][position] for field in self.fieldnames}
+
+    @classmethod
+    def from_csv(cls, path: str, key_field: str, columns: Dict[str, str]) -> "Snapshot":
+        with open(path, newline="") as csvfile:
+            reader = csv.reader(csvfile)
+            fieldnames = next(reader, [])
+            values: List[List[str]] = [[] for _ in fieldnames]
+            for record in reader:
+                for position in range(len(fieldnames)):
+                    values[position].append(record[position] if position < len(record) else "")
+        by_field = dict(zip(fieldnames, values))
+        keys = [int(key) for key in by_field[key_field]]
+        raw = {field: RawColumn.encode(column) for field, column in by_field.items()}
+        table = ColumnarTable.from_columns(keys, by_field, columns)
+        # Las columnas TEXT comparten los blobs de `raw` en vez de guardar otra copia
+        table.text_values = {field: raw[field] for field in table.text_values}
+        return cls(fieldnames, table, raw)
+
+    # ---------------- disco ----------------
+    def save(self, directory: str, meta: Dict[str, Any]):
+        np.save(os.path.join(directory, "keys.npy"), self.keys)
+        for field, array in self.table.arrays.items():
+            np.save(os.path.join(directory, f"col.{field}.npy"), array)
+        for field, column in self.raw.items():
+            np.save(os.path.join(directory, f"raw.{field}.npy"), column.blob)
+            np.save(os.path.join(directory, f"off.{field}.npy"), column.offsets)
+        meta = {**meta, "format": SNAPSHOT_FORMAT, "rows": len(self), "fieldnames": self.fieldnames,
+                "categories": self.table.categories, "text_fields": list(self.table.text_values)}
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, columns: Dict[str, str]) -> "Snapshot":
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT or meta.get("columns") != columns:
+            raise ValueError(f"Snapshot {directory} was built with a different format or columns")
+        raw = {
+            field: RawColumn(
+                _load_array(os.path.join(directory, f"raw.{field}.npy")),
+                _load_array(os.path.join(directory, f"off.{field}.npy")),
+            )
+            for field in meta["fieldnames"]
+        }
+        arrays = {
+            field: _load_array(os.path.join(directory, f"col.{field}.npy"))
+            for field, kind in columns.items() if kind != TEXT
+        }
+        table = ColumnarTable(
+            _load_array(os.path.join(directory, "keys.npy")), arrays, meta["categories"],
+            {field: raw[field] for field in meta["text_fields"]},
+        )
+        return cls(meta["fieldnames"], table, raw)
+
+
+def snapshot_prefix(path: str) -> str:
+    # Nombre del CSV + hash de su ruta: dos CSV que se llaman igual no comparten snapshots
+    location = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.basename(path)}-{location}-"
+
+
+def load_snapshot(path: str, key_field: str, columns: Dict[str, str],
+                  snapshot_dir: str = CSV_SNAPSHOT_DIR) -> Snapshot:
+    """
+    Snapshot del CSV en `path` para su hash de contenido actual. Si no existe en `snapshot_dir`
+    se parsea el CSV una vez y se publica con un rename atomico del directorio; el resto de
+    workers (y los siguientes arranques) solo mapean los ficheros.
+    Sin `snapshot_dir` (o si no se puede escribir) se devuelve el snapshot en memoria.
+    """
+    if not snapshot_dir:
+        return Snapshot.from_csv(path, key_field, columns)
+    prefix = snapshot_prefix(path)
+    target = os.path.join(snapshot_dir, prefix + content_hash(path))
+    if os.path.isdir(target):
+        try:
+            return Snapshot.load(target, columns)
+        except (OSError, ValueError) as e:
+            print(f"Discarding CSV snapshot {target}: {e}")
+            shutil.rmtree(target, ignore_errors=True)
+
+    snapshot = Snapshot.from_csv(path, key_field, columns)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=snapshot_dir, prefix=".tmp-")
+        try:
+            os.chmod(tmp_dir, 0o755)
+            snapshot.save(tmp_dir, {"source": os.path.abspath(path), "columns": columns})
+            os.rename(tmp_dir, target)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(target):
+                raise
+            # Otro worker lo ha publicado a la vez: vale el suyo
+        _remove_stale(snapshot_dir, prefix, keep=os.path.basename(target))
+        return Snapshot.load(target, columns)
+    except OSError as e:
+        print(f"CSV snapshot for {path} not written ({e}); using it from memory")
+        return snapshot
+
+
+def _remove_stale(snapshot_dir: str, prefix: str, keep: str):
+    # Los workers que aun tengan mapeada una version anterior la conservan hasta cerrarla
+    for name in os.listdir(snapshot_dir):
+        if name.startswith(prefix) and name != keep:
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Genera los snapshots antes del despliegue: python csv_snapshot.py
+    import operations
+
+    for store in (operations.games_store, operations.consoles_store):
+        store.warm()
+        print(f"{store.path}: {store.base_size()} rows", file=sys.stderr)
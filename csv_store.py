@@ -0,0 +1,376 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from columnar import INT, ColumnarTable
+from csv_snapshot import CSV_SNAPSHOT_DIR, Snapshot, load_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos, solo el de cada proceso
+    fcntl = None
+
+logger = logging.getLogger("csv_store")
+
+
+class DuplicateError(ValueError):
+    """create() o update() encontro otra fila con el mismo valor en el campo unico o en la clave."""
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class CsvStore:
+    """
+    Copia de un CSV compartida por todo el proceso.
+    El CSV base se lee como Snapshot (csv_snapshot.py): columnas mapeadas de un fichero binario que se
+    regenera cuando cambia el hash del contenido, asi que ningun worker vuelve a parsear el texto.
+    Solo se vuelve a cargar cuando cambian el mtime o el tamaño del archivo.
+
+    Las escrituras no reescriben el CSV: se añaden al journal `<path>.journal`
+    (una operacion JSON por linea) y las lecturas lo aplican sobre el CSV base
+    como una capa de filas cambiadas (`_overlay`, None = borrada).
+    Cuando el journal llega a `compact_threshold` entradas, `compact()` reescribe
+    el CSV en un archivo temporal y lo renombra encima del original.
+
+    Es seguro usarlo desde varios hilos (RLock de instancia). Cada escritura ademas toma un flock
+    exclusivo sobre `<path>.lock` y relee el journal antes de escribir, asi que varios procesos pueden
+    escribir el mismo CSV; `create()` asigna el id y añade la fila en esa misma seccion critica.
+
+    `query()` filtra y ordena sobre la vista por columnas (`columns`: campo -> tipo de columnar.py):
+    la del snapshot mientras no haya cambios, o una reconstruida la primera vez que se consulta despues de uno.
+    Los `unique_fields` (p. ej. Rank) se buscan sobre su columna.
+    """
+
+    def __init__(self, path: str, key_field: str, fieldnames: List[str], model: Type[BaseModel],
+                 unique_fields: Iterable[str] = (), compact_threshold: int = 500,
+                 columns: Optional[Dict[str, str]] = None, snapshot_dir: str = CSV_SNAPSHOT_DIR):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.key_field = key_field
+        self.fieldnames = fieldnames
+        self.model = model
+        self.unique_fields = list(unique_fields)
+        self.compact_threshold = compact_threshold
+        self.columns = {key_field: INT, **{field: INT for field in self.unique_fields}, **(columns or {})}
+        self.snapshot_dir = snapshot_dir
+        self.lock_path = path + ".lock"
+        self._lock = threading.RLock()
+        self._journal_entries = 0
+        self._base: Optional[Snapshot] = None
+        self._base_signature = None
+        self._overlay: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._signature = None
+        self._loaded = False
+        # Se incrementa con cada cambio de las filas; la vista por columnas es valida para una version
+        self._version = 0
+        self._table: Optional[ColumnarTable] = None
+        self._table_version = -1
+        self._table_rows: List[Dict[str, Any]] = []
+
+    # ---------------- carga ----------------
+    @staticmethod
+    def _file_signature(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _stat_signature(self):
+        return self._file_signature(self.path), self._file_signature(self.journal_path)
+
+    @contextmanager
+    def _write_lock(self):
+        """Lock del hilo y del fichero: una sola escritura a la vez entre todos los procesos."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self):
+        signature = self._stat_signature()
+        if not self._loaded or signature != self._signature:
+            self._load(signature)
+
+    def _load(self, signature):
+        base_signature, journal_signature = signature
+        if not self._loaded or base_signature != self._base_signature:
+            self._base = (
+                load_snapshot(self.path, self.key_field, self.columns, self.snapshot_dir)
+                if base_signature is not None else None
+            )
+            self._base_signature = base_signature
+        overlay: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._journal_entries = 0
+        if journal_signature is not None:
+            with open(self.journal_path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Linea incompleta (caida a mitad de escritura): se ignora
+                        continue
+                    try:
+                        self._apply(overlay, entry)
+                    except (KeyError, TypeError, ValueError):
+                        # Una entrada mal formada no puede dejar el CSV ilegible para todos los workers
+                        logger.warning("Skipping malformed entry in %s: %s", self.journal_path, line.strip())
+                    self._journal_entries += 1
+        self._overlay = overlay
+        self._signature = signature
+        self._loaded = True
+        self._version += 1
+
+    def _apply(self, overlay: Dict[int, Optional[Dict[str, Any]]], entry: Dict[str, Any]):
+        if entry["op"] == "upsert":
+            row = entry["row"]
+            key = int(row[self.key_field])
+            if "replaces" in entry:
+                # update() que cambio la clave: la fila antigua se borra en la misma entrada
+                overlay[int(entry["replaces"])] = None
+            overlay[key] = row
+        elif entry["op"] == "delete":
+            overlay[entry["key"]] = None
+
+    def warm(self):
+        """Carga (y si hace falta genera) el snapshot del CSV base."""
+        with self._lock:
+            self._refresh()
+
+    def base_size(self) -> int:
+        return len(self._base) if self._base is not None else 0
+
+    def _row(self, key: int) -> Optional[Dict[str, Any]]:
+        if key in self._overlay:
+            return self._overlay[key]
+        position = self._base.position(key) if self._base is not None else None
+        return self._base.row(position) if position is not None else None
+
+    def _items(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Filas vivas en el orden del CSV; las nuevas al final, en orden de escritura."""
+        if self._base is not None:
+            for position, key in enumerate(self._base.keys.tolist()):
+                if key in self._overlay:
+                    row = self._overlay[key]
+                    if row is not None:
+                        yield key, row
+                else:
+                    yield key, self._base.row(position)
+        for key, row in self._overlay.items():
+            if row is not None and (self._base is None or self._base.position(key) is None):
+                yield key, row
+
+    # ---------------- lecturas ----------------
+    def all(self) -> List[BaseModel]:
+        with self._lock:
+            self._refresh()
+            rows = [row for _, row in self._items()]
+        return [self.model(**row) for row in rows]
+
+    def get(self, key: int) -> Optional[BaseModel]:
+        with self._lock:
+            self._refresh()
+            row = self._row(key)
+        return self.model(**row) if row is not None else None
+
+    def find(self, field: str, value: int) -> Optional[BaseModel]:
+        """Busca por uno de los `unique_fields` (p. ej. Rank): primero en las filas cambiadas, luego en su columna."""
+        with self._lock:
+            self._refresh()
+            row = self._find_row(field, value)
+        return self.model(**row) if row is not None else None
+
+    def _find_row(self, field: str, value: int) -> Optional[Dict[str, Any]]:
+        for row in reversed(list(self._overlay.values())):
+            if row is not None and _as_int(row.get(field)) == value:
+                return row
+        if self._base is not None:
+            for position in np.flatnonzero(self._base.table.arrays[field] == value).tolist():
+                if int(self._base.keys[position]) not in self._overlay:
+                    return self._base.row(position)
+        return None
+
+    def table(self) -> ColumnarTable:
+        with self._lock:
+            self._refresh()
+            if not self._overlay and self._base is not None:
+                return self._base.table
+            if self._table is None or self._table_version != self._version:
+                items = list(self._items())
+                self._table_rows = [row for _, row in items]
+                self._table = ColumnarTable.from_rows([key for key, _ in items], self._table_rows, self.columns)
+                self._table_version = self._version
+            return self._table
+
+    def query(self, equals: Optional[Dict[str, Any]] = None, sort: Optional[str] = None,
+              limit: Optional[int] = None) -> List[BaseModel]:
+        """
+        Filas con `campo == valor` para cada entrada de `equals` (texto sin distinguir mayusculas),
+        ordenadas por `sort` ("-" delante = descendente) y cortadas a `limit`.
+        El filtrado y el orden son operaciones de NumPy; solo se crea el modelo de las filas devueltas.
+        """
+        descending = bool(sort) and sort.startswith("-")
+        field = sort.lstrip("-") if sort else None
+        with self._lock:
+            table = self.table()
+            if field is not None and not table.sortable(field):
+                raise ValueError(f"Cannot sort by {field}")
+            mask = table.all_rows()
+            for name, value in (equals or {}).items():
+                if value is not None:
+                    mask &= table.equals(name, value)
+            positions = table.select(mask, sort=field, descending=descending, limit=limit).tolist()
+            if self._base is not None and table is self._base.table:
+                rows = [self._base.row(position) for position in positions]
+            else:
+                rows = [self._table_rows[position] for position in positions]
+        return [self.model(**row) for row in rows]
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._next_id()
+
+    def _next_id(self) -> int:
+        max_id = None
+        if self._base is not None and len(self._base):
+            keys = self._base.keys
+            deleted = [key for key, row in self._overlay.items() if row is None]
+            if deleted:
+                keys = keys[~np.isin(keys, deleted)]
+            if len(keys):
+                max_id = int(keys.max())
+        changed = [key for key, row in self._overlay.items() if row is not None]
+        if changed:
+            max_id = max(changed) if max_id is None else max(max_id, max(changed))
+        return max_id + 1 if max_id is not None else 1
+
+    # ---------------- escrituras ----------------
+    def create(self, data: Dict[str, Any], unique_field: Optional[str] = None) -> BaseModel:
+        """
+        Asigna el siguiente id a `data` y la añade, todo bajo el lock de escritura: dos altas
+        simultaneas (de este u otro proceso) nunca reciben el mismo id.
+        Con `unique_field`, lanza DuplicateError si ya hay una fila con ese valor.
+        """
+        with self._write_lock():
+            self._refresh()
+            if unique_field is not None and data.get(unique_field) is not None:
+                if self._find_row(unique_field, data[unique_field]) is not None:
+                    raise DuplicateError(f"{unique_field}={data[unique_field]} already exists")
+            item = self.model(**{**data, self.key_field: self._next_id()})
+            self._append(item)
+            return item
+
+    def append(self, item: BaseModel):
+        with self._write_lock():
+            self._refresh()
+            self._append(item)
+
+    def _append(self, item: BaseModel):
+        row = item.model_dump()
+        self._write_journal({"op": "upsert", "row": row})
+        self._store_row(row)
+        self._maybe_compact()
+
+    def update(self, key: int, data: Dict[str, Any]) -> Optional[BaseModel]:
+        """
+        Aplica `data` sobre la fila `key`. La fila resultante se valida antes de escribir el journal.
+        Si `data` cambia la clave, la fila se renombra (borrado de la antigua + alta de la nueva en una
+        sola entrada) y lanza DuplicateError si la nueva clave ya existe.
+        """
+        with self._write_lock():
+            self._refresh()
+            current = self._row(key)
+            if current is None:
+                return None
+            item = self.model(**{**current, **data})
+            row = item.model_dump()
+            new_key = int(row[self.key_field])
+            entry: Dict[str, Any] = {"op": "upsert", "row": row}
+            if new_key != key:
+                if self._row(new_key) is not None:
+                    raise DuplicateError(f"{self.key_field}={new_key} already exists")
+                entry["replaces"] = key
+            self._write_journal(entry)
+            if new_key != key:
+                self._overlay[key] = None
+            self._store_row(row)
+            self._maybe_compact()
+            return item
+
+    def delete(self, key: int) -> Optional[BaseModel]:
+        with self._write_lock():
+            self._refresh()
+            row = self._row(key)
+            if row is None:
+                return None
+            item = self.model(**row)
+            self._write_journal({"op": "delete", "key": key})
+            self._overlay[key] = None
+            self._version += 1
+            self._maybe_compact()
+            return item
+
+    def compact(self):
+        """Vuelca el estado actual al CSV base de forma atomica (temporal + rename) y vacia el journal."""
+        with self._write_lock():
+            self._compact()
+
+    def _compact(self):
+        self._refresh()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".csv")
+        try:
+            with os.fdopen(fd, mode="w", newline="", encoding="utf-8") as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+                writer.writeheader()
+                for _, row in self._items():
+                    writer.writerow(row)
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Si caemos antes de borrar el journal, volver a aplicarlo sobre el nuevo base es idempotente
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_entries = 0
+        # El siguiente acceso carga el snapshot del nuevo CSV base (con el journal ya vacio)
+        self._loaded = False
+
+    def _maybe_compact(self):
+        if self._journal_entries >= self.compact_threshold:
+            self._compact()
+
+    def _write_journal(self, entry: Dict[str, Any]):
+        with open(self.journal_path, mode="a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry, default=str) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        self._journal_entries += 1
+        self._signature = self._stat_signature()
+
+    def _store_row(self, row: Dict[str, Any]):
+        self._overlay[int(row[self.key_field])] = row
+        self._version += 1
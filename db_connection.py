@@ -1,10 +1,17 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+from instrumentation import add_pool_wait
+
 load_dotenv()
 
 POSTGRESQL_ADDON_USER = os.getenv('POSTGRESQL_ADDON_USER')
@@ -13,18 +20,156 @@ POSTGRESQL_ADDON_HOST = os.getenv('POSTGRESQL_ADDON_HOST')
 POSTGRESQL_ADDON_PORT = os.getenv('POSTGRESQL_ADDON_PORT')
 POSTGRESQL_ADDON_DB = os.getenv('POSTGRESQL_ADDON_DB')
 
-if POSTGRESQL_ADDON_PORT is None:
-    raise ValueError("POSTGRESQL_ADDON_PORT environment variable is not set.")
 
-CLEVER_DB = (
-    f"postgresql+asyncpg://{POSTGRESQL_ADDON_USER}:"
-    f"{POSTGRESQL_ADDON_PASSWORD}@"
-    f"{POSTGRESQL_ADDON_HOST}:"
-    f"{POSTGRESQL_ADDON_PORT}/"
-    f"{POSTGRESQL_ADDON_DB}"
-)
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ---------------- Settings ----------------
+# DB_URL tiene prioridad; si no, DB_PROFILE elige entre "postgres" (Clever Cloud, por defecto) y "sqlite" (local).
+# SQLite solo con DB_PROFILE=sqlite: un despliegue sin POSTGRESQL_ADDON_* falla al arrancar en vez de usar un fichero local.
+DB_URL = os.getenv("DB_URL")
+DB_PROFILE = os.getenv("DB_PROFILE", "postgres").strip().lower()
+DB_PROFILES = ("postgres", "sqlite")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "local.db")
+DB_ECHO = os.getenv("DB_ECHO", "false").strip().lower()  # false | true | debug
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Poner a 0 detras de pgbouncer en modo transaction
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+def build_database_url() -> str:
+    if DB_URL:
+        return DB_URL
+    if DB_PROFILE not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}; expected one of {', '.join(DB_PROFILES)}.")
+    if DB_PROFILE == "sqlite":
+        return f"sqlite+aiosqlite:///{SQLITE_PATH}"
+    missing = [
+        name for name in ("POSTGRESQL_ADDON_HOST", "POSTGRESQL_ADDON_PORT", "POSTGRESQL_ADDON_DB")
+        if not os.getenv(name)
+    ]
+    if missing:
+        raise ValueError(
+            f"DB_PROFILE=postgres but {', '.join(missing)} not set; set them, DB_URL, or DB_PROFILE=sqlite."
+        )
+    return (
+        f"postgresql+asyncpg://{POSTGRESQL_ADDON_USER}:"
+        f"{POSTGRESQL_ADDON_PASSWORD}@"
+        f"{POSTGRESQL_ADDON_HOST}:"
+        f"{POSTGRESQL_ADDON_PORT}/"
+        f"{POSTGRESQL_ADDON_DB}"
+    )
+
+
+# ---------------- Pool metrics ----------------
+class PoolStats:
+    """Contadores acumulados de los checkouts del pool (cuantos, cuanto esperaron, timeouts)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waited_checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, wait_seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            # Por debajo de 1 ms la conexion estaba libre en el pool
+            if wait_seconds >= 0.001:
+                self.waited_checkouts += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waited_checkouts": self.waited_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mide cuanto tarda cada checkout en conseguir conexion."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        waited = time.perf_counter() - started
+        self.stats.record(waited)
+        add_pool_wait(waited)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def create_engine_from_settings(url: str = None, echo=None) -> AsyncEngine:
+    """Crea el AsyncEngine con el pool y el logging configurados por variables de entorno."""
+    url = make_url(url or build_database_url())
+    if echo is None:
+        echo = "debug" if DB_ECHO == "debug" else DB_ECHO in ("1", "true", "yes", "on")
+
+    kwargs = {
+        "echo": echo,
+        "poolclass": InstrumentedPool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "postgresql":
+        # Cache de sentencias preparadas de SQLAlchemy y de asyncpg
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+        kwargs["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+
+    new_engine = create_async_engine(url, **kwargs)
+    new_engine.sync_engine.pool.stats = PoolStats()
+    return new_engine
+
+
+def pool_status(target: AsyncEngine = None) -> dict:
+    """Estado actual del pool (conexiones en uso, libres, overflow) mas los contadores de espera."""
+    pool = (target or engine).sync_engine.pool
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
+
 
-engine: AsyncEngine = create_async_engine(CLEVER_DB, echo=True)
+engine: AsyncEngine = create_engine_from_settings()
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -1,9 +1,24 @@
+import base64
+import binascii
+import json
+
+from collections import defaultdict
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import DateTime, and_, bindparam, column, delete, func, insert, inspect, literal, or_, table, text, tuple_, update
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Type, AsyncIterator
 from fastapi import HTTPException
 
-from sqlmodels_db import ConsoleSQL, GameSQL
+from db_connection import async_session
+from search_index import fts_table_name
+
+from sqlmodels_db import (
+    ConsoleSQL, GameSQL, BulkOperation, BulkItemResult, GameArchiveFilter, ConsoleArchiveFilter, GameListFilter,
+)
+from utils.terms import GameSort
 
 
 async def create_console_sql(session: AsyncSession, console: ConsoleSQL) -> ConsoleSQL:
@@ -77,11 +92,236 @@ async def get_games_paginated(session: AsyncSession, skip: int = 0, limit: int =
     statement = select(GameSQL).offset(skip).limit(limit)
     result = await session.exec(statement)
     return result.all()
+
+def encode_cursor(sort_key: Any, last_id: int, sort: Optional[str] = None) -> str:
+    """Cursor opaco: la clave de orden y el id de la ultima fila vista (y el orden), en base64 url-safe."""
+    data = {"k": sort_key, "id": last_id}
+    if sort is not None:
+        data["s"] = sort
+    payload = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(data, dict) or not isinstance(data.get("id"), int):
+            raise ValueError("cursor without id")
+        return data
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_cursor(sort_column, pk_column, key: Any, last_id: int, descending: bool, nulls_high: bool):
+    """
+    WHERE de las filas que van despues de (key, last_id) en ORDER BY sort_column, pk_column.
+    La parte sin NULL es una comparacion de tuplas, que ambos motores resuelven como rango del indice.
+    Los NULL van donde los pone el motor sin NULLS FIRST/LAST (PostgreSQL: mayores; SQLite: menores),
+    asi el ORDER BY sigue coincidiendo con el indice.
+    """
+    after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+    nulls_last = descending != nulls_high
+    if key is None:
+        in_nulls = and_(sort_column.is_(None), after(pk_column, last_id))
+        return in_nulls if nulls_last else or_(in_nulls, sort_column.is_not(None))
+    condition = after(tuple_(sort_column, pk_column), tuple_(literal(key), literal(last_id)))
+    if nulls_last and sort_column.nullable:
+        condition = or_(condition, sort_column.is_(None))
+    return condition
+
+
+async def get_keyset_page(
+    session: AsyncSession,
+    model: Type,
+    pk_column,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    sort_column=None,
+    descending: bool = False,
+    conditions: Tuple = (),
+    sort_name: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset pagination: WHERE (orden, pk) > (ultimo_orden, ultimo_id) ORDER BY orden, pk LIMIT n.
+    Sin sort_column se ordena por la primary key. Con un indice (orden, pk) es un range scan,
+    asi que cualquier pagina cuesta lo mismo que la primera.
+    """
+    if sort_column is None or sort_column is pk_column:
+        sort_column = None
+        order_by = [pk_column.desc() if descending else pk_column]
+    else:
+        order_by = [sort_column.desc(), pk_column.desc()] if descending else [sort_column, pk_column]
+    statement = select(model).where(*conditions).order_by(*order_by).limit(limit + 1)
+    if cursor:
+        last = decode_cursor(cursor)
+        if last.get("s") != sort_name:
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different sort")
+        if sort_column is None:
+            statement = statement.where(pk_column < last["id"] if descending else pk_column > last["id"])
+        else:
+            nulls_high = session.bind.dialect.name != "sqlite"
+            statement = statement.where(
+                _after_cursor(sort_column, pk_column, last.get("k"), last["id"], descending, nulls_high)
+            )
+    result = await session.exec(statement)
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_id = getattr(rows[-1], pk_column.key)
+        sort_key = last_id if sort_column is None else getattr(rows[-1], sort_column.key)
+        next_cursor = encode_cursor(sort_key, last_id, sort_name)
+    return rows, next_cursor
+
+
+def games_list_conditions(filters: GameListFilter) -> List[Any]:
+    """WHERE de GET /games/; cada combinacion habitual tiene su indice en GameSQL."""
+    conditions = []
+    if filters.platform:
+        conditions.append(GameSQL.Platform == filters.platform)
+    if filters.genre:
+        conditions.append(GameSQL.Genre == filters.genre)
+    if filters.publisher:
+        conditions.append(GameSQL.Publisher == filters.publisher)
+    if filters.year_from is not None:
+        conditions.append(GameSQL.Year >= filters.year_from)
+    if filters.year_to is not None:
+        conditions.append(GameSQL.Year <= filters.year_to)
+    for field, column_ in (
+        ("min_north_america", GameSQL.North_America),
+        ("min_europe", GameSQL.Europe),
+        ("min_japan", GameSQL.Japan),
+        ("min_rest_of_world", GameSQL.Rest_of_World),
+        ("min_global", GameSQL.Global),
+    ):
+        minimum = getattr(filters, field)
+        if minimum is not None:
+            conditions.append(column_ >= minimum)
+    return conditions
+
+
+async def get_games_keyset(
+    session: AsyncSession,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    filters: Optional[GameListFilter] = None,
+    sort: GameSort = GameSort.index,
+):
+    descending = sort.value.startswith("-")
+    sort_column = getattr(GameSQL, sort.value.lstrip("-"))
+    conditions = games_list_conditions(filters) if filters else []
+    # El cursor de la ordenacion por defecto no lleva "s", como antes de existir sort
+    sort_name = None if sort == GameSort.index else sort.value
+    return await get_keyset_page(
+        session, GameSQL, GameSQL.index, limit, cursor,
+        sort_column=sort_column, descending=descending, conditions=tuple(conditions), sort_name=sort_name,
+    )
+
+
+async def install_game_indexes(conn):
+    """
+    Indices de GameSQL en una tabla 'games' ya existente (create_all solo los crea junto con la tabla).
+    Un indice que ya existe con otras columnas (p. ej. ix_games_rank sin el desempate por "index") se recrea.
+    """
+    def create_indexes(sync_conn):
+        existing = {
+            index["name"]: index["column_names"] for index in inspect(sync_conn).get_indexes(GameSQL.__tablename__)
+        }
+        for index in GameSQL.__table__.indexes:
+            columns = [column.name for column in index.columns]
+            if index.name in existing and existing[index.name] != columns:
+                index.drop(sync_conn)
+            index.create(sync_conn, checkfirst=True)
+    await conn.run_sync(create_indexes)
+
+
+async def get_consoles_keyset(session: AsyncSession, limit: int = 50, cursor: Optional[str] = None):
+    return await get_keyset_page(session, ConsoleSQL, ConsoleSQL.id, limit, cursor)
+
+
+EXPORT_FETCH_SIZE = 1000
+
+
+async def stream_rows(model: Type, fetch_size: int = EXPORT_FETCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Recorre la tabla completa con un cursor del lado del servidor y entrega bloques de
+    como maximo `fetch_size` filas (como dicts planos, sin instancias ORM).
+    Abre su propia sesion: la sesion de Depends(get_session) ya esta cerrada
+    cuando un StreamingResponse empieza a enviar el cuerpo.
+    """
+    table = model.__table__
+    statement = select(*table.c).order_by(*table.primary_key.columns)
+    async with async_session() as session:
+        result = await session.stream(statement.execution_options(yield_per=fetch_size))
+        async for partition in result.mappings().partitions(fetch_size):
+            yield [dict(row) for row in partition]
+
+
 async def get_game_key(session: Session, name: str):
     statement = select(GameSQL).where(GameSQL.Game_Title.ilike(f"%{name}%"))
     result = await session.exec(statement)
     return result.all()
 
+# Con menos de 3 caracteres no hay trigramas: se busca con LIKE sin indice
+MIN_TRIGRAM_QUERY = 3
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_catalog(
+    session: AsyncSession, model: Type, text_column, pk_column, q: str, limit: int = 10, offset: int = 0
+) -> Tuple[List[Any], int]:
+    """
+    Busqueda por subcadena apoyada en indices, ordenada por relevancia.
+    Devuelve (pagina, total); el total sale del mismo SELECT con count(*) OVER ().
+    - PostgreSQL: ILIKE '%q%' resuelto con el indice GIN de trigramas, ordenado por similarity().
+    - SQLite: MATCH sobre la tabla FTS5 trigram, ordenado por bm25 (columna rank).
+    """
+    q = q.strip()
+    statement = select(model, func.count().over().label("total"))
+    dialect = session.bind.dialect.name
+
+    if not q:
+        statement = statement.order_by(pk_column)
+    elif dialect == "sqlite" and len(q) >= MIN_TRIGRAM_QUERY:
+        fts = table(fts_table_name(model.__tablename__), column("rowid"), column("rank"))
+        phrase = '"' + q.replace('"', '""') + '"'
+        statement = (
+            statement.join(fts, fts.c.rowid == pk_column)
+            .where(text(f"{fts.name} MATCH :phrase").bindparams(phrase=phrase))
+            .order_by(fts.c.rank, pk_column)
+        )
+    else:
+        statement = statement.where(text_column.ilike(_like_pattern(q), escape="\\"))
+        if dialect == "postgresql":
+            statement = statement.order_by(func.similarity(text_column, q).desc(), pk_column)
+        else:
+            statement = statement.order_by(pk_column)
+
+    result = await session.exec(statement.limit(limit).offset(offset))
+    rows = result.all()
+    if rows:
+        return [row[0] for row in rows], rows[0][1]
+    if offset == 0:
+        return [], 0
+    # Pagina fuera de rango: el total hay que contarlo aparte
+    total = await session.exec(select(func.count()).select_from(statement.subquery()))
+    return [], total.one()
+
+
+async def search_games(session: AsyncSession, q: str, limit: int = 10, offset: int = 0):
+    return await search_catalog(session, GameSQL, GameSQL.Game_Title, GameSQL.index, q, limit, offset)
+
+
+async def search_consoles(session: AsyncSession, q: str, limit: int = 10, offset: int = 0):
+    return await search_catalog(session, ConsoleSQL, ConsoleSQL.Console_Name, ConsoleSQL.id, q, limit, offset)
+
+
 async def get_console_key(session: Session, name: str):
     statement = select(ConsoleSQL).where(ConsoleSQL.Console_Name.ilike(f"%{name}%"))
     result = await session.exec(statement)
@@ -91,3 +331,186 @@ def parse_float(value: str) -> float | None:
     if not value or value.strip() == "":
         return None
     return float(value.replace(",", "."))
+
+
+def _invalid(position: int, operation: BulkOperation, error: str) -> BulkItemResult:
+    return BulkItemResult(position=position, op=operation.op, status="invalid", id=operation.id, error=error)
+
+
+def _null_required(table_, values: Dict[str, Any]) -> List[str]:
+    """Campos NOT NULL que llegan con null explicito (los modelos de update los aceptan como opcionales)."""
+    return [
+        name for name, value in values.items()
+        if value is None and name in table_.c and not table_.c[name].nullable and not table_.c[name].primary_key
+    ]
+
+
+async def bulk_apply(
+    session: AsyncSession, model: Type, create_model: Type, update_model: Type, operations: List[BulkOperation]
+) -> Tuple[List[BulkItemResult], List[Any]]:
+    """
+    Aplica un lote de insert/update/delete con sentencias multi-fila, dentro de la transaccion
+    de `session` (el commit lo hace quien llama). Se ejecuta por fases: inserts, updates, deletes.
+    - insert: un INSERT ... VALUES (...), (...) RETURNING, en el orden de la peticion.
+    - update: un UPDATE executemany por cada conjunto de columnas modificadas.
+    - delete: un DELETE ... WHERE pk IN (...) RETURNING.
+    Devuelve el resultado por operacion y las filas afectadas (estado anterior y nuevo),
+    para refrescar resumenes e invalidar cache.
+    """
+    table_ = model.__table__
+    pk = list(table_.primary_key.columns)[0]
+    results: List[Optional[BulkItemResult]] = [None] * len(operations)
+    inserts, updates, deletes = [], {}, {}
+
+    for position, operation in enumerate(operations):
+        if operation.op != "insert" and operation.id is None:
+            results[position] = _invalid(position, operation, "id is required")
+            continue
+        try:
+            if operation.op == "insert":
+                values = create_model.model_validate(operation.data or {}).model_dump()
+            elif operation.op == "update":
+                values = update_model.model_validate(operation.data or {}).model_dump(exclude_unset=True)
+                if not values:
+                    results[position] = _invalid(position, operation, "no fields to update")
+                    continue
+            if operation.op != "delete":
+                nulls = _null_required(table_, values)
+                if nulls:
+                    results[position] = _invalid(position, operation, f"fields cannot be null: {', '.join(nulls)}")
+                    continue
+            if operation.op == "insert":
+                inserts.append((position, values))
+            elif operation.op == "update":
+                updates[position] = (operation.id, values)
+            else:
+                deletes[position] = operation.id
+        except ValidationError as e:
+            results[position] = _invalid(position, operation, str(e))
+
+    conn = await session.connection()
+    touched: List[Any] = []
+
+    # Estado anterior de las filas a modificar/borrar (una sola consulta)
+    target_ids = {row_id for row_id, _ in updates.values()} | set(deletes.values())
+    existing = {}
+    if target_ids:
+        rows = await conn.execute(select(table_).where(pk.in_(target_ids)))
+        existing = {getattr(row, pk.name): row for row in rows}
+        touched.extend(existing.values())
+
+    if inserts:
+        created = await conn.execute(
+            insert(table_).returning(*table_.c, sort_by_parameter_order=True),
+            [values for _, values in inserts],
+        )
+        for (position, _), row in zip(inserts, created):
+            touched.append(row)
+            results[position] = BulkItemResult(
+                position=position, op="insert", status="created", id=getattr(row, pk.name), item=dict(row._mapping)
+            )
+
+    by_columns = defaultdict(list)
+    for position, (row_id, values) in updates.items():
+        if row_id not in existing:
+            results[position] = BulkItemResult(position=position, op="update", status="not_found", id=row_id)
+            continue
+        by_columns[tuple(sorted(values))].append((position, row_id, values))
+    for columns, items in by_columns.items():
+        statement = (
+            update(table_)
+            .where(pk == bindparam("_pk"))
+            .values({name: bindparam(name) for name in columns})
+        )
+        await conn.execute(statement, [{"_pk": row_id, **values} for _, row_id, values in items])
+    updated_ids = [row_id for items in by_columns.values() for _, row_id, _ in items]
+    if updated_ids:
+        fresh = await conn.execute(select(table_).where(pk.in_(updated_ids)))
+        fresh_rows = {getattr(row, pk.name): row for row in fresh}
+        touched.extend(fresh_rows.values())
+        for items in by_columns.values():
+            for position, row_id, _ in items:
+                results[position] = BulkItemResult(
+                    position=position, op="update", status="updated", id=row_id,
+                    item=dict(fresh_rows[row_id]._mapping),
+                )
+
+    if deletes:
+        removed = await conn.execute(
+            delete(table_).where(pk.in_(set(deletes.values()))).returning(*table_.c)
+        )
+        removed_rows = {getattr(row, pk.name): row for row in removed}
+        for position, row_id in deletes.items():
+            row = removed_rows.get(row_id)
+            results[position] = BulkItemResult(
+                position=position, op="delete", status="deleted" if row is not None else "not_found",
+                id=row_id, item=dict(row._mapping) if row is not None else None,
+            )
+
+    return results, touched
+
+
+# ---------------- Archive / restore ----------------
+def games_filter_condition(table_, filters: GameArchiveFilter):
+    """WHERE para archivar/restaurar juegos; vale para 'games' y 'archivedgamesql' (mismas columnas)."""
+    conditions = []
+    if filters.ids:
+        conditions.append(table_.c.index.in_(filters.ids))
+    if filters.platform:
+        conditions.append(table_.c.Platform == filters.platform)
+    if filters.genre:
+        conditions.append(table_.c.Genre == filters.genre)
+    if filters.publisher:
+        conditions.append(table_.c.Publisher == filters.publisher)
+    if filters.year_before is not None:
+        conditions.append(table_.c.Year < filters.year_before)
+    if not conditions:
+        raise HTTPException(status_code=400, detail="At least one filter is required")
+    return and_(*conditions)
+
+
+def consoles_filter_condition(table_, filters: ConsoleArchiveFilter):
+    conditions = []
+    if filters.ids:
+        conditions.append(table_.c.id.in_(filters.ids))
+    if filters.company:
+        conditions.append(table_.c.Company == filters.company)
+    if filters.type:
+        conditions.append(table_.c.Type == filters.type)
+    if filters.discontinued_before is not None:
+        conditions.append(table_.c.Discontinuation_Year < filters.discontinued_before)
+    if not conditions:
+        raise HTTPException(status_code=400, detail="At least one filter is required")
+    return and_(*conditions)
+
+
+async def move_rows(session: AsyncSession, source_model: Type, target_model: Type, condition) -> List[Any]:
+    """
+    Mueve las filas de `source_model` que cumplen `condition` a `target_model` sin pasar por Python,
+    dentro de la transaccion de `session` (el commit lo hace quien llama). Sirve para archivar
+    (tabla -> archivo, rellenando archived_at) y para restaurar (archivo -> tabla).
+    - PostgreSQL: una sola sentencia, WITH moved AS (DELETE ... RETURNING *) INSERT ... SELECT FROM moved.
+    - SQLite: INSERT ... SELECT y DELETE ... RETURNING; el INSERT ya toma el lock de escritura,
+      asi que el DELETE ve exactamente las mismas filas.
+    Devuelve las filas movidas (columnas comunes) para refrescar resumenes e invalidar cache.
+    """
+    source, target = source_model.__table__, target_model.__table__
+    names = [c.name for c in source.c if c.name in target.c]
+    stamp = ["archived_at"] if "archived_at" in target.c and "archived_at" not in source.c else []
+    stamp_values = [literal(datetime.now(), DateTime).label("archived_at")] if stamp else []
+
+    conn = await session.connection()
+    if conn.dialect.name == "postgresql":
+        moved = delete(source).where(condition).returning(*source.c).cte("moved")
+        statement = (
+            insert(target)
+            .from_select(names + stamp, select(*[moved.c[name] for name in names], *stamp_values))
+            .returning(*[target.c[name] for name in names])
+        )
+        return (await conn.execute(statement)).all()
+
+    await conn.execute(
+        insert(target).from_select(names + stamp, select(*[source.c[name] for name in names], *stamp_values).where(condition))
+    )
+    result = await conn.execute(delete(source).where(condition).returning(*[source.c[name] for name in names]))
+    return result.all()
@@ -0,0 +1,227 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Consultas mas lentas que esto (ms) se registran con sus parametros en el logger "slow_queries"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "true").strip().lower() in ("1", "true", "yes", "on")
+# Limites (segundos) de los histogramas de /metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_LOGGED_PARAMETERS = 1000  # caracteres
+
+slow_query_logger = logging.getLogger("slow_queries")
+
+
+class RequestTimings:
+    """Tiempos acumulados durante una peticion (consultas, espera del pool, plantillas, JSON)."""
+
+    __slots__ = ("started", "queries", "db", "pool_wait", "render", "serialize")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.pool_wait = 0.0
+        self.render = 0.0
+        self.serialize = 0.0
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        return ", ".join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f"pool;dur={self.pool_wait * 1000:.2f}",
+            f"render;dur={self.render * 1000:.2f}",
+            f"serialize;dur={self.serialize * 1000:.2f}",
+            f"app;dur={total * 1000:.2f}",
+        ])
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def add_render_time(seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.render += seconds
+
+
+def add_pool_wait(seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.pool_wait += seconds
+
+
+# ---------------- Metricas agregadas ----------------
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+
+
+class Metrics:
+    """Histogramas por ruta y contadores de la base de datos, en formato texto de Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str, str], Histogram] = defaultdict(Histogram)
+        self.db_time: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.queries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.slow_queries = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings):
+        with self._lock:
+            self.latency[(method, route, str(status))].observe(seconds)
+            self.db_time[(method, route)].observe(timings.db)
+            self.queries[(method, route)] += timings.queries
+
+    def count_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self, pool: Optional[Dict[str, Any]] = None) -> str:
+        lines: List[str] = []
+        with self._lock:
+            _histogram_lines(lines, "http_request_duration_seconds", "Request latency by route.",
+                             ("method", "route", "status"), self.latency)
+            _histogram_lines(lines, "http_request_db_seconds", "Time spent in SQL per request.",
+                             ("method", "route"), self.db_time)
+            lines.append("# HELP http_request_db_queries_total SQL statements executed by route.")
+            lines.append("# TYPE http_request_db_queries_total counter")
+            for (method, route), value in sorted(self.queries.items()):
+                lines.append(f"http_request_db_queries_total{_labels(method=method, route=route)} {value}")
+            lines.append("# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.")
+            lines.append("# TYPE db_slow_queries_total counter")
+            lines.append(f"db_slow_queries_total {self.slow_queries}")
+        for name, value in (pool or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"# TYPE db_pool_{name} gauge")
+                lines.append(f"db_pool_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(lines: List[str], name: str, help_text: str, label_names, histograms: Dict[tuple, Histogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key))
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels(**labels, le=str(bound))} {count}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+
+metrics = Metrics()
+
+
+# ---------------- Hooks ----------------
+def instrument_engine(target: AsyncEngine):
+    """Cuenta y cronometra cada sentencia de `target`; registra las lentas con sus parametros."""
+    sync_engine = target.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        timings = _current.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            metrics.count_slow_query()
+            slow_query_logger.warning(
+                "Slow query (%.1f ms): %s | parameters: %s",
+                elapsed * 1000, statement, repr(parameters)[:MAX_LOGGED_PARAMETERS],
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        # La consulta fallo: after_cursor_execute no se ejecuta, se descarta su inicio
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse que suma el tiempo de serializacion a la peticion en curso."""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = super().render(content)
+        timings = _current.get()
+        if timings is not None:
+            timings.serialize += time.perf_counter() - started
+        return body
+
+
+class InstrumentationMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, para no romper el streaming ni los contextvars):
+    abre un RequestTimings por peticion, anade la cabecera Server-Timing y alimenta /metrics.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            # Plantilla de la ruta (/games/{game_id}) y no la URL, para no crear una serie por id
+            label = getattr(route, "path", None) or "unmatched"
+            metrics.observe_request(
+                scope["method"], label, status, time.perf_counter() - timings.started, timings
+            )
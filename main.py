@@ -1,51 +1,251 @@
-from fastapi import FastAPI, HTTPException, Depends, Path, Query, Request
-from typing import List, Optional, Type
-from sqlmodel import Session, select
-from sqlmodel import *
-from typing import AsyncGenerator
-import os
-from dotenv import load_dotenv
-from pydantic import ConfigDict
-from db_connection import *
-from sqlmodels_db import *
-from models import *
-from operations import *
+import time
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Depends, File, Query, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from starlette.responses import JSONResponse
-import pandas as pd
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from routers import web
-app = FastAPI()
-app.mount("/statics", StaticFiles(directory="statics"), name="statics")
+
+from db_connection import engine, get_session, pool_status, AsyncSession
+from sqlmodels_db import (
+    GameSQL, GameBase, GameUpdate, GamePage, ConsoleSQL, ConsoleBase, ConsoleUpdate, ConsolePage,
+    ArchivedGameSQL, ArchivedConsoleSQL, Subscriber,
+    BulkRequest, BulkItemResult, BulkResponse, GameArchiveFilter, ConsoleArchiveFilter, ArchiveResult,
+    GameListFilter, GameChanges, ConsoleChanges,
+)
+from models import Game, GameWithId, UpdatedGame, Console, ConsoleWithId, UpdatedConsole
+from operations import (
+    query_games, read_one_game, new_game, modify_game, delete_game,
+    query_consoles, read_one_console, games_store, consoles_store, run_io, run_write, DuplicateError, new_console, modify_console, delete_console,
+)
+from routers import web, admin, analytics
+from sales_summary import sales_key, refresh_summary_for, ensure_sales_summary, refresh_sales_summary
+from templating import warm_templates
+from assets import AssetStaticFiles, build_assets
+from subscribers import import_subscribers_csv
+from archive_retention import retention_loop, ARCHIVE_RETENTION_INTERVAL_HOURS
+import db_ops as crud
+from change_feed import get_changes
+import startup
+from audit import audit
+from instrumentation import InstrumentationMiddleware, TimedJSONResponse, instrument_engine, metrics
+from utils.exporters import ndjson_stream, csv_stream
+from utils.terms import ExportFormat, GameSort
+from cache import (
+    get_or_load, game_key, console_key, invalidate_games, invalidate_consoles, invalidate_subscribers,
+    check_single_worker, GAMES_LIST_PREFIX, CONSOLES_LIST_PREFIX,
+)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+app = FastAPI(default_response_class=TimedJSONResponse)
+# Server-Timing por peticion (db, pool, render, serialize) y agregados en /metrics
+app.add_middleware(InstrumentationMiddleware)
+instrument_engine(engine)
+app.mount("/statics", AssetStaticFiles(), name="statics")
 app.include_router(web.router)
-templates = Jinja2Templates(directory="templates/")
+app.include_router(admin.router)
+app.include_router(analytics.router)
 
 
 
 @app.on_event("startup")
 async def startup_event():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
-
+    check_single_worker()
+    startup.record("imports", IMPORT_SECONDS)
+    with startup.timed("assets"):
+        build_assets()
+    with startup.timed("templates"):
+        warm_templates()
+    with startup.timed("csv_snapshots"):
+        await run_io(games_store.warm)
+        await run_io(consoles_store.warm)
+    with startup.timed("db_connect"):
+        conn = await engine.connect()
+    try:
+        # DDL solo si cambia startup.SCHEMA_VERSION; con el esquema al dia es una consulta
+        with startup.timed("schema"):
+            async with conn.begin():
+                startup.report["schema_migrated"] = await startup.ensure_schema(conn)
+        with startup.timed("sales_summary"):
+            async with conn.begin():
+                await ensure_sales_summary(conn)
+    finally:
+        await conn.close()
+    if ARCHIVE_RETENTION_INTERVAL_HOURS > 0:
+        app.state.retention_task = asyncio.create_task(retention_loop())
+    audit.start()
+    startup.logger.info("Startup: %s", startup.startup_report())
+
+
+async def stop_retention_task():
+    # Cancela la retencion periodica y espera a que termine (una ejecucion a medias hace rollback)
+    task = getattr(app.state, "retention_task", None)
+    if task is None:
+        return
+    app.state.retention_task = None
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_retention_task()
+    # Lo que quede en la cola de audit se escribe antes de salir
+    await audit.stop()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    # Formato texto de Prometheus
+    return PlainTextResponse(metrics.render(pool_status()), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/games/", response_model=GameSQL, tags=["Create Game"])
 async def create_game_endpoint(game: GameSQL, session: AsyncSession = Depends(get_session)):
     session.add(game)
+    await refresh_summary_for(session, sales_key(game))
     await session.commit()
     await session.refresh(game)
+    await invalidate_games(game.index)
+    audit.record("game", "create", game.index, data=game)
     return game
 
-@app.get("/games/", response_model=List[GameSQL], tags=["List Games"])
-async def list_games_endpoint(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(GameSQL))
-    games = result.scalars().all()
-    return games
+def bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+    for result in results:
+        if result.status in counts:
+            counts[result.status] += 1
+    return BulkResponse(**counts, failed=len(results) - sum(counts.values()), results=results)
+
+
+BULK_ACTIONS = {"created": "create", "updated": "update", "deleted": "delete"}
+
+
+def audit_bulk(entity: str, results: List[BulkItemResult]):
+    for result in results:
+        if result.status in BULK_ACTIONS:
+            audit.record(entity, BULK_ACTIONS[result.status], result.id, data=result.item, source="bulk")
+
+
+@app.post("/games/bulk", response_model=BulkResponse, tags=["Bulk Games"])
+async def bulk_games_endpoint(request: BulkRequest, session: AsyncSession = Depends(get_session)):
+    """
+    Lote de operaciones insert/update/delete sobre games en una sola transaccion.
+    Los errores de validacion o ids inexistentes se informan por operacion sin abortar el resto.
+    """
+    try:
+        results, touched = await crud.bulk_apply(session, GameSQL, GameBase, GameUpdate, request.operations)
+        await refresh_sales_summary(await session.connection(), {sales_key(row) for row in touched})
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=f"Bulk operation rejected: {e.orig}")
+    await invalidate_games(*{row.index for row in touched})
+    audit_bulk("game", results)
+    return bulk_response(results)
+
+
+@app.post("/games/archive", response_model=ArchiveResult, tags=["Archive Games"])
+async def archive_games_endpoint(filters: GameArchiveFilter, session: AsyncSession = Depends(get_session)):
+    """Archiva en una sola transaccion todos los juegos que cumplen los filtros (p. ej. toda una plataforma)."""
+    condition = crud.games_filter_condition(GameSQL.__table__, filters)
+    return await move_games(session, GameSQL, ArchivedGameSQL, condition)
+
+
+@app.post("/games/restore", response_model=ArchiveResult, tags=["Archive Games"])
+async def restore_games_endpoint(filters: GameArchiveFilter, session: AsyncSession = Depends(get_session)):
+    """Devuelve a 'games' los juegos archivados que cumplen los filtros."""
+    condition = crud.games_filter_condition(ArchivedGameSQL.__table__, filters)
+    return await move_games(session, ArchivedGameSQL, GameSQL, condition)
+
+
+async def move_games(session: AsyncSession, source, target, condition) -> ArchiveResult:
+    try:
+        rows = await crud.move_rows(session, source, target, condition)
+        await refresh_sales_summary(await session.connection(), {sales_key(row) for row in rows})
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=f"Archive operation rejected: {e.orig}")
+    ids = [row.index for row in rows]
+    await invalidate_games(*ids)
+    if ids:
+        audit.record("game", "archive" if target is ArchivedGameSQL else "restore", *ids)
+    return ArchiveResult(moved=len(ids), ids=ids)
+
+
+@app.get("/games/", response_model=GamePage, tags=["List Games"])
+async def list_games_endpoint(
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="next_cursor de la pagina anterior"),
+        platform: Optional[str] = None,
+        genre: Optional[str] = None,
+        publisher: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_north_america: Optional[float] = Query(None, ge=0),
+        min_europe: Optional[float] = Query(None, ge=0),
+        min_japan: Optional[float] = Query(None, ge=0),
+        min_rest_of_world: Optional[float] = Query(None, ge=0),
+        min_global: Optional[float] = Query(None, ge=0),
+        sort: GameSort = Query(GameSort.index, description="Columna de orden; '-' delante = descendente"),
+        session: AsyncSession = Depends(get_session)
+):
+    filters = GameListFilter(
+        platform=platform, genre=genre, publisher=publisher, year_from=year_from, year_to=year_to,
+        min_north_america=min_north_america, min_europe=min_europe, min_japan=min_japan,
+        min_rest_of_world=min_rest_of_world, min_global=min_global,
+    )
+
+    async def load():
+        games, next_cursor = await crud.get_games_keyset(
+            session, limit=limit, cursor=cursor, filters=filters, sort=sort
+        )
+        return GamePage(items=games, next_cursor=next_cursor).model_dump()
+
+    filter_key = filters.model_dump_json(exclude_none=True)
+    return await get_or_load(f"{GAMES_LIST_PREFIX}{limit}:{cursor}:{sort.value}:{filter_key}", load)
+
+
+def export_response(model, format: ExportFormat, filename: str) -> StreamingResponse:
+    """Respuesta en streaming con la tabla completa, bloque a bloque desde el cursor del servidor."""
+    batches = crud.stream_rows(model)
+    if format == ExportFormat.csv:
+        columns = [column.name for column in model.__table__.columns]
+        body, media_type = csv_stream(batches, columns), "text/csv"
+    else:
+        body, media_type = ndjson_stream(batches), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format.value}"'},
+    )
+
+# Las rutas /export van antes de /{id} para que "export" no se interprete como un id
+@app.get("/games/export", tags=["Export Games"])
+async def export_games_endpoint(format: ExportFormat = Query(ExportFormat.ndjson)):
+    return export_response(GameSQL, format, "games")
+
+@app.get("/games/changes", response_model=GameChanges, tags=["Change Feed"])
+async def games_changes_endpoint(
+        since: Optional[str] = Query(None, description="next_token de la sincronizacion anterior; sin el, todo desde el principio"),
+        limit: int = Query(500, ge=1, le=5000),
+        session: AsyncSession = Depends(get_session)
+):
+    """Juegos creados/modificados e ids borrados o archivados desde `since`; repetir con next_token mientras has_more."""
+    items, deleted, next_token, has_more = await get_changes(session, GameSQL, since, limit)
+    return GameChanges(items=items, deleted=deleted, next_token=next_token, has_more=has_more)
 
 @app.get("/games/{game_id}", response_model=GameSQL, tags=["Get Game"])
 async def get_game_by_id_endpoint(game_id: int, session: AsyncSession = Depends(get_session)):
-    game = await session.get(GameSQL, game_id)
+    async def load():
+        game = await session.get(GameSQL, game_id)
+        return game.model_dump() if game else None
+
+    game = await get_or_load(game_key(game_id), load)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
@@ -58,6 +258,7 @@ async def update_game_endpoint(game_id: int, updated_game: GameSQL, session: Asy
     db_game = await session.get(GameSQL, game_id)
     if not db_game:
         raise HTTPException(status_code=404, detail="Game not found")
+    old_key = sales_key(db_game)
 
     # Update attributes
     db_game.Game_Title = updated_game.Game_Title
@@ -73,8 +274,11 @@ async def update_game_endpoint(game_id: int, updated_game: GameSQL, session: Asy
     db_game.Review = updated_game.Review
 
     session.add(db_game)
+    await refresh_summary_for(session, old_key, sales_key(db_game))
     await session.commit()
     await session.refresh(db_game)
+    await invalidate_games(game_id)
+    audit.record("game", "update", game_id, data=db_game)
     return db_game
 
 
@@ -83,6 +287,7 @@ async def patch_game_endpoint(game_id: int, game_update: GameUpdate, session: As
     db_game = await session.get(GameSQL, game_id)
     if not db_game:
         raise HTTPException(status_code=404, detail="Game not found")
+    old_key = sales_key(db_game)
 
     # Esto actualiza solo los campos que se proporcionaron en el game_update
     # model_dump(exclude_unset=True) asegura que solo se usen los campos que se enviaron en la solicitud.
@@ -91,8 +296,11 @@ async def patch_game_endpoint(game_id: int, game_update: GameUpdate, session: As
         setattr(db_game, key, value)
 
     session.add(db_game)
+    await refresh_summary_for(session, old_key, sales_key(db_game))
     await session.commit()
     await session.refresh(db_game)
+    await invalidate_games(game_id)
+    audit.record("game", "update", game_id, data=db_game)
     return db_game
 
 @app.delete("/games/{game_id}", response_model=GameSQL, tags=["Delete Game"])
@@ -101,27 +309,96 @@ async def delete_game_by_id_endpoint(game_id: int, session: AsyncSession = Depen
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     await session.delete(game)
+    await refresh_summary_for(session, sales_key(game))
     await session.commit()
+    await invalidate_games(game_id)
+    audit.record("game", "delete", game_id, data=game)
     return game
 @app.post("/consoles/", response_model=ConsoleSQL, tags=["Create Console"])
 async def create_console_endpoint(console: ConsoleSQL, session: AsyncSession = Depends(get_session)):
     session.add(console)
     await session.commit()
     await session.refresh(console)
+    await invalidate_consoles(console.id)
+    audit.record("console", "create", console.id, data=console)
     return console
 
 
-@app.get("/consoles/", response_model=List[ConsoleSQL], tags=["List Consoles"])
-async def list_consoles_endpoint(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(ConsoleSQL))
-    consoles = result.scalars().all()
-    return consoles
+@app.post("/consoles/bulk", response_model=BulkResponse, tags=["Bulk Consoles"])
+async def bulk_consoles_endpoint(request: BulkRequest, session: AsyncSession = Depends(get_session)):
+    try:
+        results, touched = await crud.bulk_apply(session, ConsoleSQL, ConsoleBase, ConsoleUpdate, request.operations)
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=f"Bulk operation rejected: {e.orig}")
+    await invalidate_consoles(*{row.id for row in touched})
+    audit_bulk("console", results)
+    return bulk_response(results)
+
+
+@app.post("/consoles/archive", response_model=ArchiveResult, tags=["Archive Consoles"])
+async def archive_consoles_endpoint(filters: ConsoleArchiveFilter, session: AsyncSession = Depends(get_session)):
+    condition = crud.consoles_filter_condition(ConsoleSQL.__table__, filters)
+    return await move_consoles(session, ConsoleSQL, ArchivedConsoleSQL, condition)
+
+
+@app.post("/consoles/restore", response_model=ArchiveResult, tags=["Archive Consoles"])
+async def restore_consoles_endpoint(filters: ConsoleArchiveFilter, session: AsyncSession = Depends(get_session)):
+    condition = crud.consoles_filter_condition(ArchivedConsoleSQL.__table__, filters)
+    return await move_consoles(session, ArchivedConsoleSQL, ConsoleSQL, condition)
+
+
+async def move_consoles(session: AsyncSession, source, target, condition) -> ArchiveResult:
+    try:
+        rows = await crud.move_rows(session, source, target, condition)
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=f"Archive operation rejected: {e.orig}")
+    ids = [row.id for row in rows]
+    await invalidate_consoles(*ids)
+    if ids:
+        audit.record("console", "archive" if target is ArchivedConsoleSQL else "restore", *ids)
+    return ArchiveResult(moved=len(ids), ids=ids)
+
+
+@app.get("/consoles/", response_model=ConsolePage, tags=["List Consoles"])
+async def list_consoles_endpoint(
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="next_cursor de la pagina anterior"),
+        session: AsyncSession = Depends(get_session)
+):
+    async def load():
+        consoles, next_cursor = await crud.get_consoles_keyset(session, limit=limit, cursor=cursor)
+        return ConsolePage(items=consoles, next_cursor=next_cursor).model_dump()
+
+    return await get_or_load(f"{CONSOLES_LIST_PREFIX}{limit}:{cursor}", load)
+
+
+@app.get("/consoles/export", tags=["Export Consoles"])
+async def export_consoles_endpoint(format: ExportFormat = Query(ExportFormat.ndjson)):
+    return export_response(ConsoleSQL, format, "consoles")
+
+
+@app.get("/consoles/changes", response_model=ConsoleChanges, tags=["Change Feed"])
+async def consoles_changes_endpoint(
+        since: Optional[str] = Query(None, description="next_token de la sincronizacion anterior; sin el, todo desde el principio"),
+        limit: int = Query(500, ge=1, le=5000),
+        session: AsyncSession = Depends(get_session)
+):
+    items, deleted, next_token, has_more = await get_changes(session, ConsoleSQL, since, limit)
+    return ConsoleChanges(items=items, deleted=deleted, next_token=next_token, has_more=has_more)
 
 
 
 @app.get("/consoles/{console_id}", response_model=ConsoleSQL, tags=["Get Console"])
 async def get_console_by_id_endpoint(console_id: int, session: AsyncSession = Depends(get_session)):
-    console = await session.get(ConsoleSQL, console_id)
+    async def load():
+        console = await session.get(ConsoleSQL, console_id)
+        return console.model_dump() if console else None
+
+    console = await get_or_load(console_key(console_id), load)
     if not console:
         raise HTTPException(status_code=404, detail="Consola no encontrada")
     return console
@@ -144,6 +421,8 @@ async def update_console_endpoint(console_id: int, updated_console: ConsoleSQL,
     session.add(db_console)
     await session.commit()
     await session.refresh(db_console)
+    await invalidate_consoles(console_id)
+    audit.record("console", "update", console_id, data=db_console)
     return db_console
 @app.patch("/consoles/{console_id}", response_model=ConsoleSQL, tags=["Update Console"])
 async def patch_console_endpoint(console_id: int, console_update: ConsoleUpdate, session: AsyncSession = Depends(get_session)):
@@ -158,6 +437,8 @@ async def patch_console_endpoint(console_id: int, console_update: ConsoleUpdate,
     session.add(db_console)
     await session.commit()
     await session.refresh(db_console)
+    await invalidate_consoles(console_id)
+    audit.record("console", "update", console_id, data=db_console)
     return db_console
 
 
@@ -168,31 +449,48 @@ async def delete_console_by_id_endpoint(console_id: int, session: AsyncSession =
         raise HTTPException(status_code=404, detail="Consola no encontrada")
     await session.delete(console)
     await session.commit()
+    await invalidate_consoles(console_id)
+    audit.record("console", "delete", console_id, data=console)
     return console
 
 
+# ---------------- Subscribers ----------------
+@app.post("/subscribers/import", tags=["Subscribers"])
+async def import_subscribers_endpoint(file: UploadFile = File(...), session: AsyncSession = Depends(get_session)):
+    """
+    Importa un CSV de emails leyendolo en streaming. Los repetidos (en el fichero o ya suscritos)
+    se descartan con ON CONFLICT DO NOTHING, por lotes, en una sola transaccion.
+    """
+    stats = await import_subscribers_csv(await session.connection(), file)
+    await session.commit()
+    if stats["inserted"]:
+        await invalidate_subscribers()
+    return stats
+
+
+@app.get("/subscribers/export", tags=["Subscribers"])
+async def export_subscribers_endpoint(format: ExportFormat = Query(ExportFormat.csv)):
+    return export_response(Subscriber, format, "subscribers")
+
+
 ###CSV
-app.get("/games-csv", response_model=List[GameWithId])
+@app.get("/games-csv", response_model=List[GameWithId])
 async def show_all_games(
         title: Optional[str] = Query(None),
         genre: Optional[str] = Query(None),
-        platform: Optional[str] = Query(None)
+        platform: Optional[str] = Query(None),
+        sort: Optional[str] = Query(None, description="Campo numerico o categoria; '-' delante = descendente"),
+        limit: Optional[int] = Query(None, ge=1),
 ):
-    games = read_all_games()
-
-    if title:
-        games = [game for game in games if game.Game_Title.lower() == title.lower()]
-    if genre:
-        games = [game for game in games if game.Genre.lower() == genre.lower()]
-    if platform:
-        games = [game for game in games if game.Platform.lower() == platform.lower()]
-
-    return games
+    try:
+        return await run_io(query_games, title=title, genre=genre, platform=platform, sort=sort, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/game/{game_id}", response_model=GameWithId)
 async def show_game(game_id: int):
-    game = read_one_game(game_id)
+    game = await run_io(read_one_game, game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
@@ -200,18 +498,21 @@ async def show_game(game_id: int):
 
 @app.post("/game", response_model=GameWithId)
 async def add_game(game: Game):
-    existing_game = read_one_game(game.Rank)  # Asumiendo que Rank es único
-    if existing_game:
+    # Rank es único: se comprueba al asignar el id, en la misma seccion critica
+    try:
+        return await run_write(games_store, new_game, game)
+    except DuplicateError:
         raise HTTPException(status_code=409, detail="Game with this Rank already exists")
 
-    return new_game(game)
-
 
 @app.put("/game/{game_id}", response_model=GameWithId)
 async def update_game(game_id: int, update_game: UpdatedGame):
-    modified = modify_game(
-        game_id, update_game.model_dump(exclude_unset=True),
-    )
+    try:
+        modified = await run_write(
+            games_store, modify_game, game_id, update_game.model_dump(exclude_unset=True),
+        )
+    except ValueError as e:  # la fila resultante no valida (p. ej. Rank null)
+        raise HTTPException(status_code=422, detail=str(e))
     if not modified:
         raise HTTPException(status_code=404, detail="Game not found or not updated")
     return modified
@@ -219,7 +520,7 @@ async def update_game(game_id: int, update_game: UpdatedGame):
 
 @app.delete("/game/{game_id}", response_model=Game)
 async def delete_game_by_id(game_id: int):
-    deleted = delete_game(game_id)
+    deleted = await run_write(games_store, delete_game, game_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Game not found or not deleted")
     return deleted
@@ -230,25 +531,22 @@ async def show_all_consoles(
         Console_Name: Optional[str] = Query(None),
         Released_Year: Optional[int] = Query(None),
         Units_Sold: Optional[float] = Query(None),
-        Company: Optional[str] = Query(None)
+        Company: Optional[str] = Query(None),
+        sort: Optional[str] = Query(None, description="Campo numerico o categoria; '-' delante = descendente"),
+        limit: Optional[int] = Query(None, ge=1),
 ):
-    consoles = read_all_consoles()
-
-    if Company:
-        consoles = [console for console in consoles if console.Company.lower() == Company.lower()]
-    if Console_Name:
-        consoles = [console for console in consoles if console.Console_Name.lower() == Console_Name.lower()]
-    if Released_Year:
-        consoles = [console for console in consoles if console.Released_Year == Released_Year]
-    if Units_Sold is not None:
-        consoles = [console for console in consoles if console.Units_Sold == Units_Sold]
-
-    return consoles
+    try:
+        return await run_io(
+            query_consoles, console_name=Console_Name, released_year=Released_Year or None, units_sold=Units_Sold,
+            company=Company, sort=sort, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/console/{console_id}", response_model=ConsoleWithId)
 async def show_console(console_id: int):
-    console = read_one_console(console_id)
+    console = await run_io(read_one_console, console_id)
     if not console:
         raise HTTPException(status_code=404, detail="Console not found")
     return console
@@ -256,18 +554,22 @@ async def show_console(console_id: int):
 
 @app.post("/console", response_model=ConsoleWithId)
 async def add_console(console: Console):
-    existing_console = read_one_console(console.Id)  # Asumiendo que Id es único
-    if existing_console:
+    try:
+        return await run_write(consoles_store, new_console, console)
+    except DuplicateError:  # Asumiendo que Id es único
         raise HTTPException(status_code=409, detail="Console with this Id already exists")
 
-    return new_console(console)
-
 
 @app.put("/console/{console_id}", response_model=ConsoleWithId)
 async def update_console(console_id: int, update_console: UpdatedConsole):
-    modified = modify_console(
-        console_id, update_console.model_dump(exclude_unset=True),
-    )
+    try:
+        modified = await run_write(
+            consoles_store, modify_console, console_id, update_console.model_dump(exclude_unset=True),
+        )
+    except DuplicateError:
+        raise HTTPException(status_code=409, detail="Console with this Id already exists")
+    except ValueError as e:  # la fila resultante no valida (p. ej. Id null)
+        raise HTTPException(status_code=422, detail=str(e))
     if not modified:
         raise HTTPException(status_code=404, detail="Console not found or not updated")
     return modified
@@ -275,7 +577,7 @@ async def update_console(console_id: int, update_console: UpdatedConsole):
 
 @app.delete("/console/{console_id}", response_model=Console)
 async def delete_console_by_id(console_id: int):
-    deleted = delete_console(console_id)
+    deleted = await run_write(consoles_store, delete_console, console_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Console not found or not deleted")
     return deleted
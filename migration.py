@@ -1,5 +1,7 @@
 # migrate_data.py
 import asyncio
+import sys
+import time
 import pandas as pd
 from typing import Optional, Type # Added Type for model hinting
 import os
@@ -10,36 +12,17 @@ from sqlmodels_db import GameSQL, ConsoleSQL, ArchivedGameSQL, ArchivedConsoleSQ
 from sqlmodel import SQLModel, Field, create_engine # Ensure create_engine is here
 from sqlmodel.ext.asyncio.session import AsyncSession # Correct import for AsyncSession
 from sqlalchemy.ext.asyncio import AsyncEngine # Correct import for AsyncEngine
+from sqlalchemy import Float, Integer, insert
 
 
-# --- 1. Load Environment Variables ---
-load_dotenv() # This loads variables from your .env file
+# --- 1-4. Environment, Database URL and AsyncEngine ---
+# Connection settings (Clever Cloud PostgreSQL, or the local SQLite profile) come from
+# db_connection, driven by the same environment variables / .env file as the app.
+from db_connection import create_engine_from_settings
+from sales_summary import refresh_sales_summary
+from startup import ensure_schema
 
-# --- 2. Retrieve Clever Cloud DB Credentials ---
-POSTGRESQL_ADDON_USER = os.getenv('POSTGRESQL_ADDON_USER')
-POSTGRESQL_ADDON_PASSWORD = os.getenv('POSTGRESQL_ADDON_PASSWORD')
-POSTGRESQL_ADDON_HOST = os.getenv('POSTGRESQL_ADDON_HOST')
-POSTGRESQL_ADDON_PORT = os.getenv('POSTGRESQL_ADDON_PORT')
-POSTGRESQL_ADDON_DB = os.getenv('POSTGRESQL_ADDON_DB')
-
-# Basic validation for required environment variables
-if not all([POSTGRESQL_ADDON_USER, POSTGRESQL_ADDON_PASSWORD, POSTGRESQL_ADDON_HOST, POSTGRESQL_ADDON_PORT, POSTGRESQL_ADDON_DB]):
-    raise ValueError("One or more Clever Cloud PostgreSQL environment variables are not set. "
-                     "Please check your .env file or environment configuration.")
-
-# --- 3. Construct the Database URL ---
-# This URL string is what SQLAlchemy/SQLModel uses to connect
-DATABASE_URL = (
-    f"postgresql+asyncpg://{POSTGRESQL_ADDON_USER}:"
-    f"{POSTGRESQL_ADDON_PASSWORD}@"
-    f"{POSTGRESQL_ADDON_HOST}:"
-    f"{POSTGRESQL_ADDON_PORT}/"
-    f"{POSTGRESQL_ADDON_DB}"
-)
-
-# --- 4. Initialize the AsyncEngine ---
-# This is your connection pool to the database
-engine = AsyncEngine(create_engine(DATABASE_URL, echo=False, future=True)) # Set echo=False to reduce log verbosity
+engine = create_engine_from_settings(echo=False) # echo=False to reduce log verbosity
 
 # --- 5. Import your SQLModel definitions ---
 # Make sure sqlmodels_db.py is in the same directory or accessible via PYTHONPATH
@@ -63,6 +46,17 @@ async def create_db_and_tables():
 
 
 # --- 7. CSV Import Functions ---
+def normalize_columns(columns) -> list:
+    """
+    Normalize CSV column names to match SQLModel fields (PascalCase, e.g., 'Game_Title')
+    This converts 'game title' -> 'Game_Title', 'released_year' -> 'Released_Year' etc.
+    """
+    return [
+        '_'.join([word.capitalize() for word in col.replace(' ', '_').replace('.', '').replace('-', '_').split('_')])
+        for col in columns
+    ]
+
+
 async def import_data_from_csv(file_path: str, model: Type[SQLModel], session: AsyncSession):
     """
     Imports data from a specified CSV file into the corresponding SQLModel table.
@@ -81,12 +75,7 @@ async def import_data_from_csv(file_path: str, model: Type[SQLModel], session: A
         print(f"ERROR: Could not read CSV file '{file_path}': {e}. Skipping import for {model_name}.")
         return
 
-    # Normalize CSV column names to match SQLModel fields (PascalCase, e.g., 'Game_Title')
-    # This loop converts 'game title' -> 'Game_Title', 'released_year' -> 'Released_Year' etc.
-    df.columns = [
-        '_'.join([word.capitalize() for word in col.replace(' ', '_').replace('.', '').replace('-', '_').split('_')])
-        for col in df.columns
-    ]
+    df.columns = normalize_columns(df.columns)
 
     total_rows = len(df)
     imported_count = 0
@@ -170,6 +159,93 @@ async def import_data_from_csv(file_path: str, model: Type[SQLModel], session: A
     print(f"--- Import finished for '{model_name}'. Processed: {total_rows} rows, Imported: {imported_count}, Failed: {errors_count}. ---")
 
 
+# --- 7b. Bulk (vectorized) CSV Import ---
+def prepare_bulk_frame(df: pd.DataFrame, model: Type[SQLModel]) -> tuple[pd.DataFrame, int]:
+    """
+    Casts whole columns at once to the types of the model's table (no per-row work).
+    Rows missing a required (NOT NULL) value are dropped; returns (frame, dropped_rows).
+    The autoincrement primary key is not loaded, same as import_data_from_csv.
+    """
+    table = model.__table__
+    # Case-insensitive match: normalize_columns turns 'Rest_of_World' into 'Rest_Of_World'
+    csv_columns = {name.lower(): name for name in df.columns}
+    columns = [c for c in table.columns if not c.primary_key and c.name.lower() in csv_columns]
+    frame = pd.DataFrame(index=df.index)
+    for column in columns:
+        source = df[csv_columns[column.name.lower()]]
+        if isinstance(column.type, Integer):
+            # 'Year' comes as 2006.0 in the CSV: parse as float and round
+            frame[column.name] = pd.to_numeric(source, errors="coerce").round().astype("Int64")
+        elif isinstance(column.type, Float):
+            frame[column.name] = pd.to_numeric(source, errors="coerce")
+        else:
+            frame[column.name] = source.astype("string")
+
+    required = [c.name for c in columns if not c.nullable]
+    valid = frame[required].notna().all(axis=1)
+    frame = frame[valid]
+    # Pandas NA/NaN -> None so the drivers send NULL
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame, int((~valid).sum())
+
+
+async def bulk_import_csv(file_path: str, model: Type[SQLModel], engine: AsyncEngine, chunk_size: int = 50_000) -> int:
+    """
+    Bulk load of a CSV: the frame is normalized column by column and sent in chunks.
+    - PostgreSQL (asyncpg): COPY via copy_records_to_table, in a single transaction.
+    - Other dialects (SQLite/aiosqlite): Core insert() executemany.
+    Prints throughput in rows/sec and returns the number of rows loaded.
+    """
+    table = model.__table__
+    print(f"\n--- Bulk importing '{model.__name__}' from '{file_path}' into table '{table.name}' ---")
+    started = time.perf_counter()
+
+    df = pd.read_csv(file_path)
+    df.columns = normalize_columns(df.columns)
+    frame, dropped = prepare_bulk_frame(df, model)
+    columns = list(frame.columns)
+    loaded = 0
+
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+            async with driver.transaction():
+                for start in range(0, len(frame), chunk_size):
+                    chunk = frame.iloc[start:start + chunk_size]
+                    await driver.copy_records_to_table(
+                        table.name, records=chunk.itertuples(index=False, name=None), columns=columns
+                    )
+                    loaded += len(chunk)
+                    print(f"  --> Copied {loaded}/{len(frame)} rows")
+    else:
+        async with engine.begin() as conn:
+            for start in range(0, len(frame), chunk_size):
+                chunk = frame.iloc[start:start + chunk_size]
+                await conn.execute(insert(table), chunk.to_dict(orient="records"))
+                loaded += len(chunk)
+                print(f"  --> Inserted {loaded}/{len(frame)} rows")
+
+    elapsed = time.perf_counter() - started
+    rate = loaded / elapsed if elapsed > 0 else float("inf")
+    print(f"--- Bulk import finished for '{model.__name__}': {loaded} rows loaded, {dropped} dropped, "
+          f"{elapsed:.2f}s ({rate:,.0f} rows/sec) ---")
+    return loaded
+
+
+async def bulk_main():
+    """Same as main() but using the bulk loader: python migration.py --bulk"""
+    # Mismo esquema que el arranque de la app (version, triggers del change feed, indices de busqueda)
+    async with engine.begin() as conn:
+        await ensure_schema(conn)
+    await bulk_import_csv("./data/games.csv", GameSQL, engine)
+    await bulk_import_csv("./data/consoles.csv", ConsoleSQL, engine)
+    # La carga no pasa por los endpoints: el resumen de ventas se reconstruye aqui
+    async with engine.begin() as conn:
+        await refresh_sales_summary(conn)
+    print("\n--- All CSV data bulk-loaded! ---")
+
+
 # --- 8. Main Migration Function ---
 async def main():
     """
@@ -196,4 +272,7 @@ def create_db_and_tables():
     print("Tablas creadas exitosamente.")
 
 if __name__ == "__main__":
-    create_db_and_tables()
\ No newline at end of file
+    if "--bulk" in sys.argv:
+        asyncio.run(bulk_main())
+    else:
+        create_db_and_tables()
\ No newline at end of file
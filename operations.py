@@ -1,163 +1,129 @@
-import csv
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from db_connection import engine
 from models import *
-
-DATABASE_FILENAME = "data/games.csv"
-DATABASE_FILENAME_CONSOLES = "data/consoles.csv"
+from csv_store import CsvStore, DuplicateError
+from audit import audit
+from columnar import CATEGORY, FLOAT, INT, TEXT
+
+DATABASE_FILENAME = os.getenv("GAMES_CSV_PATH", "data/games.csv")
+DATABASE_FILENAME_CONSOLES = os.getenv("CONSOLES_CSV_PATH", "data/consoles.csv")
+DELETED_GAMES_FILENAME = os.getenv("DELETED_GAMES_CSV_PATH", "deleted_games.csv")
+DELETED_CONSOLES_FILENAME = os.getenv("DELETED_CONSOLES_CSV_PATH", "deleted_consoles.csv")
 column_fields = ["index", "Rank", "Game_Title", "Platform", "Year", "Genre", "Publisher", "North_America", "Europe", "Japan", "Rest_of_World","Global","Review"]
 column_fields_consoles = ["Id", "Console_Name","Type","Company","Released_Year", "Discontinuation_Year","Units_Sold"]
+# Numero de entradas del journal a partir del cual se reescribe el CSV base
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv("CSV_JOURNAL_COMPACT_THRESHOLD", "500"))
+# Columnas para filtrar/ordenar con query() (el resto de campos solo se leen al devolver la fila)
+game_columns = {
+    "index": INT, "Rank": INT, "Game_Title": TEXT, "Platform": CATEGORY, "Year": FLOAT, "Genre": CATEGORY,
+    "Publisher": CATEGORY, "North_America": FLOAT, "Europe": FLOAT, "Japan": FLOAT, "Rest_of_World": FLOAT,
+    "Global": FLOAT,
+}
+console_columns = {
+    "Id": INT, "Console_Name": TEXT, "Type": CATEGORY, "Company": CATEGORY, "Released_Year": INT,
+    "Discontinuation_Year": FLOAT, "Units_Sold": FLOAT,
+}
+# Hilos dedicados a la E/S de los CSV: no compiten con el threadpool por defecto de Starlette
+CSV_IO_WORKERS = int(os.getenv("CSV_IO_WORKERS", "4"))
+games_store = CsvStore(DATABASE_FILENAME, "index", column_fields, GameWithId, unique_fields=["Rank"],
+                       compact_threshold=JOURNAL_COMPACT_THRESHOLD, columns=game_columns)
+consoles_store = CsvStore(DATABASE_FILENAME_CONSOLES, "Id", column_fields_consoles, ConsoleWithId,
+                          compact_threshold=JOURNAL_COMPACT_THRESHOLD, columns=console_columns)
+
+
+# Las filas borradas se copian (por lotes, en segundo plano) a DELETED_*_FILENAME
+audit.register_backup("csv_game", DELETED_GAMES_FILENAME, column_fields)
+audit.register_backup("csv_console", DELETED_CONSOLES_FILENAME, column_fields_consoles)
+
+csv_executor = ThreadPoolExecutor(max_workers=CSV_IO_WORKERS, thread_name_prefix="csv-io")
+# Un escritor a la vez por CSV dentro del proceso (entre procesos lo garantiza el flock del store):
+# las escrituras esperan en el event loop en vez de ocupar hilos del executor bloqueados en el lock
+write_locks = {store.path: asyncio.Lock() for store in (games_store, consoles_store)}
+
+
+async def run_io(fn, *args, **kwargs):
+    """Ejecuta una funcion bloqueante de este modulo en el executor de los CSV."""
+    return await asyncio.get_running_loop().run_in_executor(csv_executor, partial(fn, *args, **kwargs))
+
+
+async def run_write(store: CsvStore, fn, *args, **kwargs):
+    async with write_locks[store.path]:
+        return await run_io(fn, *args, **kwargs)
+
+
 def read_all_games():
-    with open(DATABASE_FILENAME) as csvfile:
-        reader = csv.DictReader(
-            csvfile,
-        )
-        return [GameWithId(**row) for row in reader]
+    return games_store.all()
+
+def query_games(title=None, genre=None, platform=None, sort=None, limit=None):
+    return games_store.query(
+        {"Game_Title": title, "Genre": genre, "Platform": platform}, sort=sort, limit=limit,
+    )
 
 def read_one_game(game_id):
-    with open(DATABASE_FILENAME) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if int(row["index"]) == game_id:
-                return GameWithId(**row)
+    return games_store.get(game_id)
+
+def read_game_by_rank(rank: int):
+    return games_store.find("Rank", rank)
 
 def get_next_id():
-    try:
-        with open(DATABASE_FILENAME, mode="r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            max_id = max(int(row["index"]) for row in reader)
-            return max_id + 1
-    except:
-        return 1
+    return games_store.next_id()
 
 def write_game(game: GameWithId):
-    with open(DATABASE_FILENAME, mode="a", newline="") as file:
-        writer = csv.DictWriter(file, fieldnames=column_fields)
-        writer.writerow(game.model_dump())
+    games_store.append(game)
 
 def new_game(game: Game):
-    new_id = get_next_id()
-    data = game.model_dump()
-    data["index"] = new_id
-    game_with_id = GameWithId(**data)
-    write_game(game_with_id)
-    return game_with_id
+    # Id y comprobacion de Rank en la misma seccion critica; DuplicateError si el Rank ya existe
+    created = games_store.create(game.model_dump(), unique_field="Rank")
+    audit.record("csv_game", "create", created.index, data=created, source="csv")
+    return created
 
 def modify_game(id: int, data: dict):
-    games = read_all_games()
-    updated = None
-
-    for i, g in enumerate(games):
-        if g.index == id:
-            for key, value in data.items():
-                setattr(g, key, value)
-            updated = g
-            break
-
-    if updated:
-        with open(DATABASE_FILENAME, mode="w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=column_fields)
-            writer.writeheader()
-            for game in games:
-                writer.writerow(game.model_dump())
-        return updated
-    return None
+    modified = games_store.update(id, data)
+    if modified:
+        audit.record("csv_game", "update", id, data=modified, source="csv")
+    return modified
 
 def delete_game(id: int):
-    games = read_all_games()
-    deleted = None
-    with open(DATABASE_FILENAME, mode="w", newline="") as csvfile:
-        writer = csv.DictWriter(
-            csvfile,
-            fieldnames=column_fields,
-        )
-        writer.writeheader()
-        for game in games:
-            if game.index == id:
-                deleted = game
-                # Backup the deleted game
-                backup_deleted_game(deleted)
-                continue
-            writer.writerow(game.model_dump())
+    deleted = games_store.delete(id)
     if deleted:
+        # Backup the deleted game: el evento lleva la fila y el escritor de audit la copia al CSV
+        audit.record("csv_game", "delete", id, data=deleted, source="csv")
         return deleted
-def backup_deleted_game(game: GameWithId):
-    with open("deleted_games.csv", mode="a", newline="") as backup_file:
-        writer = csv.DictWriter(backup_file, fieldnames=column_fields)
-        # Write the deleted game to the backup file
-        writer.writerow(game.model_dump())
 
 def read_all_consoles():
-    with open(DATABASE_FILENAME_CONSOLES) as csvfile:
-        reader = csv.DictReader(csvfile)
-        return [ConsoleWithId(**{str(key): value for key, value in row.items()}) for row in reader]
+    return consoles_store.all()
+
 
 
+def query_consoles(console_name=None, released_year=None, units_sold=None, company=None, sort=None, limit=None):
+    return consoles_store.query(
+        {"Console_Name": console_name, "Released_Year": released_year, "Units_Sold": units_sold, "Company": company},
+        sort=sort, limit=limit,
+    )
 
 def read_one_console(console_id):
-    with open(DATABASE_FILENAME_CONSOLES) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if int(row["Id"]) == console_id:
-                return ConsoleWithId(**row)
+    return consoles_store.get(console_id)
 def get_next_id_console():
-    try:
-        with open(DATABASE_FILENAME_CONSOLES, mode="r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            next_id= max(int(row["Id"]) for row in reader)
-            return next_id + 1
-    except:
-        return 1
+    return consoles_store.next_id()
 
 def write_console(console: ConsoleWithId):
-    with open(DATABASE_FILENAME_CONSOLES, mode="a", newline="") as file:
-        writer = csv.DictWriter(file, fieldnames=column_fields_consoles)
-        writer.writerow(console.model_dump())
+    consoles_store.append(console)
 def new_console(console: Console):
-    new_id = get_next_id_console()
-    data = console.model_dump()
-    data["Id"] = new_id
-    console_with_id = ConsoleWithId(**data)
-    write_console(console_with_id)
-    return console_with_id
+    # El Id recibido no puede existir ya; el de la nueva consola es el siguiente libre
+    created = consoles_store.create(console.model_dump(), unique_field="Id")
+    audit.record("csv_console", "create", created.Id, data=created, source="csv")
+    return created
 def modify_console(id: int, data: dict):
-    consoles = read_all_consoles()
-    updated = None
-    for i, g in enumerate(consoles):
-        if g.Id == id:
-            for key, value in data.items():
-                setattr(g, key, value)
-            updated = g
-            break
-
-    if updated:
-        with open(DATABASE_FILENAME_CONSOLES, mode="w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=column_fields_consoles)
-            writer.writeheader()
-            for console in consoles:
-                writer.writerow(console.model_dump())
-        return updated
-    return None
+    modified = consoles_store.update(id, data)
+    if modified:
+        audit.record("csv_console", "update", id, data=modified, source="csv")
+    return modified
 def delete_console(id: int):
-    consoles = read_all_consoles()
-    deleted = None
-    with open(DATABASE_FILENAME_CONSOLES, mode="w", newline="") as csvfile:
-        writer = csv.DictWriter(
-            csvfile,
-            fieldnames=column_fields_consoles,
-        )
-        writer.writeheader()
-        for console in consoles:
-            if console.Id == id:
-                deleted = console
-                # Backup the deleted console
-                backup_deleted_console(deleted)
-                continue
-            writer.writerow(console.model_dump())
+    deleted = consoles_store.delete(id)
     if deleted:
+        # Backup the deleted console: el evento lleva la fila y el escritor de audit la copia al CSV
+        audit.record("csv_console", "delete", id, data=deleted, source="csv")
         return deleted
-
-def backup_deleted_console(console: Console):
-    with open("deleted_consoles.csv", mode="a", newline="") as backup_file:
-        writer = csv.DictWriter(backup_file, fieldnames=column_fields_consoles)
-        # Write the deleted console to the backup file
-        writer.writerow(console.model_dump())
\ No newline at end of file
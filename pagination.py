@@ -0,0 +1,88 @@
+import math
+import os
+from typing import Any, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from cache import cache
+
+# Los totales cacheados viven poco: ademas se invalidan en cada escritura (cache.invalidate_*)
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+# A partir de este numero de filas (segun el planner de PostgreSQL) se usa la estimacion en vez de count(*)
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "100000"))
+
+
+class Page:
+    """Una pagina de resultados mas lo necesario para pintar los controles de paginacion."""
+
+    def __init__(self, items: List[Any], page: int, per_page: int, total: int, estimated: bool = False):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.estimated = estimated
+        self.total_pages = max(math.ceil(total / per_page), 1) if per_page else 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages
+
+
+async def estimated_count(session: AsyncSession, table_name: str) -> Optional[int]:
+    """Numero de filas segun las estadisticas del planner (solo PostgreSQL); None si no hay estimacion."""
+    if session.bind.dialect.name != "postgresql":
+        return None
+    result = await session.exec(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)").bindparams(
+            table_name=table_name
+        )
+    )
+    estimate = result.scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+async def paginate(
+    session: AsyncSession,
+    statement,
+    page: int = 1,
+    per_page: int = 20,
+    count_key: Optional[str] = None,
+    estimate_table: Optional[str] = None,
+) -> Page:
+    """
+    LIMIT/OFFSET en SQL para cualquier SELECT de un modelo (que ya debe traer su ORDER BY).
+    El total sale, por orden de preferencia, de:
+      1. el cache (`count_key`, TTL corto e invalidado al escribir);
+      2. la estimacion del planner si la tabla completa (`estimate_table`) es muy grande;
+      3. count(*) OVER () en la misma consulta que la pagina, y se guarda en el cache.
+    """
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+
+    total = await cache.get(count_key) if count_key else None
+    generation = await cache.generation() if count_key else None
+    estimated = False
+    if total is None and estimate_table:
+        estimate = await estimated_count(session, estimate_table)
+        if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+            total, estimated = estimate, True
+
+    if total is not None:
+        result = await session.execute(statement.limit(per_page).offset(offset))
+        return Page(result.scalars().all(), page, per_page, total, estimated)
+
+    # execute (y no exec): con la columna extra cada fila es (modelo, total), no un escalar
+    result = await session.execute(statement.add_columns(func.count().over()).limit(per_page).offset(offset))
+    rows = result.all()
+    if rows:
+        total = rows[0][-1]
+        items = [row[0] for row in rows]
+    else:
+        # Pagina fuera de rango (o consulta vacia): no hay filas de las que leer el total
+        count_result = await session.execute(select(func.count()).select_from(statement.order_by(None).subquery()))
+        total = count_result.scalar_one()
+        items = []
+    if count_key:
+        await cache.set(count_key, total, ttl=COUNT_CACHE_TTL_SECONDS, generation=generation)
+    return Page(items, page, per_page, total)
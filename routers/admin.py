@@ -0,0 +1,53 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from archive_retention import run_retention
+from audit import audit
+from cache import cache
+from startup import startup_report
+from db_connection import pool_status
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# Token de las operaciones de /admin que borran datos (cabecera X-Admin-Token); sin el quedan desactivadas
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin operations are disabled; set ADMIN_TOKEN")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/pool")
+async def pool_stats():
+    """Conexiones del pool en uso/libres/overflow y tiempos de espera acumulados del checkout."""
+    return pool_status()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Aciertos/fallos, entradas y evicciones del cache de lecturas."""
+    return cache.stats()
+
+
+@router.get("/startup")
+async def startup_stats():
+    """Tiempos del ultimo arranque (imports, assets, plantillas, conexion, esquema) y si se aplico DDL."""
+    return startup_report()
+
+
+@router.get("/audit")
+async def audit_stats():
+    """Eventos del registro de cambios: en cola, escritos, lotes y fichero actual."""
+    return audit.stats()
+
+
+@router.post("/archive/retention", dependencies=[Depends(require_admin)])
+async def archive_retention(days: Optional[int] = Query(None, ge=0, description="Por defecto ARCHIVE_RETENTION_DAYS")):
+    """Mueve las entradas archivadas mas antiguas a ficheros NDJSON comprimidos y las borra de la base de datos."""
+    return await run_retention(days)
@@ -0,0 +1,40 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from db_connection import get_session, AsyncSession
+from routers.admin import require_admin
+from sales_summary import refresh_sales_summary, sales_by
+from utils.terms import SalesDimension
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/sales")
+async def sales_analytics(
+    group_by: List[SalesDimension] = Query([SalesDimension.Platform]),
+    platform: Optional[str] = Query(None),
+    genre: Optional[str] = Query(None),
+    publisher: Optional[str] = Query(None),
+    year_from: Optional[int] = Query(None),
+    year_to: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Ventas (North_America, Europe, Japan, Rest_of_World, Global) agrupadas por cualquier
+    combinacion de Platform/Genre/Publisher/Year, p. ej. ?group_by=Platform&group_by=Year.
+    """
+    dimensions = list(dict.fromkeys(dimension.value for dimension in group_by))
+    return await sales_by(
+        session, dimensions, platform=platform, genre=genre, publisher=publisher,
+        year_from=year_from, year_to=year_to, limit=limit,
+    )
+
+
+@router.post("/sales/refresh", dependencies=[Depends(require_admin)])
+async def refresh_sales_analytics(session: AsyncSession = Depends(get_session)):
+    """Reconstruye el resumen completo (normalmente no hace falta: se refresca en cada escritura)."""
+    await refresh_sales_summary(await session.connection())
+    await session.commit()
+    return {"status": "refreshed"}
@@ -1,28 +1,38 @@
-from datetime import datetime
-
 from fastapi import APIRouter, Request, Depends, Form, HTTPException, FastAPI, status, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlmodel import Session, select, func
+from sqlalchemy.exc import IntegrityError
 # from db_ops import parse_float # Esto no se usa en el snippet, puedes comentarlo o eliminarlo si no lo necesitas
 from db_connection import get_session, AsyncSession
+from datetime import date, timedelta
 from typing import Optional
+from urllib.parse import urlencode
 from sqlmodels_db import ConsoleSQL, GameSQL, ArchivedGameSQL, ArchivedConsoleSQL, Subscriber
 import db_ops as crud  # Debe tener funciones para games y consoles
+from cache import (
+    invalidate_games, invalidate_consoles, invalidate_subscribers, count_key,
+    STATIC_PAGES_PREFIX, GAMES_PAGES_PREFIX, CONSOLES_PAGES_PREFIX,
+)
+from pagination import paginate
+from templating import templates, render_cached
+from sales_summary import sales_key, refresh_summary_for
+from subscribers import normalize_email, subscribe
+from audit import audit
 
 # app = FastAPI() # Esta línea debe estar en main.py, no aquí.
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 # ---------------- HOME & ABOUT PAGES ----------------
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("home.html", {"request": request})
+    return await render_cached(request, f"{STATIC_PAGES_PREFIX}home", "home.html")
 
 # --- CORRECCIÓN: Unificamos y movemos la ruta /about para evitar duplicados ---
 @router.get("/about", response_class=HTMLResponse)
 async def about_project(request: Request, subscription_message: Optional[str] = None):
     """Muestra la página "Sobre el proyecto" y puede mostrar mensajes de suscripción."""
+    if not subscription_message:
+        return await render_cached(request, f"{STATIC_PAGES_PREFIX}about", "about.html")
     return templates.TemplateResponse(
         "about.html",
         {"request": request, "subscription_message": subscription_message}
@@ -31,7 +41,42 @@ async def about_project(request: Request, subscription_message: Optional[str] =
 @router.get("/about_me", response_class=HTMLResponse)
 async def about_me_page(request: Request):
     """Displays the 'About Me' page."""
-    return templates.TemplateResponse("about_me.html", {"request": request})
+    return await render_cached(request, f"{STATIC_PAGES_PREFIX}about_me", "about_me.html")
+
+
+# ---------------- ARCHIVE FILTERS ----------------
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Fecha YYYY-MM-DD de un <input type="date">; vacia o invalida se ignora."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def archived_between(statement, column, from_date: Optional[str], to_date: Optional[str]):
+    """Filtra por rango de archived_at (ambos extremos incluidos) usando el indice de la columna."""
+    start, end = parse_date(from_date), parse_date(to_date)
+    filters = {}
+    if start:
+        statement = statement.where(column >= start)
+        filters["from_date"] = start.isoformat()
+    if end:
+        statement = statement.where(column < end + timedelta(days=1))
+        filters["to_date"] = end.isoformat()
+    return statement, filters
+
+
+def page_params(filters: dict) -> str:
+    return f"&{urlencode(filters)}" if filters else ""
+
+
+async def move_or_conflict(session: AsyncSession, source, target, condition):
+    """crud.move_rows para las rutas de archivar/restaurar: si el id ya existe en el destino, 409."""
+    try:
+        return await crud.move_rows(session, source, target, condition)
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe un registro con ese id en el destino.")
 
 
 # ---------------- CONSOLES ----------------
@@ -41,35 +86,35 @@ async def consoles_list(
     page: int = 1,
     session: Session = Depends(get_session)
 ):
-    limit = 10
-    offset = (page - 1) * limit
-
-    all_consoles = await crud.get_consoles(session)
-    total_consoles = len(all_consoles)
-    total_pages = (total_consoles + limit - 1) // limit
+    async def load_context():
+        result = await paginate(
+            session, select(ConsoleSQL).order_by(ConsoleSQL.id), page, per_page=10,
+            count_key=count_key("consoles"), estimate_table="consoles",
+        )
+        return {"consoles": result.items, "page": result.page, "total_pages": result.total_pages}
 
-    consoles = all_consoles[offset : offset + limit]
-
-    return templates.TemplateResponse("consoles/consoles.html", {
-        "request": request,
-        "consoles": consoles,
-        "page": page,
-        "total_pages": total_pages
-    })
+    # HTML cacheado por pagina; se invalida con cualquier escritura en consoles
+    return await render_cached(request, f"{CONSOLES_PAGES_PREFIX}view:{page}", "consoles/consoles.html", load_context)
 
 @router.get("/consoles/search", response_class=HTMLResponse)
 async def search_consoles(
     request: Request,
     q: str = Query(...),
+    page: int = Query(1, ge=1),
     session: Session = Depends(get_session)
 ):
-    results = await crud.get_console_key(session, q)
+    PAGE_SIZE = 10
+    results, total_results = await crud.search_consoles(
+        session, q, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE
+    )
+    total_pages = (total_results + PAGE_SIZE - 1) // PAGE_SIZE
     return templates.TemplateResponse("consoles/consoles.html", {
         "request": request,
         "consoles": results,
         "show_actions": True,
-        "page": 1,
-        "total_pages": 1
+        "page": page,
+        "total_pages": total_pages,
+        "query": q
     })
 
 # --- CORRECCIÓN CLAVE: La ruta GET va PRIMERO ---
@@ -100,6 +145,8 @@ async def create_console_from_form(
         session.add(new_console_db)
         await session.commit()
         await session.refresh(new_console_db)
+        await invalidate_consoles(new_console_db.id)
+        audit.record("console", "create", new_console_db.id, data=new_console_db, source="web")
         return RedirectResponse(url="/consoles/view", status_code=303)
     except Exception as e:
         import traceback
@@ -148,6 +195,8 @@ async def update_console_from_form(
         session.add(db_console)
         await session.commit()
         await session.refresh(db_console)
+        await invalidate_consoles(console_id)
+        audit.record("console", "update", console_id, data=db_console, source="web")
         return RedirectResponse(url=f"/consoles/view", status_code=303)
     except Exception as e:
         print(f"Error updating console {console_id}: {e}")
@@ -158,73 +207,77 @@ async def update_console_from_form(
 
 @router.post("/consoles/{console_id}/delete", response_class=RedirectResponse, status_code=303)
 async def move_console_to_archive(console_id: int, session: AsyncSession = Depends(get_session)):
-    """Mueve una consola a la tabla de consolas archivadas y la elimina de la tabla principal."""
-    console_to_archive = await session.get(ConsoleSQL, console_id)
-    if not console_to_archive:
+    """Mueve una consola a la tabla de consolas archivadas (INSERT ... SELECT + DELETE en la base de datos)."""
+    moved = await move_or_conflict(session, ConsoleSQL, ArchivedConsoleSQL, ConsoleSQL.__table__.c.id == console_id)
+    if not moved:
         raise HTTPException(status_code=404, detail="Consola no encontrada para archivar.")
 
-    archived_console = ArchivedConsoleSQL(
-        id=console_to_archive.id,
-        Console_Name=console_to_archive.Console_Name,
-        Type=console_to_archive.Type,
-        Company=console_to_archive.Company,
-        Released_Year=console_to_archive.Released_Year,
-        Discontinuation_Year=console_to_archive.Discontinuation_Year,
-        Units_Sold=console_to_archive.Units_Sold,
-        archived_at=datetime.now()
-    )
+    await session.commit()
+    await invalidate_consoles(console_id)
+    audit.record("console", "archive", console_id, source="web")
+    return RedirectResponse(url="/consoles/view", status_code=303)
 
-    session.add(archived_console)
-    await session.delete(console_to_archive)
+@router.post("/consoles/{console_id}/restore", response_class=RedirectResponse, status_code=303)
+async def restore_console(console_id: int, session: AsyncSession = Depends(get_session)):
+    """Devuelve una consola archivada a la tabla principal."""
+    moved = await move_or_conflict(session, ArchivedConsoleSQL, ConsoleSQL, ArchivedConsoleSQL.__table__.c.id == console_id)
+    if not moved:
+        raise HTTPException(status_code=404, detail="Consola archivada no encontrada.")
 
     await session.commit()
-    return RedirectResponse(url="/consoles/view", status_code=303)
+    await invalidate_consoles(console_id)
+    audit.record("console", "restore", console_id, source="web")
+    return RedirectResponse(url="/consoles/archived", status_code=303)
 
 @router.get("/consoles/archived", response_class=HTMLResponse)
-async def view_archived_consoles(request: Request, session: AsyncSession = Depends(get_session)):
-    """Muestra una lista de consolas archivadas."""
-    archived_consoles_statement = select(ArchivedConsoleSQL)
-    archived_consoles_result = await session.execute(archived_consoles_statement)
-    archived_consoles = archived_consoles_result.scalars().all()
+async def view_archived_consoles(
+    request: Request,
+    page: int = 1,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """Muestra una lista paginada de consolas archivadas (las mas recientes primero), filtrable por fecha."""
+    statement = select(ArchivedConsoleSQL).order_by(ArchivedConsoleSQL.archived_at.desc(), ArchivedConsoleSQL.id)
+    statement, filters = archived_between(statement, ArchivedConsoleSQL.archived_at, from_date, to_date)
+    result = await paginate(
+        session, statement, page, per_page=20, count_key=None if filters else count_key("archived_consoles")
+    )
     return templates.TemplateResponse(
         "consoles/archived_consoles.html",
-        {"request": request, "archived_consoles": archived_consoles}
+        {
+            "request": request, "archived_consoles": result.items, "page": result.page,
+            "total_pages": result.total_pages, "page_params": page_params(filters), **filters,
+        }
     )
 
 # ---------------- GAMES ----------------
 @router.get("/games/view", response_class=HTMLResponse)
-async def games_list(request: Request, session: Session = Depends(get_session), page: int = 1, per_page: int = 20):
-    skip = (page - 1) * per_page
-    games = await crud.get_games_paginated(session, skip=skip, limit=per_page)
-
-    total_games = await session.exec(select(func.count()).select_from(GameSQL))
-    total = total_games.one()
+async def games_list(request: Request, session: Session = Depends(get_session), page: int = 1, per_page: int = Query(20, ge=1, le=100)):
+    async def load_context():
+        result = await paginate(
+            session, select(GameSQL).order_by(GameSQL.index), page, per_page,
+            count_key=count_key("games"), estimate_table="games",
+        )
+        return {"games": result.items, "page": result.page, "total_pages": result.total_pages}
 
-    total_pages = (total + per_page - 1) // per_page
-
-    return templates.TemplateResponse("/games/games.html", {
-        "request": request,
-        "games": games,
-        "page": page,
-        "total_pages": total_pages,
-    })
+    # HTML cacheado por pagina; se invalida con cualquier escritura en games
+    return await render_cached(request, f"{GAMES_PAGES_PREFIX}view:{page}:{per_page}", "games/games.html", load_context)
 
 @router.get("/games/search", response_class=HTMLResponse)
 async def search_games(
     request: Request,
     q: str = "",
-    page: int = 1,
+    page: int = Query(1, ge=1),
     session: Session = Depends(get_session)
 ):
     PAGE_SIZE = 10
-    all_results = await crud.get_game_key(session, q)
-    total_results = len(all_results)
+    # Paginacion, total y orden por relevancia se resuelven en la base de datos
+    paginated_results, total_results = await crud.search_games(
+        session, q, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE
+    )
     total_pages = (total_results + PAGE_SIZE - 1) // PAGE_SIZE
 
-    start = (page - 1) * PAGE_SIZE
-    end = start + PAGE_SIZE
-    paginated_results = all_results[start:end]
-
     return templates.TemplateResponse("games/games.html", {
         "request": request,
         "games": paginated_results,
@@ -271,8 +324,11 @@ async def create_game_from_form(
             Review=Review
         )
         session.add(new_game_db)
+        await refresh_summary_for(session, sales_key(new_game_db))
         await session.commit()
         await session.refresh(new_game_db)
+        await invalidate_games(new_game_db.index)
+        audit.record("game", "create", new_game_db.index, data=new_game_db, source="web")
         return RedirectResponse(url="/games/view", status_code=303)
     except Exception as e:
         import traceback
@@ -313,6 +369,7 @@ async def update_game_from_form(
     db_game = await session.get(GameSQL, game_id)
     if not db_game:
         raise HTTPException(status_code=404, detail="Game not found for update.")
+    old_key = sales_key(db_game)
 
     try:
         db_game.Rank = Rank
@@ -329,8 +386,11 @@ async def update_game_from_form(
         db_game.Review = Review
 
         session.add(db_game)
+        await refresh_summary_for(session, old_key, sales_key(db_game))
         await session.commit()
         await session.refresh(db_game)
+        await invalidate_games(game_id)
+        audit.record("game", "update", game_id, data=db_game, source="web")
         return RedirectResponse(url=f"/games/view", status_code=303)
     except Exception as e:
         print(f"Error updating game {game_id}: {e}")
@@ -341,43 +401,51 @@ async def update_game_from_form(
 
 @router.post("/games/{game_id}/delete", response_class=RedirectResponse, status_code=303)
 async def move_game_to_archive(game_id: int, session: AsyncSession = Depends(get_session)):
-    """Mueve un juego a la tabla de juegos archivados y lo elimina de la tabla principal."""
-    game_to_archive = await session.get(GameSQL, game_id)
-    if not game_to_archive:
+    """Mueve un juego a la tabla de juegos archivados (INSERT ... SELECT + DELETE en la base de datos)."""
+    moved = await move_or_conflict(session, GameSQL, ArchivedGameSQL, GameSQL.__table__.c.index == game_id)
+    if not moved:
         raise HTTPException(status_code=404, detail="Juego no encontrado para archivar.")
+    await refresh_summary_for(session, sales_key(moved[0]))
 
-    archived_game = ArchivedGameSQL(
-        index=game_to_archive.index,
-        Rank=game_to_archive.Rank,
-        Game_Title=game_to_archive.Game_Title,
-        Platform=game_to_archive.Platform,
-        Year=game_to_archive.Year,
-        Genre=game_to_archive.Genre,
-        Publisher=game_to_archive.Publisher,
-        North_America=game_to_archive.North_America,
-        Europe=game_to_archive.Europe,
-        Japan=game_to_archive.Japan,
-        Rest_of_World=game_to_archive.Rest_of_World,
-        Global=game_to_archive.Global,
-        Review=game_to_archive.Review,
-        archived_at=datetime.now()
-    )
+    await session.commit()
+    await invalidate_games(game_id)
+    audit.record("game", "archive", game_id, source="web")
+    return RedirectResponse(url="/games/view", status_code=303)
 
-    session.add(archived_game)
-    await session.delete(game_to_archive)
+@router.post("/games/{game_id}/restore", response_class=RedirectResponse, status_code=303)
+async def restore_game(game_id: int, session: AsyncSession = Depends(get_session)):
+    """Devuelve un juego archivado a la tabla principal."""
+    moved = await move_or_conflict(session, ArchivedGameSQL, GameSQL, ArchivedGameSQL.__table__.c.index == game_id)
+    if not moved:
+        raise HTTPException(status_code=404, detail="Juego archivado no encontrado.")
+    await refresh_summary_for(session, sales_key(moved[0]))
 
     await session.commit()
-    return RedirectResponse(url="/games/view", status_code=303)
+    await invalidate_games(game_id)
+    audit.record("game", "restore", game_id, source="web")
+    return RedirectResponse(url="/games/archived", status_code=303)
 
 @router.get("/games/archived", response_class=HTMLResponse)
-async def view_archived_games(request: Request, session: AsyncSession = Depends(get_session)):
-    """Muestra una lista de juegos archivados."""
-    archived_games_statement = select(ArchivedGameSQL)
-    archived_games_result = await session.execute(archived_games_statement)
-    archived_games = archived_games_result.scalars().all()
+async def view_archived_games(
+    request: Request,
+    page: int = 1,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """Muestra una lista paginada de juegos archivados (los mas recientes primero), filtrable por fecha."""
+    statement = select(ArchivedGameSQL).order_by(ArchivedGameSQL.archived_at.desc(), ArchivedGameSQL.index)
+    statement, filters = archived_between(statement, ArchivedGameSQL.archived_at, from_date, to_date)
+    # Los totales filtrados no se cachean: solo se invalida el total de la tabla completa
+    result = await paginate(
+        session, statement, page, per_page=20, count_key=None if filters else count_key("archived_games")
+    )
     return templates.TemplateResponse(
         "games/archived_games.html",
-        {"request": request, "archived_games": archived_games}
+        {
+            "request": request, "archived_games": result.items, "page": result.page,
+            "total_pages": result.total_pages, "page_params": page_params(filters), **filters,
+        }
     )
 
 
@@ -391,19 +459,17 @@ async def subscribe_email(
     """Procesa el formulario de suscripción de email."""
     message = ""
     try:
-        if "@" not in email or "." not in email:
+        normalized = normalize_email(email)
+        if normalized is None:
             message = "Formato de correo electrónico inválido."
             return RedirectResponse(url=f"/about?subscription_message={message}", status_code=303)
 
-        existing_subscriber = await session.exec(select(Subscriber).where(Subscriber.email == email))
-        if existing_subscriber.first():
+        # INSERT ... ON CONFLICT DO NOTHING: sin SELECT previo ni carrera entre altas simultaneas
+        if not await subscribe(session, normalized):
             message = "Este correo electrónico ya está suscrito."
             return RedirectResponse(url=f"/about?subscription_message={message}", status_code=303)
 
-        new_subscriber = Subscriber(email=email)
-        session.add(new_subscriber)
-        await session.commit()
-        await session.refresh(new_subscriber)
+        await invalidate_subscribers()
         message = "¡Gracias por suscribirte exitosamente!"
         return RedirectResponse(url=f"/about?subscription_message={message}", status_code=303)
 
@@ -413,12 +479,13 @@ async def subscribe_email(
         return RedirectResponse(url=f"/about?subscription_message={message}", status_code=303)
 
 @router.get("/subscribers", response_class=HTMLResponse)
-async def view_subscribers(request: Request, session: AsyncSession = Depends(get_session)):
-    """Muestra una lista de todos los suscriptores."""
-    subscribers_statement = select(Subscriber)
-    subscribers_result = await session.execute(subscribers_statement)
-    subscribers = subscribers_result.scalars().all()
+async def view_subscribers(request: Request, page: int = 1, session: AsyncSession = Depends(get_session)):
+    """Muestra una lista paginada de los suscriptores."""
+    result = await paginate(
+        session, select(Subscriber).order_by(Subscriber.id), page, per_page=50,
+        count_key=count_key("subscribers"), estimate_table="subscriber",
+    )
     return templates.TemplateResponse(
         "subscribers.html",
-        {"request": request, "subscribers": subscribers}
+        {"request": request, "subscribers": result.items, "page": result.page, "total_pages": result.total_pages}
     )
\ No newline at end of file
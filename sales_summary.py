@@ -0,0 +1,187 @@
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, exists, func, or_, select, text, true
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from sqlmodels_db import GameSQL, SalesSummarySQL
+
+DIMENSIONS = ("Platform", "Genre", "Publisher", "Year")
+SALES_COLUMNS = ("North_America", "Europe", "Japan", "Rest_of_World", "Global")
+# Claves refrescadas por sentencia (cada clave es una condicion del OR)
+REFRESH_BATCH = 200
+# Espacio de los advisory locks por clave en PostgreSQL (primer argumento de pg_advisory_xact_lock)
+SUMMARY_LOCK_SPACE = 7_017_009
+
+SalesKey = Tuple[str, str, str, Optional[int]]
+
+
+def sales_key(game: Any) -> SalesKey:
+    return tuple(getattr(game, dimension) for dimension in DIMENSIONS)
+
+
+def _key_condition(table, key: SalesKey):
+    # '=' (y no IS NOT DISTINCT FROM) para que se puedan usar los indices; NULL solo en Year
+    return and_(*[
+        table.c[dimension] == value if value is not None else table.c[dimension].is_(None)
+        for dimension, value in zip(DIMENSIONS, key)
+    ])
+
+
+def _aggregate_games(keys: Optional[List[SalesKey]] = None):
+    games = GameSQL.__table__
+    dimensions = [games.c[dimension] for dimension in DIMENSIONS]
+    statement = select(
+        *dimensions,
+        func.count().label("games"),
+        *[func.coalesce(func.sum(games.c[column]), 0.0).label(column) for column in SALES_COLUMNS],
+    ).group_by(*dimensions)
+    if keys is not None:
+        statement = statement.where(or_(*[_key_condition(games, key) for key in keys]))
+    return statement
+
+
+def _upsert(conn: AsyncConnection, aggregate):
+    """INSERT ... SELECT del agregado; si la clave ya existe se sobrescriben sus totales."""
+    summary = SalesSummarySQL.__table__
+    insert_ = postgresql_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    statement = insert_(summary).from_select([*DIMENSIONS, "games", *SALES_COLUMNS], aggregate)
+    return statement.on_conflict_do_update(
+        # Misma expresion que ux_sales_summary_key (SQLite compara el texto, un parametro -1 no le vale)
+        index_elements=[summary.c.Platform, summary.c.Genre, summary.c.Publisher, text('COALESCE("Year", -1)')],
+        set_={column: statement.excluded[column] for column in ("games", *SALES_COLUMNS)},
+    )
+
+
+def _lock_id(key: SalesKey) -> int:
+    # crc32 con signo: el segundo argumento de pg_advisory_xact_lock es int4; una colision solo serializa de mas
+    value = zlib.crc32(repr(key).encode("utf-8"))
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+
+async def _lock_keys(conn: AsyncConnection, keys: List[SalesKey]):
+    """
+    PostgreSQL: un advisory lock por clave hasta el commit. Sin el, dos escrituras de la misma clave
+    agregan cada una sin ver el juego de la otra y la ultima en escribir deja el total incompleto.
+    En orden para no crear deadlocks. SQLite ya serializa a los escritores.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for lock_id in sorted({_lock_id(key) for key in keys}):
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:space, :lock_id)"), {"space": SUMMARY_LOCK_SPACE, "lock_id": lock_id}
+        )
+
+
+async def refresh_sales_summary(conn: AsyncConnection, keys: Optional[Iterable[SalesKey]] = None):
+    """
+    Recalcula sales_summary. Sin `keys` la reconstruye entera; con `keys` solo vuelve a agregar
+    esas combinaciones (Platform, Genre, Publisher, Year) desde 'games' con un upsert, y borra
+    las que ya no tienen juegos.
+    """
+    summary = SalesSummarySQL.__table__
+    if keys is None:
+        await conn.execute(delete(summary))
+        # WHERE true: sin el, SQLite leeria el ON CONFLICT como parte del FROM
+        await conn.execute(_upsert(conn, _aggregate_games().where(true())))
+        return
+
+    keys = list(set(keys))
+    await _lock_keys(conn, keys)
+    games = GameSQL.__table__
+    for start in range(0, len(keys), REFRESH_BATCH):
+        batch = keys[start:start + REFRESH_BATCH]
+        await conn.execute(_upsert(conn, _aggregate_games(batch)))
+        still_has_games = exists().where(
+            *[games.c[dimension].is_not_distinct_from(summary.c[dimension]) for dimension in DIMENSIONS]
+        )
+        await conn.execute(
+            delete(summary).where(or_(*[_key_condition(summary, key) for key in batch]), ~still_has_games)
+        )
+
+
+async def refresh_summary_for(session: AsyncSession, *keys: SalesKey):
+    """Flush de los cambios pendientes y refresco de esas claves en la misma transaccion, antes del commit."""
+    await session.flush()
+    await refresh_sales_summary(await session.connection(), keys)
+
+
+async def install_sales_summary_key(conn: AsyncConnection):
+    """
+    Cambia el UNIQUE (Platform, Genre, Publisher, Year) de esquemas anteriores por ux_sales_summary_key
+    (el indice con COALESCE no se puede anadir mientras haya duplicados con Year NULL).
+    La tabla es derivada: se vuelve a crear vacia y ensure_sales_summary la reconstruye al arrancar.
+    """
+    summary = SalesSummarySQL.__table__
+    catalog = (
+        "SELECT 1 FROM pg_indexes WHERE indexname = :name" if conn.dialect.name == "postgresql"
+        else "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"
+    )
+    has_key = (await conn.execute(text(catalog), {"name": "ux_sales_summary_key"})).first() is not None
+    if not has_key:
+        await conn.run_sync(lambda sync_conn: summary.drop(sync_conn))
+        await conn.run_sync(lambda sync_conn: summary.create(sync_conn))
+
+
+async def ensure_sales_summary(conn: AsyncConnection):
+    """Construye el resumen la primera vez (tabla vacia pero con juegos cargados)."""
+    summary_rows = await conn.scalar(select(func.count()).select_from(SalesSummarySQL.__table__))
+    if summary_rows:
+        return
+    has_games = await conn.scalar(select(GameSQL.__table__.c.index).limit(1))
+    if has_games is not None:
+        await refresh_sales_summary(conn)
+
+
+async def sales_by(
+    session: AsyncSession,
+    group_by: List[str],
+    platform: Optional[str] = None,
+    genre: Optional[str] = None,
+    publisher: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Suma de ventas por region agrupada por cualquier subconjunto de DIMENSIONS, desde sales_summary."""
+    summary = SalesSummarySQL.__table__
+    dimensions = [summary.c[dimension] for dimension in group_by]
+    statement = (
+        select(
+            *dimensions,
+            func.sum(summary.c.games).label("games"),
+            *[func.sum(summary.c[column]).label(column) for column in SALES_COLUMNS],
+        )
+        .group_by(*dimensions)
+        .order_by(func.sum(summary.c.Global).desc())
+        .limit(limit)
+    )
+    if platform:
+        statement = statement.where(summary.c.Platform == platform)
+    if genre:
+        statement = statement.where(summary.c.Genre == genre)
+    if publisher:
+        statement = statement.where(summary.c.Publisher == publisher)
+    if year_from is not None:
+        statement = statement.where(summary.c.Year >= year_from)
+    if year_to is not None:
+        statement = statement.where(summary.c.Year <= year_to)
+
+    conn = await session.connection()
+    result = await conn.execute(statement)
+    rows = []
+    for row in result.mappings():
+        data = dict(row)
+        total = data["Global"] or 0.0
+        for column in SALES_COLUMNS:
+            data[column] = round(data[column] or 0.0, 4)
+        # Cuota de cada region sobre el total global del grupo (p. ej. EU share por genero)
+        data["share"] = {
+            column: round(data[column] / total, 4) if total else None
+            for column in SALES_COLUMNS if column != "Global"
+        }
+        rows.append(data)
+    return rows
@@ -0,0 +1,62 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# tabla -> (columna de texto buscable, primary key)
+SEARCHABLE_COLUMNS = {
+    "games": ("Game_Title", "index"),
+    "consoles": ("Console_Name", "id"),
+}
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+async def install_search_indexes(conn: AsyncConnection):
+    """
+    Crea (si no existen) los indices que usan las busquedas por titulo/nombre.
+    - PostgreSQL: extension pg_trgm + indice GIN con gin_trgm_ops, que sirve para ILIKE '%q%'.
+    - SQLite: tabla FTS5 con tokenizer trigram, mantenida por triggers sobre la tabla original.
+    """
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table_name, (column, _) in SEARCHABLE_COLUMNS.items():
+            await conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS ix_{table_name}_{column.lower()}_trgm '
+                f'ON {table_name} USING gin ("{column}" gin_trgm_ops)'
+            ))
+    elif conn.dialect.name == "sqlite":
+        for table_name, (column, pk) in SEARCHABLE_COLUMNS.items():
+            await _install_sqlite_fts(conn, table_name, column, pk)
+
+
+async def _install_sqlite_fts(conn: AsyncConnection, table_name: str, column: str, pk: str):
+    fts = fts_table_name(table_name)
+    exists = await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+    )
+    already_created = exists.first() is not None
+
+    await conn.execute(text(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+        f'"{column}", content=\'{table_name}\', content_rowid=\'{pk}\', tokenize=\'trigram\')'
+    ))
+    await conn.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN '
+        f'INSERT INTO {fts}(rowid, "{column}") VALUES (new."{pk}", new."{column}"); END'
+    ))
+    await conn.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN '
+        f'INSERT INTO {fts}({fts}, rowid, "{column}") VALUES (\'delete\', old."{pk}", old."{column}"); END'
+    ))
+    # Solo cuando cambia el texto o el id: otros UPDATE (p. ej. row_version desde los triggers de
+    # change_feed.py, que corren antes que {fts}_ai) no deben tocar el indice
+    await conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_au"))
+    await conn.execute(text(
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF "{column}", "{pk}" ON {table_name} BEGIN '
+        f'INSERT INTO {fts}({fts}, rowid, "{column}") VALUES (\'delete\', old."{pk}", old."{column}"); '
+        f'INSERT INTO {fts}(rowid, "{column}") VALUES (new."{pk}", new."{column}"); END'
+    ))
+    if not already_created:
+        # Indexa las filas que ya estaban en la tabla antes de crear el indice
+        await conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
@@ -2,9 +2,10 @@ import sqlite3
 from datetime import datetime
 
 from pydantic import ConfigDict
+from sqlalchemy import BigInteger, Index, text
 from sqlmodel import SQLModel
 from sqlmodel import Field
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 
 class GameBase(SQLModel):
     Rank: int = Field(..., gt=-1)
@@ -22,7 +23,29 @@ class GameBase(SQLModel):
 
 class GameSQL(GameBase, table=True):
     __tablename__ = "games"
+    __table_args__ = (
+        # Filtros y ordenes de GET /games/; "index" al final para que el keyset (orden, index) recorra el indice
+        Index("ix_games_rank", "Rank", "index"),
+        Index("ix_games_year", "Year", "index"),
+        Index("ix_games_global", "Global", "index"),
+        Index("ix_games_north_america", "North_America", "index"),
+        Index("ix_games_europe", "Europe", "index"),
+        Index("ix_games_japan", "Japan", "index"),
+        Index("ix_games_rest_of_world", "Rest_of_World", "index"),
+        Index("ix_games_platform_global", "Platform", "Global", "index"),
+        Index("ix_games_platform_year", "Platform", "Year", "index"),
+        Index("ix_games_genre_global", "Genre", "Global", "index"),
+        Index("ix_games_publisher_global", "Publisher", "Global", "index"),
+        # Keyset (row_version, index) del change feed
+        Index("ix_games_row_version", "row_version", "index"),
+        # En SQLite sin AUTOINCREMENT se reutiliza el id mas alto borrado/archivado y choca con el archivo
+        {"sqlite_autoincrement": True},
+    )
     index: Optional[int] = Field(default=None, primary_key=True)
+    # Los rellenan los triggers de change_feed.py en cada INSERT/UPDATE (el valor que envie el cliente se ignora).
+    # En PostgreSQL row_version es el id de la transaccion que escribio la fila (xid8), de ahi BigInteger
+    row_version: Optional[int] = Field(default=None, sa_type=BigInteger)
+    updated_at: Optional[datetime] = Field(default=None)
     model_config = ConfigDict(from_attributes=True)
 
 class ConsoleBase(SQLModel):
@@ -35,10 +58,44 @@ class ConsoleBase(SQLModel):
 
 class ConsoleSQL(ConsoleBase, table=True):
     __tablename__ = "consoles"
+    __table_args__ = (
+        Index("ix_consoles_row_version", "row_version", "id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    row_version: Optional[int] = Field(default=None, sa_type=BigInteger)
+    updated_at: Optional[datetime] = Field(default=None)
     model_config = ConfigDict(from_attributes=True)
 
 
+
+###Paginated responses
+class GamePage(SQLModel):
+    items: List[GameSQL]
+    next_cursor: Optional[str] = None
+
+
+class ConsolePage(SQLModel):
+    items: List[ConsoleSQL]
+    next_cursor: Optional[str] = None
+
+
+###Change feed
+class GameChanges(SQLModel):
+    # Filas creadas/modificadas y ids borrados o archivados desde el token, en orden de version
+    items: List[GameSQL]
+    deleted: List[int]
+    next_token: str
+    has_more: bool = False
+
+
+class ConsoleChanges(SQLModel):
+    items: List[ConsoleSQL]
+    deleted: List[int]
+    next_token: str
+    has_more: bool = False
+
+
     ####Updated Models
 class GameUpdate(SQLModel):
         # Todos los campos son opcionales y pueden ser None si no se proporcionan
@@ -63,6 +120,68 @@ class ConsoleUpdate(SQLModel):
         Discontinuation_Year: Optional[int] = Field(default=None, gt=-1, lt=2030)
         Units_Sold: Optional[float] = Field(default=None, gt=-1)
 
+###Bulk operations
+class BulkOperation(SQLModel):
+    op: Literal["insert", "update", "delete"]
+    id: Optional[int] = None  # requerido para update y delete
+    data: Optional[Dict[str, Any]] = None  # requerido para insert y update
+
+
+class BulkRequest(SQLModel):
+    operations: List[BulkOperation] = Field(..., min_length=1, max_length=10000)
+
+
+class BulkItemResult(SQLModel):
+    position: int  # posicion de la operacion en la peticion
+    op: str
+    status: str  # created | updated | deleted | not_found | invalid
+    id: Optional[int] = None
+    item: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BulkResponse(SQLModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    results: List[BulkItemResult]
+
+class GameArchiveFilter(SQLModel):
+    # Se archivan/restauran los juegos que cumplen todos los filtros indicados (al menos uno)
+    ids: Optional[List[int]] = Field(default=None, max_length=10000)
+    platform: Optional[str] = None
+    genre: Optional[str] = None
+    publisher: Optional[str] = None
+    year_before: Optional[int] = None  # Year < year_before
+
+
+class GameListFilter(SQLModel):
+    # Filtros de GET /games/; todos opcionales y combinables
+    platform: Optional[str] = None
+    genre: Optional[str] = None
+    publisher: Optional[str] = None
+    year_from: Optional[int] = None  # Year >= year_from
+    year_to: Optional[int] = None  # Year <= year_to
+    min_north_america: Optional[float] = None
+    min_europe: Optional[float] = None
+    min_japan: Optional[float] = None
+    min_rest_of_world: Optional[float] = None
+    min_global: Optional[float] = None
+
+
+class ConsoleArchiveFilter(SQLModel):
+    ids: Optional[List[int]] = Field(default=None, max_length=10000)
+    company: Optional[str] = None
+    type: Optional[str] = None
+    discontinued_before: Optional[int] = None  # Discontinuation_Year < discontinued_before
+
+
+class ArchiveResult(SQLModel):
+    moved: int
+    ids: List[int]
+
+
 ###deeleted
 class ArchivedGameSQL(SQLModel, table=True):
     # Usamos el mismo 'index' como Primary Key para referencia,
@@ -72,7 +191,7 @@ class ArchivedGameSQL(SQLModel, table=True):
     Rank: int
     Game_Title: str
     Platform: str
-    Year: int
+    Year: Optional[int] = Field(default=None)  # Como en GameSQL: hay juegos sin anio
     Genre: str
     Publisher: str
     North_America: Optional[float] = Field(default=None)
@@ -81,7 +200,7 @@ class ArchivedGameSQL(SQLModel, table=True):
     Rest_of_World: Optional[float] = Field(default=None)
     Global: Optional[float] = Field(default=None)
     Review: Optional[str] = Field(default=None)
-    archived_at: datetime = Field(default_factory=datetime.now) # Marca de tiempo de archivado
+    archived_at: datetime = Field(default_factory=datetime.now, index=True) # Marca de tiempo de archivado
 
 class ArchivedConsoleSQL(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True) # ID de la consola original
@@ -91,9 +210,60 @@ class ArchivedConsoleSQL(SQLModel, table=True):
     Released_Year: int
     Discontinuation_Year: Optional[int] = Field(default=None)
     Units_Sold: Optional[float] = Field(default=None)
-    archived_at: datetime = Field(default_factory=datetime.now) # Marca de tiempo de archivado
+    archived_at: datetime = Field(default_factory=datetime.now, index=True) # Marca de tiempo de archivado
 
 class Subscriber(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(index=True, unique=True) # El email será único y se podrá buscar
-    subscribed_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    subscribed_at: datetime = Field(default_factory=datetime.now)
+
+
+###Analytics
+class SalesSummarySQL(SQLModel, table=True):
+    # Resumen materializado de ventas al grano mas fino (Platform, Genre, Publisher, Year).
+    # Cualquier agrupacion por un subconjunto de estas columnas se calcula sobre esta tabla
+    # en vez de recorrer 'games'. Se refresca por claves afectadas en cada escritura (analytics.py).
+    __tablename__ = "sales_summary"
+    # Clave unica con Year NULL incluido (un UNIQUE normal admite varias filas con NULL): la usa el upsert del refresco
+    __table_args__ = (
+        Index("ux_sales_summary_key", "Platform", "Genre", "Publisher", text('COALESCE("Year", -1)'), unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    Platform: str = Field(index=True)
+    Genre: str = Field(index=True)
+    Publisher: str = Field(index=True)
+    Year: Optional[int] = Field(default=None, index=True)
+    games: int = 0
+    North_America: float = 0.0
+    Europe: float = 0.0
+    Japan: float = 0.0
+    Rest_of_World: float = 0.0
+    Global: float = 0.0
+
+
+###Change feed
+class RowVersionSQL(SQLModel, table=True):
+    # Solo SQLite: ultima version repartida por tabla (SQLite ya serializa a los escritores).
+    # PostgreSQL usa el id de transaccion, sin contador compartido (ver change_feed.py)
+    __tablename__ = "row_versions"
+    table_name: str = Field(primary_key=True)
+    version: int = 0
+
+
+class TombstoneSQL(SQLModel, table=True):
+    # Una fila por id borrado o archivado; el feed la ignora mientras el id vuelva a estar en la tabla (restaurar)
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_table_version", "table_name", "row_version", "row_id"),)
+    table_name: str = Field(primary_key=True)
+    row_id: int = Field(primary_key=True)
+    row_version: int = Field(sa_type=BigInteger)
+    deleted_at: Optional[datetime] = Field(default=None)
+
+
+###Schema
+class SchemaVersionSQL(SQLModel, table=True):
+    # Una sola fila (id=1) con la version del esquema ya aplicada (ver startup.SCHEMA_VERSION)
+    __tablename__ = "schema_version"
+    id: int = Field(default=1, primary_key=True)
+    version: int
+    applied_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,81 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import SQLModel
+
+from archive_retention import install_archive_indexes, install_archive_nullable_columns
+from change_feed import install_change_feed
+from db_ops import install_game_indexes
+from sales_summary import install_sales_summary_key
+from search_index import install_search_indexes
+from sqlmodels_db import SchemaVersionSQL
+
+# Subir en cada cambio de tablas o indices: solo entonces se repite el DDL al arrancar
+SCHEMA_VERSION = 7
+# DDL extra (fuera de create_all) que forma parte del esquema versionado
+SCHEMA_INSTALLERS = (
+    install_search_indexes, install_archive_nullable_columns, install_archive_indexes, install_change_feed,
+    install_game_indexes, install_sales_summary_key,
+)
+# Clave del advisory lock de PostgreSQL: un solo worker aplica el esquema si arrancan varios a la vez
+SCHEMA_LOCK_KEY = 7_017_001
+
+# Resumen del arranque (tiempos por etapa, si se aplico el esquema) en el logger "startup"
+logger = logging.getLogger("startup")
+
+timings_ms: Dict[str, float] = {}
+report: Dict[str, Any] = {"schema_version": SCHEMA_VERSION, "schema_migrated": None}
+
+
+def record(stage: str, seconds: float):
+    timings_ms[stage] = round(seconds * 1000, 2)
+
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def startup_report() -> Dict[str, Any]:
+    return {**report, "timings_ms": dict(timings_ms), "total_ms": round(sum(timings_ms.values()), 2)}
+
+
+async def current_schema_version(conn: AsyncConnection) -> Optional[int]:
+    table = SchemaVersionSQL.__table__
+    has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(table.name))
+    if not has_table:
+        return None
+    return await conn.scalar(select(table.c.version).where(table.c.id == 1))
+
+
+async def ensure_schema(conn: AsyncConnection) -> bool:
+    """
+    Aplica create_all y los SCHEMA_INSTALLERS solo si la version guardada no es SCHEMA_VERSION.
+    Con el esquema al dia el arranque hace una o dos consultas en vez de todo el DDL.
+    Devuelve True si ha aplicado el esquema.
+    """
+    if await current_schema_version(conn) == SCHEMA_VERSION:
+        return False
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        # Otro worker puede haberlo aplicado mientras esperabamos el lock
+        if await current_schema_version(conn) == SCHEMA_VERSION:
+            return False
+
+    await conn.run_sync(SQLModel.metadata.create_all)  # checkfirst: solo crea lo que falta
+    for installer in SCHEMA_INSTALLERS:
+        await installer(conn)
+
+    table = SchemaVersionSQL.__table__
+    await conn.execute(delete(table))
+    await conn.execute(insert(table).values(id=1, version=SCHEMA_VERSION, applied_at=datetime.now()))
+    return True
@@ -0,0 +1,104 @@
+import codecs
+import csv
+import re
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+from fastapi import UploadFile
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from sqlmodels_db import Subscriber
+
+# Direcciones por INSERT durante la importacion (y tamano de lectura del fichero subido)
+IMPORT_BATCH_SIZE = 1000
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def normalize_email(email: str) -> Optional[str]:
+    """Email sin espacios y en minusculas, o None si no tiene formato de email."""
+    email = (email or "").strip().lower()
+    return email if EMAIL_PATTERN.match(email) else None
+
+
+def _insert_ignore(conn: AsyncConnection):
+    # INSERT ... ON CONFLICT (email) DO NOTHING: los duplicados no fallan ni necesitan un SELECT previo
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    return dialect.insert(Subscriber.__table__).on_conflict_do_nothing(index_elements=["email"])
+
+
+async def insert_subscribers(conn: AsyncConnection, emails: Iterable[str]) -> int:
+    """Inserta los emails (ya normalizados) en un solo INSERT multi-fila; devuelve cuantos eran nuevos."""
+    now = datetime.now()
+    rows = [{"email": email, "subscribed_at": now} for email in emails]
+    if not rows:
+        return 0
+    table = Subscriber.__table__
+    result = await conn.execute(_insert_ignore(conn).returning(table.c.id), rows)
+    # RETURNING solo devuelve las filas insertadas, no las que chocaron con el UNIQUE
+    return len(result.all())
+
+
+async def subscribe(session: AsyncSession, email: str) -> bool:
+    """Alta de un email en un unico round trip; False si ya estaba suscrito."""
+    inserted = await insert_subscribers(await session.connection(), [email])
+    await session.commit()
+    return bool(inserted)
+
+
+async def upload_lines(upload: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Lineas de un fichero subido, leido por bloques (sin cargarlo entero en memoria)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await upload.read(chunk_size)
+        pending += decoder.decode(chunk, final=not chunk)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if chunk and lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+        if not chunk:
+            return
+
+
+async def import_subscribers_csv(
+    conn: AsyncConnection, upload: UploadFile, batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Importa un CSV de emails (columna 'email' si hay cabecera, si no la primera columna).
+    Deduplica dentro del fichero y, por lotes de `batch_size`, contra la tabla con ON CONFLICT DO NOTHING.
+    """
+    stats = {"rows": 0, "invalid": 0, "duplicates": 0, "inserted": 0}
+    seen = set()
+    batch = []
+    email_column: Optional[int] = None
+
+    async for line in upload_lines(upload):
+        row = next(csv.reader([line]), [])
+        if not any(cell.strip() for cell in row):
+            continue
+        if email_column is None:
+            header = [cell.strip().lower() for cell in row]
+            email_column = header.index("email") if "email" in header else 0
+            if "email" in header:
+                continue
+        stats["rows"] += 1
+        email = normalize_email(row[email_column]) if email_column < len(row) else None
+        if email is None:
+            stats["invalid"] += 1
+        elif email in seen:
+            stats["duplicates"] += 1
+        else:
+            seen.add(email)
+            batch.append(email)
+            if len(batch) >= batch_size:
+                stats["inserted"] += await insert_subscribers(conn, batch)
+                batch = []
+
+    stats["inserted"] += await insert_subscribers(conn, batch)
+    # Lo que no se inserto sin ser invalido ni repetido en el fichero ya estaba en la tabla
+    stats["duplicates"] = stats["rows"] - stats["invalid"] - stats["inserted"]
+    return stats
@@ -0,0 +1,73 @@
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from assets import asset_srcset, asset_url
+from cache import cache
+from instrumentation import add_render_time
+
+TEMPLATES_DIR = "templates"
+# Bytecode compilado de las plantillas, compartido entre workers y reinicios
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+# En produccion las plantillas no cambian sin reiniciar: sin auto_reload no se hace stat() en cada render
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "false").strip().lower() in ("1", "true", "yes", "on")
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", "300"))
+
+
+
+class TimedTemplate(Template):
+    """Template que suma su tiempo de render a la peticion en curso (Server-Timing)."""
+
+    def render(self, *args, **kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            add_render_time(time.perf_counter() - started)
+
+
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+)
+env.template_class = TimedTemplate
+env.globals.update(asset_url=asset_url, asset_srcset=asset_srcset)
+# Unica instancia para main.py y los routers
+templates = Jinja2Templates(env=env)
+
+
+def warm_templates() -> Dict[str, Any]:
+    """Compila todas las plantillas al arrancar (y deja su bytecode en TEMPLATE_CACHE_DIR)."""
+    started = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return {"templates": len(names), "seconds": round(time.perf_counter() - started, 4)}
+
+
+async def render_cached(
+    request: Request,
+    key: str,
+    name: str,
+    load_context: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+) -> HTMLResponse:
+    """
+    HTML ya renderizado desde el cache de lecturas; si no esta, carga el contexto, renderiza y lo guarda.
+    Solo para paginas que dependen de la ruta y de datos invalidados por tabla (cache.invalidate_*):
+    la clave tiene que incluir todo lo que cambia el resultado (pagina, tamano de pagina...).
+    """
+    html = await cache.get(key)
+    if html is None:
+        generation = await cache.generation()
+        context = await load_context() if load_context else {}
+        html = env.get_template(name).render({"request": request, **context})
+        await cache.set(key, html, ttl=PAGE_CACHE_TTL_SECONDS, generation=generation)
+    return HTMLResponse(html)
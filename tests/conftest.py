@@ -0,0 +1,129 @@
+"""
+Fixtures comunes: la app corre contra una base SQLite temporal y copias temporales de los CSV,
+igual que benchmark.py. Las variables de entorno se ponen antes de importar cualquier modulo de la app.
+"""
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Plantillas, statics y data/ se buscan con rutas relativas
+os.chdir(ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ["DB_PROFILE"] = "sqlite"
+for variable, name in (
+    ("ARCHIVE_EXPORT_DIR", "archive_exports"),
+    ("CSV_SNAPSHOT_DIR", "csv_snapshots"),
+    ("AUDIT_LOG_DIR", "audit_logs"),
+    ("TEMPLATE_CACHE_DIR", "jinja_cache"),
+    ("STATIC_BUILD_DIR", "static_build"),
+):
+    os.environ[variable] = os.path.join(WORKDIR, name)
+for variable, source in (("GAMES_CSV_PATH", "data/games.csv"), ("CONSOLES_CSV_PATH", "data/consoles.csv")):
+    target = os.path.join(WORKDIR, os.path.basename(source))
+    shutil.copyfile(source, target)
+    os.environ[variable] = target
+os.environ["DELETED_GAMES_CSV_PATH"] = os.path.join(WORKDIR, "deleted_games.csv")
+os.environ["DELETED_CONSOLES_CSV_PATH"] = os.path.join(WORKDIR, "deleted_consoles.csv")
+os.environ["AUDIT_FSYNC_INTERVAL_SECONDS"] = "0.05"
+
+
+def game_payload(i: int = 0, **overrides):
+    payload = {
+        "Rank": 5_000_000 + i, "Game_Title": f"Test Game {i}", "Platform": "TEST", "Year": 2020,
+        "Genre": "Action", "Publisher": "Tests", "North_America": 0.1, "Europe": 0.1, "Japan": 0.1,
+        "Rest_of_World": 0.1, "Global": 0.4, "Review": "Test",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def console_payload(i: int = 0, **overrides):
+    payload = {
+        "Console_Name": f"Test Console {i}", "Type": "Home", "Company": "Tests",
+        "Released_Year": 2020, "Discontinuation_Year": 2024, "Units_Sold": 1.0,
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient con el lifespan arrancado y la base cargada desde data/*.csv."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from db_connection import engine
+    from migration import bulk_import_csv
+    from sales_summary import refresh_sales_summary
+    from sqlmodels_db import ConsoleSQL, GameSQL
+
+    async def seed():
+        await bulk_import_csv("data/games.csv", GameSQL, engine)
+        await bulk_import_csv("data/consoles.csv", ConsoleSQL, engine)
+        async with engine.begin() as conn:
+            await refresh_sales_summary(conn)
+
+    with TestClient(main.app) as test_client:
+        test_client.portal.call(seed)
+        yield test_client
+
+
+@pytest.fixture
+def run(client):
+    """Ejecuta una corrutina en el loop de la app (el mismo que usan el engine y el pool)."""
+    def run_coroutine(function, *args):
+        return client.portal.call(function, *args)
+    return run_coroutine
+
+
+_sequence = itertools.count(1)
+
+
+def next_id() -> int:
+    """Numero unico por sesion para titulos, Rank e ids de prueba."""
+    return next(_sequence)
+
+
+@pytest.fixture
+def new_game(client):
+    def create(**overrides):
+        response = client.post("/games/", json=game_payload(next_id(), **overrides))
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
+
+
+@pytest.fixture
+def new_console(client):
+    def create(**overrides):
+        response = client.post("/consoles/", json=console_payload(next_id(), **overrides))
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
+
+
+@pytest.fixture
+def games_csv(tmp_path):
+    """Copia pequena de data/games.csv (las primeras `rows` filas) y una fabrica de CsvStore sobre ella."""
+    from csv_store import CsvStore
+    from models import GameWithId
+    from operations import column_fields, game_columns
+
+    path = tmp_path / "games.csv"
+
+    def make_store(rows: int = 20, **options) -> CsvStore:
+        if not path.exists():
+            with open("data/games.csv", encoding="utf-8") as source:
+                path.write_text("".join(itertools.islice(source, rows + 1)), encoding="utf-8")
+        options = {"unique_fields": ["Rank"], "columns": game_columns, "snapshot_dir": str(tmp_path / "snapshots"),
+                   **options}
+        return CsvStore(str(path), "index", column_fields, GameWithId, **options)
+    return make_store
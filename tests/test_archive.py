@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from archive_retention import install_archive_nullable_columns
+from sqlmodels_db import ArchivedConsoleSQL
+from tests.conftest import next_id
+
+
+def test_archive_and_restore_by_filter_in_one_call(client, new_game):
+    platform = f"ARCH{next_id()}"
+    ids = sorted(new_game(Platform=platform)["index"] for _ in range(3))
+
+    archived = client.post("/games/archive", json={"platform": platform}).json()
+    assert archived["moved"] == 3 and sorted(archived["ids"]) == ids
+    assert all(client.get(f"/games/{game_id}").status_code == 404 for game_id in ids)
+
+    restored = client.post("/games/restore", json={"platform": platform}).json()
+    assert restored["moved"] == 3
+    assert all(client.get(f"/games/{game_id}").status_code == 200 for game_id in ids)
+
+
+def test_games_without_year_can_be_archived(client, new_game):
+    platform = f"NOYEAR{next_id()}"
+    game = new_game(Platform=platform, Year=None)
+
+    response = client.post("/games/archive", json={"platform": platform})
+    assert response.status_code == 200 and response.json()["ids"] == [game["index"]]
+    assert client.post("/games/restore", json={"ids": [game["index"]]}).json()["moved"] == 1
+    assert client.get(f"/games/{game['index']}").json()["Year"] is None
+
+
+def test_archive_filter_without_matches_moves_nothing(client):
+    response = client.post("/consoles/archive", json={"company": f"Nobody{next_id()}"})
+    assert response.status_code == 200 and response.json() == {"moved": 0, "ids": []}
+
+
+def test_legacy_not_null_year_is_relaxed_keeping_rows(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                'CREATE TABLE archivedgamesql ("index" INTEGER PRIMARY KEY, "Rank" INTEGER NOT NULL, '
+                '"Game_Title" VARCHAR NOT NULL, "Platform" VARCHAR NOT NULL, "Year" INTEGER NOT NULL, '
+                '"Genre" VARCHAR NOT NULL, "Publisher" VARCHAR NOT NULL, "North_America" FLOAT, "Europe" FLOAT, '
+                '"Japan" FLOAT, "Rest_of_World" FLOAT, "Global" FLOAT, "Review" VARCHAR, archived_at DATETIME NOT NULL)'
+            ))
+            await conn.execute(text("CREATE INDEX ix_archivedgamesql_archived_at ON archivedgamesql (archived_at)"))
+            await conn.execute(text(
+                "INSERT INTO archivedgamesql VALUES (1, 1, 'Old', 'PS2', 2001, 'Action', 'Sony', "
+                "NULL, NULL, NULL, NULL, 1.5, NULL, '2020-01-01 00:00:00')"
+            ))
+            await conn.run_sync(lambda sync_conn: ArchivedConsoleSQL.__table__.create(sync_conn))
+            await install_archive_nullable_columns(conn)
+            await conn.execute(text(
+                "INSERT INTO archivedgamesql (\"index\", \"Rank\", \"Game_Title\", \"Platform\", \"Genre\", "
+                "\"Publisher\", archived_at) VALUES (2, 2, 'No year', 'PS2', 'Action', 'Sony', '2020-01-01')"
+            ))
+            found = (
+                (await conn.execute(text('SELECT "index", "Year" FROM archivedgamesql ORDER BY "index"'))).all(),
+                await conn.run_sync(lambda sync_conn: [
+                    index["name"] for index in inspect(sync_conn).get_indexes("archivedgamesql")
+                ]),
+            )
+        await engine.dispose()
+        return found
+
+    rows, indexes = asyncio.run(scenario())
+    assert rows == [(1, 2001), (2, None)]
+    assert "ix_archivedgamesql_archived_at" in indexes
@@ -0,0 +1,38 @@
+import gzip
+
+from assets import IMMUTABLE_CACHE_CONTROL, asset_url, build_assets, manifest
+
+
+def test_build_is_idempotent_and_fingerprints_names(client):
+    first = dict(manifest)
+    build_assets()
+    assert manifest == first
+    url = asset_url("style.css")
+    assert url.startswith("/statics/style.") and url != "/statics/style.css"
+    assert asset_url("missing.css") == "/statics/missing.css"
+
+
+def test_hashed_assets_are_immutable_and_precompressed(client):
+    url = asset_url("style.css")
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200 and plain.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.text == plain.text
+
+
+def test_gzip_with_zero_quality_is_not_used(client):
+    response = client.get(asset_url("style.css"), headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+
+
+def test_unhashed_names_keep_working_without_immutable_caching(client):
+    response = client.get("/statics/style.css")
+    assert response.status_code == 200
+    assert response.headers.get("cache-control") != IMMUTABLE_CACHE_CONTROL
+
+
+def test_pages_link_hashed_assets(client):
+    assert asset_url("img.jpg") in client.get("/").text
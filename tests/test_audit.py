@@ -0,0 +1,124 @@
+import asyncio
+import csv
+import glob
+import gzip
+import json
+import logging
+import time
+
+from audit import AuditLog
+
+
+def read_events(directory):
+    events = []
+    for path in sorted(glob.glob(f"{directory}/*.ndjson.gz")):
+        with gzip.open(path, "rt") as f:
+            events.extend(json.loads(line) for line in f)
+    return events
+
+
+def test_record_without_writer_task_writes_directly(tmp_path):
+    log = AuditLog(directory=str(tmp_path))
+    log.record("game", "create", 1, data={"Game_Title": "A"})
+    log.close()
+
+    events = read_events(tmp_path)
+    assert [(e["entity"], e["action"], e["ids"]) for e in events] == [("game", "create", [1])]
+    assert log.stats()["direct_writes"] == 1
+
+
+def test_stop_drains_queue_and_returns_promptly(tmp_path):
+    log = AuditLog(directory=str(tmp_path), fsync_interval=30)
+
+    async def scenario():
+        log.start()
+        for i in range(50):
+            log.record("game", "update", i)
+        await asyncio.sleep(0.05)
+        # El escritor esta esperando con timeout (hay datos sin fsync): stop no debe colgarse
+        log.record("game", "update", 50)
+        started = time.monotonic()
+        await log.stop(timeout=5)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 2
+    assert [e["ids"][0] for e in read_events(tmp_path)] == list(range(51))
+    assert log.stats()["running"] is False
+
+
+def test_full_queue_does_not_lose_events(tmp_path):
+    log = AuditLog(directory=str(tmp_path), queue_size=1)
+
+    async def scenario():
+        log.start()
+        for i in range(20):
+            log.record("console", "update", i)
+        await log.stop(timeout=5)
+
+    asyncio.run(scenario())
+    assert sorted(e["ids"][0] for e in read_events(tmp_path)) == list(range(20))
+    assert log.stats()["overflow_writes"] > 0
+
+
+def test_delete_events_are_copied_to_the_backup_csv(tmp_path):
+    backup = tmp_path / "deleted.csv"
+    log = AuditLog(directory=str(tmp_path / "logs"))
+    log.register_backup("csv_game", str(backup), ["index", "Game_Title"])
+
+    async def scenario():
+        log.start()
+        log.record("csv_game", "delete", 7, data={"index": 7, "Game_Title": "Gone"})
+        log.record("csv_game", "update", 8, data={"index": 8, "Game_Title": "Kept"})
+        await log.stop()
+
+    asyncio.run(scenario())
+    with open(backup, newline="") as f:
+        assert list(csv.reader(f)) == [["7", "Gone"]]
+
+
+def test_stop_waits_for_overflow_writes_in_the_executor(tmp_path):
+    log = AuditLog(directory=str(tmp_path), queue_size=1)
+    write_direct = log._write_direct
+
+    def slow_write_direct(event):
+        time.sleep(0.05)
+        write_direct(event)
+
+    log._write_direct = slow_write_direct
+
+    async def scenario():
+        log.start()
+        for i in range(10):
+            log.record("game", "update", i)
+        await log.stop(timeout=5)
+
+    asyncio.run(scenario())
+    assert sorted(e["ids"][0] for e in read_events(tmp_path)) == list(range(10))
+
+
+def test_failed_batch_is_logged_and_written_on_the_next_attempt(tmp_path, caplog):
+    log = AuditLog(directory=str(tmp_path), fsync_interval=0.01)
+    write_batch = log._write_batch
+    failures = []
+
+    def flaky_write_batch(events):
+        if not failures:
+            failures.append(len(events))
+            raise OSError("disk full")
+        write_batch(events)
+
+    log._write_batch = flaky_write_batch
+
+    async def scenario():
+        log.start()
+        log.record("csv_game", "delete", 1)
+        while not failures:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        log.record("csv_game", "delete", 2)
+        await log.stop(timeout=5)
+
+    with caplog.at_level(logging.ERROR, logger="audit"):
+        asyncio.run(scenario())
+    assert [e["ids"][0] for e in read_events(tmp_path)] == [1, 2]
+    assert caplog.records[0].exc_info is not None and log.stats()["failed"] == 0
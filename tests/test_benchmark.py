@@ -0,0 +1,36 @@
+import json
+import subprocess
+import sys
+
+import benchmark
+import main
+from tests.conftest import ROOT
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert benchmark.percentile(values, 0.50) == 50.0
+    assert benchmark.percentile(values, 0.95) == 95.0
+    assert benchmark.percentile(values, 0.99) == 99.0
+    assert benchmark.percentile([1.0, 2.0, 3.0], 0.5) == 2.0
+    assert benchmark.percentile([], 0.5) == 0.0
+
+
+def test_every_route_has_a_scenario(client):
+    selected = benchmark.scenarios(max_game_id=100, max_console_id=10)
+    assert benchmark.uncovered_routes(main.app, selected) == []
+
+
+def test_cli_reports_each_selected_scenario(tmp_path):
+    output = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, "benchmark.py", "--only", "GET /admin/pool", "-n", "4", "-c", "2", "--warmup", "0",
+         "-o", str(output)],
+        capture_output=True, text=True, cwd=ROOT, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(output.read_text())
+    assert report["meta"]["seeded_games"] > 0
+    [pool] = report["results"]
+    assert (pool["name"], pool["requests"], pool["errors"]) == ("GET /admin/pool", 4, 0)
+    assert pool["p50_ms"] <= pool["p99_ms"]
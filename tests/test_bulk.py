@@ -0,0 +1,43 @@
+from tests.conftest import console_payload, game_payload, next_id
+
+
+def test_mixed_batch_reports_each_operation(client, new_game):
+    kept, gone = new_game(), new_game()
+    response = client.post("/games/bulk", json={"operations": [
+        {"op": "insert", "data": game_payload(next_id(), Game_Title="Bulk new")},
+        {"op": "update", "id": kept["index"], "data": {"Global": 9.5}},
+        {"op": "delete", "id": gone["index"]},
+        {"op": "update", "id": 10**9, "data": {"Global": 1.0}},
+        {"op": "delete"},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["status"] for item in body["results"]] == ["created", "updated", "deleted", "not_found", "invalid"]
+    assert (body["created"], body["updated"], body["deleted"], body["failed"]) == (1, 1, 1, 2)
+
+    assert client.get(f"/games/{kept['index']}").json()["Global"] == 9.5
+    assert client.get(f"/games/{gone['index']}").status_code == 404
+    created = body["results"][0]["id"]
+    assert client.get(f"/games/{created}").json()["Game_Title"] == "Bulk new"
+
+
+def test_explicit_null_on_required_field_is_invalid(client, new_game, new_console):
+    game = new_game(Game_Title="Not null")
+    response = client.post("/games/bulk", json={"operations": [
+        {"op": "update", "id": game["index"], "data": {"Game_Title": None}},
+        {"op": "update", "id": game["index"], "data": {"Year": None}},
+    ]})
+    assert response.status_code == 200
+    invalid, updated = response.json()["results"]
+    assert invalid["status"] == "invalid" and "Game_Title" in invalid["error"]
+    assert updated["status"] == "updated"
+    stored = client.get(f"/games/{game['index']}").json()
+    assert stored["Game_Title"] == "Not null" and stored["Year"] is None
+
+    console = new_console()
+    response = client.post("/consoles/bulk", json={"operations": [
+        {"op": "update", "id": console["id"], "data": {"Company": None}},
+        {"op": "insert", "data": {**console_payload(next_id()), "Type": None}},
+    ]})
+    assert [item["status"] for item in response.json()["results"]] == ["invalid", "invalid"]
+    assert client.get(f"/consoles/{console['id']}").json()["Company"] == console["Company"]
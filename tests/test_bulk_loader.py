@@ -0,0 +1,63 @@
+import asyncio
+
+import pandas as pd
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+from migration import bulk_import_csv, prepare_bulk_frame
+from sqlmodels_db import ConsoleSQL, GameSQL
+
+
+def test_frame_is_cast_by_column_and_drops_rows_missing_required_values():
+    df = pd.DataFrame({
+        "index": [0, 1, 2], "Rank": ["1", "2", "x"], "Game_Title": ["A", None, "C"], "Platform": ["Wii"] * 3,
+        "Year": [2006.0, None, 1999.0], "Genre": ["Sports"] * 3, "Publisher": ["N"] * 3,
+        "North_America": [1.5, 2.0, None], "Review": [None, "ok", "ok"],
+    })
+    frame, dropped = prepare_bulk_frame(df, GameSQL)
+
+    assert dropped == 2  # Game_Title vacio y Rank no numerico
+    assert "index" not in frame.columns
+    row = frame.iloc[0].to_dict()
+    assert row["Rank"] == 1 and row["Year"] == 2006 and row["North_America"] == 1.5 and row["Review"] is None
+
+
+def test_bulk_import_loads_every_valid_row(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        loaded = await bulk_import_csv("data/consoles.csv", ConsoleSQL, engine, chunk_size=7)
+        async with engine.connect() as conn:
+            stored = await conn.scalar(select(func.count()).select_from(ConsoleSQL.__table__))
+            name = await conn.scalar(select(ConsoleSQL.__table__.c.Console_Name).limit(1))
+        await engine.dispose()
+        return loaded, stored, name
+
+    loaded, stored, name = asyncio.run(scenario())
+    assert loaded == stored == len(pd.read_csv("data/consoles.csv"))
+    assert name
+
+
+def test_bulk_main_installs_the_app_schema_before_loading(tmp_path, monkeypatch):
+    import migration
+    from startup import SCHEMA_VERSION, current_schema_version, ensure_schema
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cli.db'}")
+    monkeypatch.setattr(migration, "engine", engine)
+
+    async def scenario():
+        await migration.bulk_main()
+        async with engine.begin() as conn:
+            version = await current_schema_version(conn)
+            triggers = (await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))).scalars().all()
+            versions = await conn.scalar(text("SELECT count(DISTINCT row_version) FROM games"))
+            # La app ya no tiene nada que aplicar al arrancar sobre esta base
+            migrated = await ensure_schema(conn)
+        await engine.dispose()
+        return version, triggers, versions, migrated
+
+    version, triggers, versions, migrated = asyncio.run(scenario())
+    assert version == SCHEMA_VERSION and not migrated
+    assert triggers and versions > 1
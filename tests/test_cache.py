@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import cache as cache_module
+from cache import LRUCache, get_or_load
+
+
+def test_lru_evicts_oldest_and_expires_entries():
+    lru = LRUCache(maxsize=2, ttl=60)
+
+    async def scenario():
+        await lru.set("a", 1)
+        await lru.set("b", 2)
+        await lru.get("a")
+        await lru.set("c", 3)
+        values = [await lru.get(key) for key in ("a", "b", "c")]
+        await lru.set("expired", 4, ttl=-1)
+        return values + [await lru.get("expired")]
+
+    assert asyncio.run(scenario()) == [1, None, 3, None]
+    assert lru.stats()["evictions"] >= 1
+
+
+def test_invalidation_during_load_is_not_overwritten(monkeypatch):
+    lru = LRUCache()
+    monkeypatch.setattr(cache_module, "cache", lru)
+
+    async def scenario():
+        async def slow_loader():
+            # Una escritura invalida la clave mientras se lee el valor antiguo
+            await lru.delete("game:1")
+            return {"Game_Title": "old"}
+
+        served = await get_or_load("game:1", slow_loader)
+        return served, await lru.get("game:1")
+
+    assert asyncio.run(scenario()) == ({"Game_Title": "old"}, None)
+    assert lru.stats()["stale_sets"] == 1
+
+
+def test_read_through_caches_and_write_invalidates(client, new_game):
+    game = new_game(Game_Title="Cached")
+    assert client.get(f"/games/{game['index']}").json()["Game_Title"] == "Cached"
+    hits = cache_module.cache.stats()["hits"]
+    assert client.get(f"/games/{game['index']}").json()["Game_Title"] == "Cached"
+    assert cache_module.cache.stats()["hits"] == hits + 1
+
+    assert client.patch(f"/games/{game['index']}", json={"Game_Title": "Fresh"}).status_code == 200
+    assert client.get(f"/games/{game['index']}").json()["Game_Title"] == "Fresh"
+
+
+def test_in_process_cache_refuses_several_workers(monkeypatch):
+    monkeypatch.setattr(cache_module, "WEB_CONCURRENCY", 4)
+    with pytest.raises(RuntimeError):
+        cache_module.check_single_worker()
@@ -0,0 +1,77 @@
+from change_feed import encode_change_token
+from tests.conftest import next_id
+
+
+def sync(client, path, since=None, limit=500):
+    """Sigue next_token hasta has_more=False; devuelve (ultima version de cada id, ids borrados, token final)."""
+    replica, deleted = {}, set()
+    while True:
+        params = {"limit": limit} if since is None else {"since": since, "limit": limit}
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        for item in body["items"]:
+            key = item.get("index", item.get("id"))
+            replica[key] = item
+            deleted.discard(key)
+        for key in body["deleted"]:
+            replica.pop(key, None)
+            deleted.add(key)
+        since = body["next_token"]
+        if not body["has_more"]:
+            return replica, deleted, since
+
+
+def test_incremental_sync_sees_creates_updates_and_deletes(client, new_game):
+    _, _, token = sync(client, "/games/changes", limit=5000)
+    kept = new_game(Game_Title="Kept")
+    gone = new_game()
+    assert client.patch(f"/games/{kept['index']}", json={"Game_Title": "Renamed"}).status_code == 200
+    assert client.delete(f"/games/{gone['index']}").status_code == 200
+
+    replica, deleted, token = sync(client, "/games/changes", since=token)
+    assert replica[kept["index"]]["Game_Title"] == "Renamed"
+    assert gone["index"] not in replica and gone["index"] in deleted
+
+    replica, deleted, _ = sync(client, "/games/changes", since=token)
+    assert kept["index"] not in replica and not deleted
+
+
+def test_small_pages_deliver_every_change_once(client, new_console):
+    _, _, token = sync(client, "/consoles/changes", limit=5000)
+    created = [new_console()["id"] for _ in range(7)]
+    seen = []
+    since = token
+    while True:
+        body = client.get("/consoles/changes", params={"since": since, "limit": 2}).json()
+        assert len(body["items"]) + len(body["deleted"]) <= 2
+        seen.extend(item["id"] for item in body["items"])
+        since = body["next_token"]
+        if not body["has_more"]:
+            break
+    assert seen == created
+
+
+def test_archive_sends_tombstones_and_restore_hides_them(client, new_game):
+    _, _, token = sync(client, "/games/changes", limit=5000)
+    platform = f"FEED{next_id()}"
+    games = [new_game(Platform=platform)["index"] for _ in range(3)]
+    assert client.post("/games/archive", json={"platform": platform}).json()["moved"] == 3
+
+    replica, deleted, after_archive = sync(client, "/games/changes", since=token)
+    assert set(games) <= deleted and not set(games) & set(replica)
+
+    assert client.post("/games/restore", json={"platform": platform}).json()["moved"] == 3
+    replica, deleted, _ = sync(client, "/games/changes", since=after_archive)
+    assert set(games) <= set(replica) and not set(games) & deleted
+    # Una resincronizacion completa tampoco los da por borrados
+    replica, deleted, _ = sync(client, "/games/changes", limit=5000)
+    assert set(games) <= set(replica) and not set(games) & deleted
+
+
+def test_invalid_tokens_are_rejected(client):
+    assert client.get("/games/changes", params={"since": "not-a-token"}).status_code == 400
+    other_table = encode_change_token("consoles", 0)
+    assert client.get("/games/changes", params={"since": other_table}).status_code == 400
+    ahead = encode_change_token("games", 10**15)
+    assert client.get("/games/changes", params={"since": ahead}).status_code == 410
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from columnar import CATEGORY, FLOAT, INT, TEXT, ColumnarTable
+
+
+def test_filters_ignore_case_for_text_and_categories(games_csv):
+    store = games_csv()
+    wii_sports = store.query({"Platform": "wii", "Genre": "SPORTS"})
+    assert [game.Rank for game in wii_sports] == [1, 4, 12, 14]
+    assert [game.index for game in store.query({"Game_Title": "tetris"})] == [4]
+    assert store.query({"Platform": "Dreamcast"}) == []
+
+
+def test_sort_and_limit_match_a_full_sort(games_csv):
+    store = games_csv()
+    top = store.query({"Platform": "DS"}, sort="-Year", limit=3)
+    assert [game.Year for game in top] == [2006.0, 2006.0, 2005.0]
+    # Los empates conservan el orden del CSV, igual que un sort estable completo
+    assert [game.Rank for game in top] == [6, 20, 10]
+    assert [game.Rank for game in store.query(sort="Rank", limit=2)] == [1, 2]
+    with pytest.raises(ValueError, match="Cannot sort by Game_Title"):
+        store.query(sort="Game_Title")
+
+
+def test_view_is_rebuilt_after_writes(games_csv):
+    store = games_csv()
+    store.update(4, {"Platform": "Wii"})
+    store.delete(0)
+    ranks = [game.Rank for game in store.query({"Platform": "Wii"}, sort="Rank")]
+    assert ranks[:2] == [3, 4] and 5 in ranks and 1 not in ranks
+
+
+def test_missing_numbers_sort_last():
+    columns = {"id": INT, "score": FLOAT, "kind": CATEGORY, "name": TEXT}
+    table = ColumnarTable.from_columns(
+        [1, 2, 3], {"id": [1, 2, 3], "score": [2.0, None, 1.0], "kind": ["b", "a", "b"], "name": ["x", "y", "z"]},
+        columns,
+    )
+    assert table.select(table.all_rows(), sort="score").tolist() == [2, 0, 1]
+    assert table.select(table.all_rows(), sort="score", descending=True).tolist() == [0, 2, 1]
+    assert table.select(table.all_rows(), sort="kind").tolist() == [1, 0, 2]
+    assert table.arrays["id"].dtype == np.int64 and not table.sortable("name")
+
+
+def test_csv_endpoint_rejects_unsortable_fields(client):
+    assert client.get("/games-csv", params={"sort": "Game_Title"}).status_code == 400
+    games = client.get("/games-csv", params={"sort": "-Global", "limit": 2}).json()
+    assert len(games) == 2 and games[0]["Global"] >= games[1]["Global"]
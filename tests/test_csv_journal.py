@@ -0,0 +1,96 @@
+import csv
+import os
+
+import pytest
+
+from csv_store import DuplicateError
+from tests.conftest import console_payload, next_id
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return {int(row["index"]): row for row in csv.DictReader(f)}
+
+
+def test_writes_go_to_the_journal_not_the_csv(games_csv):
+    store = games_csv()
+    before = open(store.path, encoding="utf-8").read()
+    created = store.create({**store.get(0).model_dump(), "Rank": 10_001, "Game_Title": "Journaled"}, unique_field="Rank")
+    store.update(1, {"Global": 1.0})
+    store.delete(2)
+
+    assert open(store.path, encoding="utf-8").read() == before
+    with open(store.journal_path, encoding="utf-8") as journal:
+        assert len(journal.readlines()) == 3
+    reopened = games_csv()
+    assert reopened.get(created.index).Game_Title == "Journaled"
+    assert reopened.get(1).Global == 1.0 and reopened.get(2) is None
+
+
+def test_compaction_rewrites_the_csv_and_clears_the_journal(games_csv):
+    store = games_csv(compact_threshold=3)
+    store.update(1, {"Global": 2.0})
+    store.delete(2)
+    store.update(3, {"Game_Title": "Compacted"})
+
+    assert not os.path.exists(store.journal_path)
+    rows = read_csv(store.path)
+    assert 2 not in rows and rows[3]["Game_Title"] == "Compacted" and float(rows[1]["Global"]) == 2.0
+    assert len(games_csv().all()) == 19
+
+
+def test_torn_journal_line_is_ignored(games_csv):
+    store = games_csv()
+    store.update(4, {"Game_Title": "Complete"})
+    with open(store.journal_path, "a", encoding="utf-8") as journal:
+        journal.write('{"op": "upsert", "row": {"index": 5, "Game_')
+    reopened = games_csv()
+    assert reopened.get(4).Game_Title == "Complete"
+    assert reopened.get(5).Game_Title == read_csv(store.path)[5]["Game_Title"]
+
+
+def test_update_that_changes_the_key_renames_the_row(games_csv):
+    store = games_csv()
+    renamed = store.update(3, {"index": 500})
+    assert renamed.index == 500 and store.get(3) is None
+    reopened = games_csv()
+    assert reopened.get(500).Game_Title == read_csv(store.path)[3]["Game_Title"]
+    assert reopened.get(3) is None and len(reopened.all()) == 20
+
+
+def test_update_to_an_existing_key_or_null_is_rejected_before_the_journal(games_csv):
+    store = games_csv()
+    with pytest.raises(DuplicateError, match="index=4 already exists"):
+        store.update(3, {"index": 4})
+    with pytest.raises(ValueError):
+        store.update(3, {"index": None})
+    with pytest.raises(ValueError):
+        store.update(3, {"Rank": None})
+    assert not os.path.exists(store.journal_path)
+    assert store.get(3).index == 3 and store.get(4).index == 4
+
+
+def test_malformed_journal_entry_is_skipped(games_csv):
+    store = games_csv()
+    with open(store.journal_path, "a", encoding="utf-8") as journal:
+        journal.write('{"op": "upsert", "row": {"index": null}}\n')
+    store.update(4, {"Game_Title": "After the bad entry"})
+    reopened = games_csv()
+    assert reopened.get(4).Game_Title == "After the bad entry" and len(reopened.all()) == 20
+
+
+def test_put_console_with_a_new_or_null_id(client):
+    created = client.post("/console", json=console_payload(next_id(), Id=None)).json()
+    count = len(client.get("/consoles").json())
+    new_id = created["Id"] + 10_000
+
+    body = {field: value for field, value in created.items() if field != "Id"}
+    response = client.put(f"/console/{created['Id']}", json={**body, "Id": new_id})
+    assert response.status_code == 200 and response.json()["Id"] == new_id
+    assert client.get(f"/console/{created['Id']}").status_code == 404
+    assert len(client.get("/consoles").json()) == count
+
+    assert client.put(f"/console/{new_id}", json={**body, "Id": 1}).status_code == 409
+    assert client.put(f"/console/{new_id}", json={**body, "Id": None}).status_code == 422
+    assert client.get(f"/console/{new_id}").json()["Console_Name"] == created["Console_Name"]
+    assert client.delete(f"/console/{new_id}").status_code == 200
@@ -0,0 +1,71 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from csv_snapshot import load_snapshot, snapshot_prefix
+from operations import column_fields, game_columns
+
+
+def small_csv(tmp_path, rows=10):
+    path = tmp_path / "games.csv"
+    with open("data/games.csv", encoding="utf-8") as source:
+        path.write_text("".join(next(source) for _ in range(rows + 1)), encoding="utf-8")
+    return str(path)
+
+
+def published(snapshot_dir, path):
+    return [name for name in os.listdir(snapshot_dir) if name.startswith(snapshot_prefix(path))]
+
+
+def test_snapshot_rows_match_the_csv(tmp_path):
+    path = small_csv(tmp_path)
+    snapshot = load_snapshot(path, "index", game_columns, snapshot_dir=str(tmp_path / "snap"))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert snapshot.fieldnames == column_fields and len(snapshot) == len(rows)
+    assert [snapshot.row(position) for position in range(len(snapshot))] == rows
+    assert snapshot.position(3) == 3 and snapshot.position(999) is None
+
+
+def test_second_load_maps_the_published_files(tmp_path):
+    path, snapshot_dir = small_csv(tmp_path), str(tmp_path / "snap")
+    load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    assert len(published(snapshot_dir, path)) == 1
+
+    snapshot = load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    assert isinstance(snapshot.keys, np.memmap) and isinstance(snapshot.table.arrays["Global"], np.memmap)
+    assert not [name for name in os.listdir(snapshot_dir) if name.startswith(".tmp-")]
+
+
+def test_changed_csv_replaces_the_old_snapshot(tmp_path):
+    path, snapshot_dir = small_csv(tmp_path), str(tmp_path / "snap")
+    load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    first = published(snapshot_dir, path)
+    small_csv(tmp_path, rows=5)
+    snapshot = load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    assert len(snapshot) == 5
+    current = published(snapshot_dir, path)
+    assert len(current) == 1 and current != first
+
+
+def test_snapshot_in_an_old_format_is_rebuilt(tmp_path, capsys):
+    path, snapshot_dir = small_csv(tmp_path), str(tmp_path / "snap")
+    load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    meta_path = os.path.join(snapshot_dir, published(snapshot_dir, path)[0], "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(meta_path, "w") as f:
+        json.dump({**meta, "format": 0}, f)
+
+    snapshot = load_snapshot(path, "index", game_columns, snapshot_dir=snapshot_dir)
+    assert "Discarding CSV snapshot" in capsys.readouterr().out
+    assert len(snapshot) == 10 and isinstance(snapshot.keys, np.memmap)
+
+
+def test_without_snapshot_dir_nothing_is_written(tmp_path):
+    path = small_csv(tmp_path)
+    snapshot = load_snapshot(path, "index", game_columns, snapshot_dir="")
+    assert len(snapshot) == 10 and not isinstance(snapshot.keys, np.memmap)
+    assert os.listdir(tmp_path) == ["games.csv"]
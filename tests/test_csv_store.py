@@ -0,0 +1,29 @@
+import os
+import time
+
+
+def test_reads_come_from_memory_and_index_by_id(games_csv):
+    store = games_csv()
+    assert len(store.all()) == 20
+    assert store.get(1).Game_Title == "Super Mario Bros."
+    assert store.get(999) is None
+    assert store.find("Rank", 1).index == 0
+
+
+def test_external_edit_is_picked_up_by_mtime(games_csv):
+    store = games_csv()
+    assert store.get(0).Game_Title == "Wii Sports"
+    with open(store.path, encoding="utf-8") as f:
+        content = f.read()
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write(content.replace("Wii Sports", "Wii Sports Resort Edition", 1))
+    later = time.time() + 5
+    os.utime(store.path, (later, later))
+    assert store.get(0).Game_Title == "Wii Sports Resort Edition"
+
+
+def test_two_stores_on_one_file_see_each_others_writes(games_csv):
+    writer, reader = games_csv(), games_csv()
+    assert reader.get(3) is not None
+    writer.update(3, {"Game_Title": "Changed elsewhere"})
+    assert reader.get(3).Game_Title == "Changed elsewhere"
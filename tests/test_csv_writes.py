@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from csv_store import DuplicateError
+from operations import games_store, run_write
+from tests.conftest import game_payload, next_id
+
+
+def test_concurrent_creates_from_two_stores_get_distinct_ids(games_csv):
+    # Dos stores sobre el mismo fichero: el flock hace de lock entre procesos
+    stores = [games_csv(), games_csv()]
+    payloads = [game_payload(next_id()) for _ in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        created = list(executor.map(lambda item: stores[item[0] % 2].create(item[1], unique_field="Rank"),
+                                    enumerate(payloads)))
+    ids = [game.index for game in created]
+    assert len(set(ids)) == len(ids) == 40
+    assert len(games_csv().all()) == 60
+
+
+def test_create_rejects_a_duplicate_unique_value(games_csv):
+    store = games_csv()
+    with pytest.raises(DuplicateError, match="Rank=1 already exists"):
+        store.create(game_payload(next_id(), Rank=1), unique_field="Rank")
+    assert len(store.all()) == 20
+
+
+def test_run_write_serializes_writers_without_blocking_the_loop(client, run):
+    active, peak = [], []
+    lock = threading.Lock()
+
+    def slow_write():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.gather(*(run_write(games_store, slow_write) for _ in range(4)))
+        ticking.cancel()
+        return ticks
+
+    ticks = run(scenario)
+    assert max(peak) == 1 and len(peak) == 4
+    assert ticks > 4
+
+
+def test_duplicate_rank_returns_409(client):
+    assert client.post("/game", json=game_payload(next_id(), Rank=1)).status_code == 409
+    created = client.post("/game", json=game_payload(next_id()))
+    assert created.status_code == 200
+    assert client.delete(f"/game/{created.json()['index']}").status_code == 200
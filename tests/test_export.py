@@ -0,0 +1,41 @@
+import asyncio
+import csv
+import io
+import json
+
+from sqlmodels_db import ConsoleSQL
+from utils.exporters import csv_stream, ndjson_stream
+
+
+def test_ndjson_export_streams_every_game(client, new_game):
+    game = new_game(Game_Title="Exported")
+    response = client.get("/games/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="games.ndjson"' in response.headers["content-disposition"]
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    ids = [row["index"] for row in rows]
+    assert ids == sorted(ids) and len(ids) == len(set(ids))
+    assert next(row for row in rows if row["index"] == game["index"])["Game_Title"] == "Exported"
+
+
+def test_csv_export_has_one_header_and_model_columns(client):
+    response = client.get("/consoles/export", params={"format": "csv"})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == [column.name for column in ConsoleSQL.__table__.columns]
+    assert rows.count(rows[0]) == 1 and len(rows) > 1
+
+
+def test_streams_emit_one_chunk_per_batch():
+    async def batches():
+        yield [{"id": 1}, {"id": 2}]
+        yield [{"id": 3}]
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    assert asyncio.run(collect(ndjson_stream(batches()))) == ['{"id": 1}\n{"id": 2}\n', '{"id": 3}\n']
+    chunks = asyncio.run(collect(csv_stream(batches(), ["id"])))
+    assert chunks[0] == "id\r\n" and len(chunks) == 3
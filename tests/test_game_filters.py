@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db_ops import install_game_indexes
+from sqlmodels_db import GameSQL
+from tests.conftest import next_id
+
+
+def walk(client, limit, **params):
+    seen, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/games/", params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen.extend(body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen
+
+
+def test_filtered_sort_pages_through_ties_and_nulls(client, new_game):
+    platform = f"SORT{next_id()}"
+    ids = [new_game(Platform=platform, Rank=rank, Year=year)["index"]
+           for rank, year in ((3, 2001), (1, None), (3, 1999), (2, 2001), (3, None))]
+
+    by_rank = walk(client, 2, platform=platform, sort="Rank")
+    assert [game["index"] for game in by_rank] == [ids[1], ids[3], ids[0], ids[2], ids[4]]
+
+    by_year = walk(client, 2, platform=platform, sort="-Year")
+    assert sorted(game["index"] for game in by_year) == sorted(ids)
+    assert [game["Year"] for game in by_year if game["Year"] is not None] == [2001, 2001, 1999]
+
+    in_range = walk(client, 10, platform=platform, year_from=2000, sort="Rank")
+    assert [game["index"] for game in in_range] == [ids[3], ids[0]]
+
+
+def test_cursor_from_another_sort_is_rejected(client, new_game):
+    platform = f"CUR{next_id()}"
+    for _ in range(3):
+        new_game(Platform=platform)
+    cursor = client.get("/games/", params={"platform": platform, "limit": 1, "sort": "Rank"}).json()["next_cursor"]
+    response = client.get("/games/", params={"platform": platform, "limit": 1, "sort": "Year", "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_rank_sort_reads_the_index_without_sorting(client, run):
+    async def plan():
+        from db_connection import engine
+        async with engine.connect() as conn:
+            rows = await conn.execute(text('EXPLAIN QUERY PLAN SELECT * FROM games ORDER BY "Rank", "index" LIMIT 50'))
+            return " ".join(row[-1] for row in rows)
+
+    detail = run(plan)
+    assert "ix_games_rank" in detail and "TEMP B-TREE" not in detail
+
+
+def test_legacy_rank_index_is_recreated_with_the_tiebreaker(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: GameSQL.__table__.create(sync_conn))
+            await conn.execute(text("DROP INDEX ix_games_rank"))
+            await conn.execute(text('CREATE INDEX ix_games_rank ON games ("Rank")'))
+            await install_game_indexes(conn)
+            indexes = await conn.run_sync(lambda sync_conn: {
+                index["name"]: index["column_names"] for index in inspect(sync_conn).get_indexes("games")
+            })
+        await engine.dispose()
+        return indexes
+
+    assert asyncio.run(scenario())["ix_games_rank"] == ["Rank", "index"]
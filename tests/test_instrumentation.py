@@ -0,0 +1,49 @@
+import re
+
+import instrumentation
+from instrumentation import Histogram, Metrics, RequestTimings
+
+
+def server_timing(response):
+    return dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["server-timing"]))
+
+
+def test_server_timing_header_counts_db_and_render(client, new_game):
+    game = new_game()
+    timing = server_timing(client.get(f"/games/{game['index']}"))
+    assert {"db", "pool", "render", "serialize", "app"} <= set(timing)
+    assert float(timing["app"]) >= float(timing["db"])
+
+    page = client.get("/games/view", params={"page": 7, "per_page": 13})
+    assert 'desc="' in page.headers["server-timing"] and float(server_timing(page)["render"]) >= 0
+
+
+def test_metrics_use_route_templates_not_urls(client, new_game):
+    game = new_game()
+    client.get(f"/games/{game['index']}")
+    text = client.get("/metrics").text
+    assert 'route="/games/{game_id}"' in text
+    assert f'route="/games/{game["index"]}"' not in text
+    assert "http_request_db_queries_total" in text and "db_pool_checkouts" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2] and histogram.count == 3
+
+
+def test_render_escapes_label_values():
+    metrics = Metrics()
+    metrics.observe_request("GET", '/odd"route', 200, 0.01, RequestTimings())
+    assert 'route="/odd\\"route"' in metrics.render()
+
+
+def test_slow_queries_are_counted_and_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    before = instrumentation.metrics.slow_queries
+    with caplog.at_level("WARNING", logger="slow_queries"):
+        client.get("/games/", params={"limit": 1, "platform": "slow-query-check"})
+    assert instrumentation.metrics.slow_queries > before
+    assert any("Slow query" in record.message for record in caplog.records)
@@ -0,0 +1,39 @@
+def walk(client, path, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["items"]) <= limit
+        ids.extend(item.get("index", item.get("id")) for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_consoles_pages_cover_the_table_once_in_order(client):
+    ids = walk(client, "/consoles/", 7)
+    assert ids == sorted(ids) and len(ids) == len(set(ids))
+    assert len(ids) >= sum(1 for _ in open("data/consoles.csv")) - 1
+
+
+def test_games_cursor_continues_after_the_last_id(client):
+    first = client.get("/games/", params={"limit": 5}).json()
+    second = client.get("/games/", params={"limit": 5, "cursor": first["next_cursor"]}).json()
+    first_ids = [game["index"] for game in first["items"]]
+    second_ids = [game["index"] for game in second["items"]]
+    assert first_ids == sorted(first_ids) and second_ids[0] > first_ids[-1]
+
+
+def test_rows_inserted_behind_the_cursor_do_not_shift_pages(client, new_console):
+    first = client.get("/consoles/", params={"limit": 3}).json()
+    new_console()
+    second = client.get("/consoles/", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert second["items"][0]["id"] > first["items"][-1]["id"]
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/games/", params={"cursor": "%%%"}).status_code == 400
+    assert client.get("/consoles/", params={"cursor": "bm90LWpzb24"}).status_code == 400
+    assert client.get("/games/", params={"limit": 0}).status_code == 422
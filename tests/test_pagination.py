@@ -0,0 +1,44 @@
+from sqlmodel import select
+
+from cache import cache, count_key
+from pagination import Page, paginate
+from sqlmodels_db import ConsoleSQL
+
+
+def paginate_consoles(run, page, per_page, key=None):
+    async def query():
+        from db_connection import async_session
+        async with async_session() as session:
+            return await paginate(session, select(ConsoleSQL).order_by(ConsoleSQL.id), page, per_page, count_key=key)
+    return run(query)
+
+
+def test_pages_are_sliced_in_sql_with_the_total(run):
+    first, second = paginate_consoles(run, 1, 5), paginate_consoles(run, 2, 5)
+    assert len(first.items) == 5 and first.total == second.total
+    assert first.items[-1].id < second.items[0].id
+    assert first.total_pages == -(-first.total // 5) and first.has_next
+
+
+def test_out_of_range_and_non_positive_pages(run):
+    beyond = paginate_consoles(run, 10_000, 5)
+    assert beyond.items == [] and beyond.total > 0
+    assert paginate_consoles(run, 0, 5).page == 1
+    assert Page([], 1, 20, 0).total_pages == 1
+
+
+def test_total_is_cached_and_invalidated_on_write(client, run, new_console):
+    key = count_key("consoles")
+    run(cache.delete, key)
+    total = paginate_consoles(run, 1, 5, key).total
+    assert run(cache.get, key) == total
+
+    new_console()
+    assert run(cache.get, key) is None
+    assert paginate_consoles(run, 1, 5, key).total == total + 1
+
+
+def test_html_list_pages_render(client):
+    for path in ("/games/view", "/consoles/view", "/games/archived", "/consoles/archived"):
+        response = client.get(path, params={"page": 2})
+        assert response.status_code == 200, path
@@ -0,0 +1,77 @@
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+
+import archive_retention
+import main
+from archive_retention import ARCHIVE_EXPORT_DIR, retention_loop
+from routers import admin
+from tests.conftest import next_id
+
+TOKEN = "test-admin-token"
+
+
+def test_retention_endpoint_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    assert client.post("/admin/archive/retention").status_code == 403
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+    assert client.post("/admin/archive/retention").status_code == 403
+    assert client.post("/admin/archive/retention", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_retention_exports_and_deletes_old_archive_rows(client, new_game, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+    platform = f"RET{next_id()}"
+    game = new_game(Platform=platform)
+    assert client.post("/games/archive", json={"platform": platform}).json()["moved"] == 1
+
+    response = client.post("/admin/archive/retention", params={"days": 0}, headers={"X-Admin-Token": TOKEN})
+    assert response.status_code == 200
+    games_result = next(result for result in response.json() if result["table"] == "archivedgamesql")
+    assert games_result["deleted"] >= 1 and os.path.exists(games_result["file"])
+
+    with gzip.open(games_result["file"], "rt") as f:
+        exported = [json.loads(line)["index"] for line in f]
+    assert game["index"] in exported
+    assert client.post("/games/restore", json={"ids": [game["index"]]}).json()["moved"] == 0
+    assert not glob.glob(os.path.join(ARCHIVE_EXPORT_DIR, ".*.tmp"))
+
+
+def test_shutdown_cancels_the_retention_task(client, run):
+    async def start():
+        main.app.state.retention_task = asyncio.create_task(retention_loop(interval_hours=1))
+        return main.app.state.retention_task
+
+    task = run(start)
+    run(main.stop_retention_task)
+    assert task.done() and task.cancelled()
+    assert main.app.state.retention_task is None
+
+
+def test_retention_loop_logs_results_and_failures(monkeypatch, caplog):
+    calls = []
+
+    async def fake_retention():
+        calls.append(1)
+        if len(calls) == 1:
+            return [{"table": "archivedgamesql", "deleted": 3, "file": "games.ndjson.gz"}]
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        await asyncio.Event().wait()
+
+    async def scenario():
+        task = asyncio.create_task(retention_loop(interval_hours=0))
+        while len(calls) < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    monkeypatch.setattr(archive_retention, "run_retention", fake_retention)
+    with caplog.at_level(logging.INFO, logger="archive_retention"):
+        asyncio.run(scenario())
+    info, failure = caplog.records
+    assert info.getMessage() == "Archive retention: 3 rows from archivedgamesql -> games.ndjson.gz"
+    assert failure.levelno == logging.ERROR and "disk full" in str(failure.exc_info[1])
@@ -0,0 +1,94 @@
+import asyncio
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from sales_summary import install_sales_summary_key
+from routers import admin
+from sqlmodels_db import SalesSummarySQL
+from tests.conftest import next_id
+
+
+def platform_sales(client, platform):
+    response = client.get("/analytics/sales", params={"group_by": ["Platform", "Year"], "platform": platform})
+    assert response.status_code == 200
+    return {row["Year"]: (row["games"], row["Global"]) for row in response.json()}
+
+
+def test_null_year_games_share_one_summary_row(client, new_game, run):
+    platform = f"NULLY{next_id()}"
+    new_game(Platform=platform, Year=None, Global=1.0)
+    new_game(Platform=platform, Year=None, Global=2.0)
+    assert platform_sales(client, platform) == {None: (2, 3.0)}
+
+    async def summary_rows():
+        from db_connection import engine
+        async with engine.connect() as conn:
+            table = SalesSummarySQL.__table__
+            return (await conn.execute(select(table.c.games).where(table.c.Platform == platform))).all()
+
+    assert len(run(summary_rows)) == 1
+
+
+def test_update_and_delete_move_the_totals(client, new_game):
+    platform = f"MOVE{next_id()}"
+    game = new_game(Platform=platform, Year=2001, Global=1.5)
+    new_game(Platform=platform, Year=2001, Global=0.5)
+    assert platform_sales(client, platform) == {2001: (2, 2.0)}
+
+    assert client.patch(f"/games/{game['index']}", json={"Year": 2002}).status_code == 200
+    assert platform_sales(client, platform) == {2001: (1, 0.5), 2002: (1, 1.5)}
+
+    assert client.delete(f"/games/{game['index']}").status_code == 200
+    assert platform_sales(client, platform) == {2001: (1, 0.5)}
+
+
+def test_full_refresh_matches_incremental_summary(client, new_game, run, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "test-admin-token")
+    platform = f"FULL{next_id()}"
+    new_game(Platform=platform, Year=None, Global=1.0)
+    new_game(Platform=platform, Year=1999, Global=2.0)
+    before = platform_sales(client, platform)
+    assert client.post("/analytics/sales/refresh").status_code == 403
+    response = client.post("/analytics/sales/refresh", headers={"X-Admin-Token": "test-admin-token"})
+    assert response.status_code == 200
+    assert platform_sales(client, platform) == before
+
+
+def test_legacy_unique_constraint_is_replaced(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                'CREATE TABLE sales_summary (id INTEGER PRIMARY KEY, "Platform" VARCHAR, "Genre" VARCHAR, '
+                '"Publisher" VARCHAR, "Year" INTEGER, games INTEGER, "North_America" FLOAT, "Europe" FLOAT, '
+                '"Japan" FLOAT, "Rest_of_World" FLOAT, "Global" FLOAT, UNIQUE ("Platform", "Genre", "Publisher", "Year"))'
+            ))
+            await install_sales_summary_key(conn)
+            found = (
+                await conn.scalar(text("SELECT sql FROM sqlite_master WHERE name = 'sales_summary'")),
+                (await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))).scalars().all(),
+            )
+        await engine.dispose()
+        return found
+
+    table_sql, indexes = asyncio.run(scenario())
+    assert "UNIQUE" not in table_sql
+    assert "ux_sales_summary_key" in indexes
+
+
+def test_bulk_main_refreshes_the_summary(tmp_path, monkeypatch):
+    import migration
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}")
+    monkeypatch.setattr(migration, "engine", engine)
+
+    async def scenario():
+        await migration.bulk_main()
+        async with engine.connect() as conn:
+            summary = SalesSummarySQL.__table__
+            games = await conn.scalar(select(func.sum(summary.c.games)))
+        await engine.dispose()
+        return games
+
+    assert asyncio.run(scenario()) == sum(1 for _ in open("data/games.csv")) - 1
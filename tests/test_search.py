@@ -0,0 +1,39 @@
+import db_ops as crud
+from tests.conftest import next_id
+
+
+def search_games(run, q, limit=10, offset=0):
+    async def query():
+        from db_connection import async_session
+        async with async_session() as session:
+            games, total = await crud.search_games(session, q, limit=limit, offset=offset)
+            return [game.Game_Title for game in games], total
+    return run(query)
+
+
+def test_search_pages_and_counts_in_the_database(new_game, run):
+    word = f"Zyxquor{next_id()}"
+    titles = [f"{word} Part {i}" for i in range(12)]
+    for title in titles:
+        new_game(Game_Title=title)
+
+    first, total = search_games(run, word)
+    second, _ = search_games(run, word, offset=10)
+    assert total == 12
+    assert len(first) == 10 and len(second) == 2
+    assert sorted(first + second) == sorted(titles)
+    assert search_games(run, word, offset=20) == ([], 12)
+
+
+def test_search_sees_renamed_titles(client, new_game, run):
+    old, new = f"Qorvath{next_id()}", f"Blenmar{next_id()}"
+    game = new_game(Game_Title=old)
+    assert client.patch(f"/games/{game['index']}", json={"Game_Title": new}).status_code == 200
+    assert search_games(run, old) == ([], 0)
+    assert search_games(run, new) == ([new], 1)
+
+
+def test_search_pages_must_be_positive(client):
+    assert client.get("/games/search", params={"q": "mario", "page": 0}).status_code == 422
+    assert client.get("/consoles/search", params={"q": "play", "page": -1}).status_code == 422
+    assert client.get("/games/search", params={"q": "mario", "page": 2}).status_code == 200
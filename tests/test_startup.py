@@ -0,0 +1,50 @@
+import asyncio
+import subprocess
+import sys
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import startup
+from tests.conftest import ROOT
+
+
+def test_schema_is_applied_once_per_version(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async def scenario():
+        results = []
+        for _ in range(2):
+            async with engine.begin() as conn:
+                results.append(await startup.ensure_schema(conn))
+        applied_ddl = [sql for sql in statements if sql.lstrip().upper().startswith("CREATE")]
+        statements.clear()
+        async with engine.begin() as conn:
+            results.append(await startup.ensure_schema(conn))
+        up_to_date_statements = list(statements)
+        monkeypatch.setattr(startup, "SCHEMA_VERSION", startup.SCHEMA_VERSION + 1)
+        async with engine.begin() as conn:
+            results.append(await startup.ensure_schema(conn))
+            version = await conn.scalar(text("SELECT version FROM schema_version"))
+        await engine.dispose()
+        return results, applied_ddl, up_to_date_statements, version
+
+    results, applied_ddl, up_to_date_statements, version = asyncio.run(scenario())
+    assert results == [True, False, False, True]
+    assert applied_ddl and len(up_to_date_statements) <= 2
+    assert not any("CREATE" in sql.upper() for sql in up_to_date_statements)
+    assert version == startup.SCHEMA_VERSION
+
+
+def test_startup_report_is_exposed(client):
+    report = client.get("/admin/startup").json()
+    assert report["schema_version"] == startup.SCHEMA_VERSION
+    assert {"imports", "schema", "templates"} <= set(report["timings_ms"])
+
+
+def test_heavy_modules_are_not_imported_by_the_app():
+    code = "import main, sys; print(sorted(m for m in ('pandas', 'matplotlib') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    assert result.stdout.strip().splitlines()[-1] == "[]", result.stderr
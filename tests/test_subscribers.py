@@ -0,0 +1,45 @@
+from urllib.parse import unquote
+
+from subscribers import normalize_email
+from tests.conftest import next_id
+
+
+def subscribe(client, email):
+    response = client.post("/subscribe", data={"email": email}, follow_redirects=False)
+    assert response.status_code == 303
+    return unquote(response.headers["location"])
+
+
+def test_normalize_email():
+    assert normalize_email("  Someone@Example.COM ") == "someone@example.com"
+    assert normalize_email("not-an-email") is None
+    assert normalize_email("") is None
+
+
+def test_form_subscription_is_idempotent(client):
+    email = f"form{next_id()}@example.com"
+    assert "Gracias" in subscribe(client, email)
+    assert "ya está suscrito" in subscribe(client, email.upper())
+    assert "inválido" in subscribe(client, "nope")
+
+
+def test_csv_import_deduplicates_in_file_and_against_the_table(client):
+    existing = f"existing{next_id()}@example.com"
+    subscribe(client, existing)
+    fresh = [f"bulk{next_id()}@example.com" for _ in range(3)]
+    body = "email,name\n" + "\n".join(
+        [f"{fresh[0]},A", f"{fresh[1].upper()},B", f" {fresh[0]} ,A again", f"{existing},C", "broken,D", "", f"{fresh[2]},E"]
+    ) + "\n"
+
+    response = client.post("/subscribers/import", files={"file": ("subs.csv", body.encode(), "text/csv")})
+    assert response.status_code == 200
+    assert response.json() == {"rows": 6, "invalid": 1, "duplicates": 2, "inserted": 3}
+
+    again = client.post("/subscribers/import", files={"file": ("subs.csv", body.encode(), "text/csv")}).json()
+    assert again["inserted"] == 0 and again["duplicates"] == 5
+
+
+def test_import_without_header_uses_the_first_column(client):
+    email = f"noheader{next_id()}@example.com"
+    response = client.post("/subscribers/import", files={"file": ("subs.csv", f"{email}\r\n".encode(), "text/csv")})
+    assert response.json()["inserted"] == 1
@@ -0,0 +1,33 @@
+import os
+
+from cache import GAMES_PAGES_PREFIX, STATIC_PAGES_PREFIX, cache
+from templating import TEMPLATE_CACHE_DIR, warm_templates
+
+
+def test_warm_templates_writes_bytecode():
+    result = warm_templates()
+    assert result["templates"] > 0
+    assert any(name.startswith("__jinja2_") for name in os.listdir(TEMPLATE_CACHE_DIR))
+
+
+def test_static_pages_are_rendered_once(client, run):
+    run(cache.delete_prefix, STATIC_PAGES_PREFIX)
+    first = client.get("/about_me")
+    assert first.status_code == 200
+    cached = run(cache.get, f"{STATIC_PAGES_PREFIX}about_me")
+    assert cached == first.text
+    assert client.get("/about_me").text == first.text
+
+
+def test_list_pages_are_invalidated_by_writes(client, run, new_game):
+    key = f"{GAMES_PAGES_PREFIX}view:1:20"
+    client.get("/games/view")
+    assert run(cache.get, key) is not None
+    new_game()
+    assert run(cache.get, key) is None
+
+
+def test_query_dependent_pages_are_not_cached(client):
+    response = client.get("/about", params={"subscription_message": "hola-unica"})
+    assert "hola-unica" in response.text
+    assert "hola-unica" not in client.get("/about").text
@@ -0,0 +1,29 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+
+def ndjson_chunk(rows: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+def csv_chunk(rows: List[Dict[str, Any]], columns: List[str], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def ndjson_stream(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield ndjson_chunk(rows)
+
+
+async def csv_stream(batches: AsyncIterator[List[Dict[str, Any]]], columns: List[str]) -> AsyncIterator[str]:
+    # La cabecera sale sola para que el primer byte no espere al primer bloque de filas
+    yield csv_chunk([], columns, header=True)
+    async for rows in batches:
+        yield csv_chunk(rows, columns)
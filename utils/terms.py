@@ -8,4 +8,35 @@ class Kind(Enum):
 class genre(Enum):
     Type = "Type"
     Company = "Company"
-    Units_sold = "Units_sold"
\ No newline at end of file
+    Units_sold = "Units_sold"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class SalesDimension(str, Enum):
+    Platform = "Platform"
+    Genre = "Genre"
+    Publisher = "Publisher"
+    Year = "Year"
+
+
+class GameSort(str, Enum):
+    # "-" delante = descendente; cada opcion tiene un indice en GameSQL
+    index = "index"
+    index_desc = "-index"
+    Rank = "Rank"
+    Rank_desc = "-Rank"
+    Year = "Year"
+    Year_desc = "-Year"
+    Global = "Global"
+    Global_desc = "-Global"
+    North_America = "North_America"
+    North_America_desc = "-North_America"
+    Europe = "Europe"
+    Europe_desc = "-Europe"
+    Japan = "Japan"
+    Japan_desc = "-Japan"
+    Rest_of_World = "Rest_of_World"
+    Rest_of_World_desc = "-Rest_of_World"